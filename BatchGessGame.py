@@ -0,0 +1,347 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: A NumPy engine that steps many Gess games in lockstep, for rollouts and data generation. Every move of
+#              a batch - one per game - is checked and made with whole-array operations instead of one make_move call
+#              per game, and gives the same result as GessGame.make_move game by game. From the command line:
+#                  python BatchGessGame.py --games 1024 --plies 40
+#              plays the same random games with both engines, checks that they agree, and prints moves/sec for each.
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from GessGame import GessGame, Board, Position, STRIDE, GAME_STATES, SQUARE_NAMES, SQUARE_INDICES
+from SelfPlay import RandomPolicy
+
+# cell codes of the board arrays
+BLANK = 0
+BLACK = 1
+WHITE = 2
+OTHER = 3  # a non-blank cell that is not a stone: the labels and padding of the original layout
+
+# cell code of each color, and the cell of a Board object for each cell code
+COLOR_CODES = {"B": BLACK, "W": WHITE}
+CODE_CELLS = (" ", "B", "W", "  ")
+
+# row and column offsets of the nine cells of a footprint, as broadcastable arrays
+_OFFSETS = np.arange(-1, 2)
+
+# value of each column's bit when a row of cells is packed into an integer, and the bits of columns 3 to 18 once a
+# packed row is shifted right by one - the columns where a ring's center can be
+_COLUMN_BITS = 1 << np.arange(STRIDE, dtype=np.int64)
+_RING_COLUMNS = sum(1 << column for column in range(2, 18))
+
+
+def starting_cells():
+    """
+    :return: the board of a new game as a (21, STRIDE) int8 array of cell codes, laid out as in the Board class
+    """
+    cells = np.zeros((21, STRIDE), dtype=np.int8)
+    for row, cells_of_row in enumerate(Board().get_game_board()):
+        for column, cell in enumerate(cells_of_row):
+            if cell != " ":
+                cells[row, column] = COLOR_CODES.get(cell, OTHER)
+    return cells
+
+
+def ring_centers(cells, color):
+    """
+    The logic of Piece.is_ring at every square where a ring is possible - rows and columns 3 to 18.
+    :param cells: an (M, 21, STRIDE) array of boards
+    :param color: BLACK or WHITE
+    :return: an (M, 16, 16) bool array, True at [m, row - 3, column - 3] if board m has a ring of that color there
+    """
+    stones = cells[:, 2:20, 2:20] == color
+    rings = cells[:, 3:19, 3:19] == BLANK
+    for row in range(3):
+        for column in range(3):
+            if row != 1 or column != 1:
+                rings &= stones[:, row:row + 16, column:column + 16]
+    return rings
+
+
+def ring_owners(cells):
+    """
+    The ring scan of still_in for both players. Each row of a board is packed into an integer with one bit per
+    column, so a ring is three bit operations on three rows instead of nine cell comparisons.
+    :param cells: an (M, 21, STRIDE) array of boards
+    :return: a (black, white) tuple of (M,) bool arrays, True if board m has at least one ring of that color
+    """
+    blanks = (cells == BLANK).astype(np.int64) @ _COLUMN_BITS
+    owners = []
+    for color in (BLACK, WHITE):
+        stones = (cells == color).astype(np.int64) @ _COLUMN_BITS
+        # bit j of a row: the cells in columns j to j + 2 are all stones, or only the middle one is blank
+        solid = stones & (stones >> 1) & (stones >> 2)
+        hollow = stones & (stones >> 2) & (blanks >> 1)
+        rings = solid[:, 2:18] & hollow[:, 3:19] & solid[:, 4:20] & _RING_COLUMNS
+        owners.append(rings.any(axis=1))
+    return owners[0], owners[1]
+
+
+def footprints(cells, games, rows, columns):
+    """
+    :param cells: an (N, 21, STRIDE) array of boards
+    :param games: an (M,) array of board numbers
+    :param rows: an (M,) array of center rows
+    :param columns: an (M,) array of center columns
+    :return: an (M, 3, 3) array of the footprints centered at those squares
+    """
+    return cells[games[:, None, None], rows[:, None, None] + _OFFSETS[:, None], columns[:, None, None] + _OFFSETS]
+
+
+def place(cells, games, rows, columns, pieces):
+    """
+    The logic of Board.add_piece: each piece is only added if its center is in columns b to s and rows 2 to 19, and
+    then only its cells that are in columns b to s and rows 2 to 19 are written.
+    :param pieces: an (M, 3, 3) array of footprints
+    """
+    inside = (rows >= 2) & (rows <= 19) & (columns >= 2) & (columns <= 19)
+    for row in range(3):
+        for column in range(3):
+            target_rows = rows + row - 1
+            target_columns = columns + column - 1
+            write = inside & (target_rows >= 2) & (target_rows <= 19) & (target_columns >= 2) & (target_columns <= 19)
+            cells[games[write], target_rows[write], target_columns[write]] = pieces[write, row, column]
+
+
+def play(cells, turns, states, starts, ends):
+    """
+    Makes one move in each game, following GessGame.make_move step by step, and changes the arrays in place. A move
+    that make_move would turn down part of the way through leaves the same traces on the board as it does there.
+    :param cells: an (N, 21, STRIDE) int8 array of boards
+    :param turns: an (N,) int8 array of whose turn it is, BLACK or WHITE
+    :param states: an (N,) int8 array of game states, as indices of GAME_STATES
+    :param starts: an (N,) array of square indices of the centers of the pieces to move (as in SQUARE_NAMES), or -1
+    :param ends: an (N,) array of square indices of the new centers, or -1
+    :return: an (N,) bool array, True where the move was made
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    made = np.zeros(len(cells), dtype=bool)
+
+    # the game is not over, and the move is on the board - rows 2 to 20 and columns a to t
+    games = np.flatnonzero((states == 0) & (starts >= 20) & (starts < 400) & (ends >= 20) & (ends < 400))
+    start_rows = 20 - starts[games] // 20
+    start_columns = starts[games] % 20 + 1
+    end_rows = 20 - ends[games] // 20
+    end_columns = ends[games] % 20 + 1
+    me = turns[games]
+    other = 3 - me
+
+    # the piece has no stones of the opponent; the direction is straight or truly diagonal, toward a stone of the
+    # mover; and the distance is in range - with the unbounded moves west of distance_in_range
+    pieces = footprints(cells, games, start_rows, start_columns)
+    row_change = end_rows - start_rows
+    column_change = end_columns - start_columns
+    row_steps = np.sign(row_change)
+    column_steps = np.sign(column_change)
+    legal = ~(pieces == other[:, None, None]).any(axis=(1, 2))
+    legal &= (row_change == 0) | (column_change == 0) | (np.abs(row_change) == np.abs(column_change))
+    legal &= (row_steps != 0) | (column_steps != 0)
+    legal &= pieces[np.arange(len(games)), 1 + row_steps, 1 + column_steps] == me
+    legal &= (pieces[:, 1, 1] == me) | ((np.abs(row_change) <= 3) & (column_change <= 3))
+
+    keep = np.flatnonzero(legal)
+    games, me, other, pieces = games[keep], me[keep], other[keep], pieces[keep]
+    start_rows, start_columns, end_rows, end_columns = start_rows[keep], start_columns[keep], end_rows[keep], \
+        end_columns[keep]
+    row_steps, column_steps = row_steps[keep], column_steps[keep]
+    distances = np.maximum(np.abs(row_change[keep]), np.abs(column_change[keep]))
+
+    # board_step: take the piece off the board
+    cells[games[:, None, None], start_rows[:, None, None] + _OFFSETS[:, None],
+          start_columns[:, None, None] + _OFFSETS] = BLANK
+
+    # every footprint on the path has to be empty; steps past the end of a shorter path look at the start again,
+    # which is now empty
+    steps = np.arange(1, max(int(distances.max(initial=1)), 1))
+    on_path = steps < distances[:, None]
+    path_rows = np.where(on_path, start_rows[:, None] + row_steps[:, None] * steps, start_rows[:, None])
+    path_columns = np.where(on_path, start_columns[:, None] + column_steps[:, None] * steps, start_columns[:, None])
+    path = cells[games[:, None, None, None], path_rows[:, :, None, None] + _OFFSETS[:, None],
+                 path_columns[:, :, None, None] + _OFFSETS]
+    clear = ~(path != BLANK).any(axis=(1, 2, 3))
+
+    # still_in: the mover has to keep a ring; if the opponent has none left, the mover wins
+    black, white = ring_owners(cells[games])
+    mine = np.where(me == BLACK, black, white)
+    theirs = np.where(me == BLACK, white, black)
+    clear &= mine
+    refused = ~clear
+    place(cells, games[refused], start_rows[refused], start_columns[refused], pieces[refused])
+
+    games, me, other, pieces, end_rows, end_columns = games[clear], me[clear], other[clear], pieces[clear], \
+        end_rows[clear], end_columns[clear]
+    winner = np.where(me == BLACK, GAME_STATES.index("BLACK_WON"), GAME_STATES.index("WHITE_WON")).astype(np.int8)
+    states[games] = np.where(theirs[clear], states[games], winner)
+
+    # put the piece down, hand the turn over, and still_in_double_check
+    place(cells, games, end_rows, end_columns, pieces)
+    turns[games] = other
+    black, white = ring_owners(cells[games])
+    won = np.where(me == BLACK, black & ~white, white & ~black)
+    states[games] = np.where(won, winner, states[games])
+
+    made[games] = True
+    return made
+
+
+class BatchGessGame:
+    """
+    The BatchGessGame class holds N games of Gess and moves all of them at once.
+    The boards are one (N, 21, STRIDE) int8 array of cell codes in the layout of the Board class - the labels and
+    padding around the 20x20 grid are kept, because make_move's edge rules depend on them - and get_boards gives the
+    (N, 20, 20) grid itself. Whose turn it is and the game state of each game are (N,) int8 arrays.
+    """
+    def __init__(self, games):
+        """
+        Initializes N new games.
+        :param games: number of games
+        """
+        self._cells = np.repeat(starting_cells()[None], games, axis=0)
+        self._turns = np.full(games, BLACK, dtype=np.int8)
+        self._states = np.zeros(games, dtype=np.int8)
+
+    @classmethod
+    def from_games(cls, games):
+        """
+        :param games: a list of GessGame objects
+        :return: a BatchGessGame object in the positions of the games
+        """
+        batch = cls(len(games))
+        for number, game in enumerate(games):
+            for row, cells_of_row in enumerate(game.get_board().get_game_board()):
+                for column, cell in enumerate(cells_of_row):
+                    batch._cells[number, row, column] = BLANK if cell == " " else COLOR_CODES.get(cell, OTHER)
+            batch._turns[number] = COLOR_CODES[game.get_whose_turn()]
+            batch._states[number] = GAME_STATES.index(game.get_game_state())
+        return batch
+
+    def __len__(self):
+        """
+        :return: the number of games
+        """
+        return len(self._cells)
+
+    def get_boards(self):
+        """
+        :return: an (N, 20, 20) int8 array of cell codes - [n, i, j] is the cell in row 20 - i and column j of game n,
+                 so the rows run from row 20 at the top down to row 1, as on the printed board
+        """
+        return self._cells[:, 1:21, 1:21]
+
+    def get_turns(self):
+        """
+        :return: an (N,) int8 array of whose turn it is in each game, BLACK or WHITE
+        """
+        return self._turns
+
+    def get_game_states(self):
+        """
+        :return: an (N,) int8 array of the game state of each game, as indices of GAME_STATES
+        """
+        return self._states
+
+    def get_rings(self, color):
+        """
+        :param color: "B" or "W"
+        :return: an (N, 16, 16) bool array, True at [n, row - 3, column - 3] if game n has a ring of that color there
+        """
+        return ring_centers(self._cells, COLOR_CODES[color])
+
+    def get_game(self, number, backend="list"):
+        """
+        :param number: number of a game
+        :param backend: board backend of the new game
+        :return: a new GessGame object in the position of game number
+        """
+        rows = tuple(tuple(CODE_CELLS[code] for code in row) for row in self._cells[number].tolist())
+        return GessGame.from_position(Position(rows, "B" if self._turns[number] == BLACK else "W",
+                                               GAME_STATES[self._states[number]]), backend)
+
+    def make_moves(self, starts, ends):
+        """
+        Makes one move in every game, as make_move would.
+        :param starts: an (N,) array of square indices of the centers of the pieces to move (as in SQUARE_NAMES), or
+                       -1 to leave a game alone
+        :param ends: an (N,) array of square indices of the new centers, or -1
+        :return: an (N,) bool array, True where the move was made
+        """
+        return play(self._cells, self._turns, self._states, starts, ends)
+
+    def is_legal(self, starts, ends):
+        """
+        :param starts: an (N,) array of square indices of the centers of the pieces to move, or -1
+        :param ends: an (N,) array of square indices of the new centers, or -1
+        :return: an (N,) bool array, True where make_moves would make the move; nothing is changed
+        """
+        return play(self._cells.copy(), self._turns.copy(), self._states.copy(), starts, ends)
+
+
+def random_games(games, plies, seed):
+    """
+    Plays random games with GessGame, for moves to replay with both engines.
+    :return: a list of plies lists of (N,) arrays - the square indices of the start and end of each game's move, or
+             -1 once a game has no move
+    """
+    rng = random.Random(seed)
+    policy = RandomPolicy()
+    boards = [GessGame(backend="bitboard") for number in range(games)]
+    starts = np.full((plies, games), -1, dtype=np.int64)
+    ends = np.full((plies, games), -1, dtype=np.int64)
+    for number, game in enumerate(boards):
+        for ply in range(plies):
+            move = policy.choose_move(game, rng)
+            if move is None:
+                break
+            game.make_move(move[0], move[1])
+            starts[ply, number] = SQUARE_INDICES[move[0]]
+            ends[ply, number] = SQUARE_INDICES[move[1]]
+    return starts, ends
+
+
+def main(argv=None):
+    """
+    Command-line entry point. Exits with status 1 if the two engines disagree.
+    """
+    parser = argparse.ArgumentParser(description="Compare BatchGessGame with GessGame on the same random games.")
+    parser.add_argument("--games", type=int, default=1024, help="number of games (default: 1024)")
+    parser.add_argument("--plies", type=int, default=40, help="moves per game (default: 40)")
+    parser.add_argument("--backend", default="bitboard", help="board backend of the GessGame side (default: bitboard)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random games (default: 0)")
+    args = parser.parse_args(argv)
+
+    starts, ends = random_games(args.games, args.plies, args.seed)
+    scalar = [GessGame(backend=args.backend) for number in range(args.games)]
+    moves = 0
+    started = time.perf_counter()
+    for ply in range(args.plies):
+        for number, game in enumerate(scalar):
+            if starts[ply, number] >= 0:
+                game.make_move(SQUARE_NAMES[starts[ply, number]], SQUARE_NAMES[ends[ply, number]])
+                moves += 1
+    scalar_seconds = time.perf_counter() - started
+
+    batch = BatchGessGame(args.games)
+    started = time.perf_counter()
+    for ply in range(args.plies):
+        batch.make_moves(starts[ply], ends[ply])
+    batch_seconds = time.perf_counter() - started
+
+    agree = all(batch.get_game(number).to_snapshot() == scalar[number].to_snapshot() for number in range(args.games))
+    print(json.dumps({"games": args.games,
+                      "moves": moves,
+                      "agree": agree,
+                      "scalar_moves_per_second": moves / scalar_seconds if scalar_seconds > 0 else 0.0,
+                      "batch_moves_per_second": moves / batch_seconds if batch_seconds > 0 else 0.0,
+                      "speedup": scalar_seconds / batch_seconds if batch_seconds > 0 else 0.0}, indent=2))
+    return 0 if agree else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: A compact binary format for Gess game records. Each move is packed into two bytes, games are
+#              appended to an archive file, and a separate index file holds the offset of every game. The reader
+#              memory-maps both files, so it can jump straight to game N or go through every game without loading
+#              the archive into memory. From the command line:
+#                  python GameArchive.py pack games.jsonl games.gar     (game records written by SelfPlay.py)
+#                  python GameArchive.py show games.gar 12
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+
+from GessGame import GessGame, DIRECTIONS, SQUARE_NAMES, SQUARE_INDICES
+
+ARCHIVE_MAGIC = b"GESSARC1"
+INDEX_MAGIC = b"GESSIDX1"
+
+# a game is a header of its number of moves and its result, followed by two bytes per move
+GAME_HEADER = struct.Struct("<HB")
+MOVE = struct.Struct("<H")
+OFFSET = struct.Struct("<Q")
+
+RESULTS = ("UNFINISHED", "BLACK_WON", "WHITE_WON")
+
+# the longest a move can be - from column a to column t
+MAX_DISTANCE = 19
+
+# number of move codes - every start square, direction and distance
+MOVE_CODES = 400 * 8 * MAX_DISTANCE
+
+
+def encode_move(start, end):
+    """
+    Packs a move into an integer from 0 to 60799, which fits in two bytes.
+    The code is (start square * 8 + direction) * 19 + distance - 1, where the square is its index in SQUARE_NAMES
+    and the direction is its index in DIRECTIONS. Only moves along one of the eight directions can be packed,
+    which covers every legal move.
+    :param start: game-board position of the center of the piece moved - for example 'm3'
+    :param end: game-board position of its new center - for example 'm6'
+    :return: the code of the move
+    """
+    start_index = SQUARE_INDICES[start]
+    end_index = SQUARE_INDICES[end]
+
+    # DIRECTIONS steps through list rows, which run the opposite way to row numbers
+    row_step = (start_index // 20) - (end_index // 20)
+    column_step = (end_index % 20) - (start_index % 20)
+    distance = max(abs(row_step), abs(column_step))
+    if distance == 0 or (row_step != 0 and column_step != 0 and abs(row_step) != abs(column_step)):
+        raise ValueError("not a move along one of the eight directions: " + start + "-" + end)
+
+    direction = DIRECTIONS.index([row_step // distance, column_step // distance])
+    return (start_index * 8 + direction) * MAX_DISTANCE + distance - 1
+
+
+def decode_move(code):
+    """
+    :param code: the code of a move, made by encode_move
+    :return: the (start, end) game-board positions of the move
+    """
+    if not 0 <= code < MOVE_CODES:
+        raise ValueError("not a move code: " + str(code))
+
+    start_and_direction, distance = divmod(code, MAX_DISTANCE)
+    start_index, direction = divmod(start_and_direction, 8)
+    distance += 1
+    row = start_index // 20 - DIRECTIONS[direction][0] * distance
+    column = start_index % 20 + DIRECTIONS[direction][1] * distance
+    if not (0 <= row < 20 and 0 <= column < 20):
+        raise ValueError("move code goes off the board: " + str(code))
+    return SQUARE_NAMES[start_index], SQUARE_NAMES[row * 20 + column]
+
+
+class GameArchiveWriter:
+    """
+    The GameArchiveWriter class appends games to an archive file and their offsets to its index file (the archive
+    path with '.idx' added). Both files are only ever added to, so an archive can be written in several sessions.
+    """
+    def __init__(self, path):
+        """
+        Opens the archive and index files for appending, writing their headers if they are new.
+        :param path: path of the archive file
+        """
+        self._archive = open(path, "ab")
+        self._index = open(path + ".idx", "ab")
+        if self._archive.tell() == 0:
+            self._archive.write(ARCHIVE_MAGIC)
+        if self._index.tell() == 0:
+            self._index.write(INDEX_MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, moves, result="UNFINISHED"):
+        """
+        Adds a game to the end of the archive. The game is written before its index entry, so the index never points
+        past the end of the archive.
+        :param moves: the moves of the game, as (start, end) pairs of game-board positions
+        :param result: the game state at the end of the game
+        """
+        codes = [encode_move(start, end) for start, end in moves]
+        offset = self._archive.tell()
+        self._archive.write(GAME_HEADER.pack(len(codes), RESULTS.index(result)))
+        self._archive.write(struct.pack("<" + str(len(codes)) + "H", *codes))
+        self._index.write(OFFSET.pack(offset))
+
+    def close(self):
+        """
+        Closes the archive and index files, the archive first.
+        """
+        self._archive.close()
+        self._index.close()
+
+
+class GameArchiveReader:
+    """
+    The GameArchiveReader class reads games from an archive file and its index through memory maps. Only the pages
+    of the games that are read are loaded, so archives much larger than memory can be read.
+    """
+    def __init__(self, path):
+        """
+        Opens and memory-maps the archive and index files.
+        :param path: path of the archive file
+        """
+        self._files = [open(path, "rb"), open(path + ".idx", "rb")]
+        self._archive = mmap.mmap(self._files[0].fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = mmap.mmap(self._files[1].fileno(), 0, access=mmap.ACCESS_READ)
+        if self._archive[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC or self._index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self.close()
+            raise ValueError("not a Gess game archive: " + path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """
+        :return: the number of games in the archive
+        """
+        return (len(self._index) - len(INDEX_MAGIC)) // OFFSET.size
+
+    def __getitem__(self, number):
+        """
+        :param number: number of a game, counting from 0
+        :return: a (moves, result) tuple - the moves as (start, end) pairs of game-board positions, and the game
+                 state at the end of the game
+        """
+        codes, result = self.read_codes(number)
+        return [decode_move(code) for code in codes], result
+
+    def __iter__(self):
+        """
+        :return: a generator of every game in the archive, in the order they were added
+        """
+        for number in range(len(self)):
+            yield self[number]
+
+    def read_codes(self, number):
+        """
+        :param number: number of a game, counting from 0
+        :return: a (codes, result) tuple - the encoded moves of the game, and the game state at its end
+        """
+        if not 0 <= number < len(self):
+            raise IndexError("game number out of range: " + str(number))
+
+        offset = OFFSET.unpack_from(self._index, len(INDEX_MAGIC) + number * OFFSET.size)[0]
+        count, result = GAME_HEADER.unpack_from(self._archive, offset)
+        if result >= len(RESULTS):
+            raise ValueError("game " + str(number) + " has a bad result: " + str(result))
+        codes = struct.unpack_from("<" + str(count) + "H", self._archive, offset + GAME_HEADER.size)
+        return codes, RESULTS[result]
+
+    def replay(self, number, backend="list"):
+        """
+        Plays a game from the archive on a new GessGame.
+        :param number: number of a game, counting from 0
+        :param backend: board backend of the new game
+        :return: the GessGame object after the last move
+        """
+        game = GessGame(backend=backend)
+        for start, end in self[number][0]:
+            if not game.make_move(start, end):
+                raise ValueError("game " + str(number) + " has an illegal move: " + start + "-" + end)
+        return game
+
+    def close(self):
+        """
+        Closes the memory maps and the files under them.
+        """
+        self._archive.close()
+        self._index.close()
+        for file in self._files:
+            file.close()
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Pack Gess game records into an archive, or show a game.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="append JSON-lines game records to an archive")
+    pack.add_argument("records", help="file of game records, one JSON object per line")
+    pack.add_argument("archive", help="archive file to append to")
+    show = commands.add_parser("show", help="print one game of an archive")
+    show.add_argument("archive", help="archive file")
+    show.add_argument("number", type=int, help="number of the game, counting from 0")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        with open(args.records) as records, GameArchiveWriter(args.archive) as writer:
+            for line in records:
+                if line.strip():
+                    record = json.loads(line)
+                    writer.append(record["moves"], record["result"])
+    else:
+        with GameArchiveReader(args.archive) as reader:
+            moves, result = reader[args.number]
+            print(json.dumps({"number": args.number, "moves": moves, "result": result}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
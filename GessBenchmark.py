@@ -0,0 +1,312 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Benchmarks for GessGame, run from the command line:
+#                  python GessBenchmark.py --backend all --output results.json
+#              The suite counts perft nodes (every sequence of legal moves to a fixed depth) from the starting
+#              position and from a few fixed midgame positions, measures the p50/p99 latency of make_move for legal
+#              and illegal requests, measures the memory make_move allocates, times the ring checks of still_in,
+#              and compares the time and memory of new games, copy.deepcopy, GessGame.clone and a GamePool.
+#              The hit rates of the footprint and legality caches of GessGame over the whole run are reported too.
+#              Results are written as JSON so that runs
+#              of different versions can be compared. The perft counts are checked against known values, so the
+#              suite also catches a board backend that disagrees with the original one.
+
+import argparse
+import copy
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from GessGame import GessGame, GamePool, BOARD_BACKENDS, cache_stats
+from GessInstruments import latency_summary
+
+# fixed positions, reached by playing these moves from the starting position
+POSITIONS = {
+    "start": [],
+    "midgame-10": [("b4", "b3"), ("r18", "r17"), ("d5", "e4"), ("r15", "r16"), ("c6", "c8"),
+                   ("e19", "d18"), ("p6", "m9"), ("h19", "f19"), ("h4", "h3"), ("r17", "r20")],
+    "midgame-12": [("c3", "c5"), ("q18", "r18"), ("h7", "k7"), ("c17", "b18"), ("b8", "c7"), ("p15", "m12"),
+                   ("s4", "r4"), ("c15", "c13"), ("g3", "h2"), ("e15", "h12"), ("m7", "k7"), ("e17", "f18")],
+    "midgame-20": [("e3", "d3"), ("p13", "o14"), ("p6", "o7"), ("e13", "f14"), ("l6", "l7"), ("h15", "e15"),
+                   ("i2", "h2"), ("q14", "t14"), ("b7", "d7"), ("r17", "q18"), ("r8", "r6"), ("d17", "c18"),
+                   ("d8", "e7"), ("g20", "h19"), ("g3", "h2"), ("h17", "i17"), ("p4", "o3"), ("r17", "q18"),
+                   ("r4", "r16"), ("d19", "e19")],
+}
+
+# Known perft node counts of each position, by depth. They were counted without the move generator: every start
+# and end square of the board was tried with make_move in each position (and, for depth 2, in each position after
+# one of those moves), as brute_force_moves in tests/test_move_generation.py does.
+PERFT_COUNTS = {
+    "start": {1: 329, 2: 117782},
+    "midgame-10": {1: 303, 2: 88959},
+    "midgame-12": {1: 264, 2: 89809},
+    "midgame-20": {1: 251, 2: 50038},
+}
+
+
+def make_position(name, backend):
+    """
+    :param name: a key of POSITIONS
+    :param backend: a key of BOARD_BACKENDS
+    :return: a new GessGame object in the named position
+    """
+    game = GessGame(backend=backend)
+    for start, end in POSITIONS[name]:
+        if not game.make_move(start, end):
+            raise ValueError("move " + start + "-" + end + " of position " + name + " is not legal")
+    return game
+
+
+def perft(game, depth):
+    """
+    Counts the sequences of legal moves of the given length from the current position of a game.
+    The game is left as it was.
+    :param game: a GessGame object
+    :param depth: number of moves in each sequence (at least 1)
+    :return: the number of sequences
+    """
+    if depth == 1:
+        return game.count_legal_moves()
+
+    nodes = 0
+    for start, end in list(game.legal_moves()):
+        game.push_move(start, end)
+        nodes += perft(game, depth - 1)
+        game.pop_move()
+    return nodes
+
+
+def bench_perft(backend, max_depth):
+    """
+    :return: a list of perft results - position, depth, nodes, whether the count is the known one, and timing
+    """
+    results = []
+    for name in POSITIONS:
+        game = make_position(name, backend)
+        for depth in range(1, max_depth + 1):
+            started = time.perf_counter()
+            nodes = perft(game, depth)
+            seconds = time.perf_counter() - started
+            expected = PERFT_COUNTS[name].get(depth)
+            results.append({"position": name,
+                            "depth": depth,
+                            "nodes": nodes,
+                            "expected": expected,
+                            "correct": None if expected is None else nodes == expected,
+                            "seconds": seconds,
+                            "nodes_per_second": nodes / seconds if seconds > 0 else 0.0})
+    return results
+
+
+def bench_make_move(backend, samples, rng):
+    """
+    Times make_move for legal requests (chosen from legal_moves) and illegal requests (random squares in columns
+    b to s and rows 2 to 19 that are not legal moves), from each fixed position. After every request the board is
+    put back with GessGame.restore, outside of the timed call.
+    :return: latency summaries for legal and illegal requests
+    """
+    timings = {"legal": [], "illegal": []}
+    for name in POSITIONS:
+        game = make_position(name, backend)
+        moves = list(game.legal_moves())
+        legal_moves = set(moves)
+        for sample in range(samples):
+            timings["legal"].append(time_make_move(game, *rng.choice(moves)))
+
+            start, end = rng.choice(moves)
+            while (start, end) in legal_moves:
+                start = chr(rng.randrange(98, 116)) + str(rng.randrange(2, 20))
+                end = chr(rng.randrange(98, 116)) + str(rng.randrange(2, 20))
+            timings["illegal"].append(time_make_move(game, start, end))
+
+    return {"legal": latency_summary(timings["legal"]), "illegal": latency_summary(timings["illegal"])}
+
+
+def time_make_move(game, start, end):
+    """
+    Times one call of make_move, then puts the game back the way it was.
+    :return: the time taken by make_move, in seconds
+    """
+    board = game.get_board()
+    start_coordinate = game.coordinate_conversion(start)
+    end_coordinate = game.coordinate_conversion(end)
+    record = (start_coordinate, board.save_footprint(start_coordinate),
+              end_coordinate, board.save_footprint(end_coordinate),
+              game.get_game_state(), game.get_whose_turn())
+
+    started = time.perf_counter()
+    game.make_move(start, end)
+    seconds = time.perf_counter() - started
+
+    game.restore(record)
+    return seconds
+
+
+def bench_ring_scan(backend, samples):
+    """
+    Times the ring checks of a move: still_in and still_in_double_check as make_move calls them, and a full
+    rebuild of the ring index for comparison.
+    :return: latency summaries of each
+    """
+    game = make_position("midgame-12", backend)
+    board = game.get_board()
+    checks = []
+    rebuilds = []
+    for sample in range(samples):
+        started = time.perf_counter()
+        game.still_in(board)
+        game.still_in_double_check(board)
+        checks.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        board.find_rings()
+        rebuilds.append(time.perf_counter() - started)
+
+    return {"still_in": latency_summary(checks), "full_ring_scan": latency_summary(rebuilds)}
+
+
+def bench_allocations(backend, samples, rng):
+    """
+    Measures what make_move allocates: the number of Piece and BitPiece objects it makes (counted with a profile
+    hook), and the high-water mark of memory it allocates and frees again (measured with tracemalloc).
+    :return: the mean number of piece objects, and the mean and maximum peak bytes, per call
+    """
+    game = make_position("midgame-12", backend)
+    moves = list(game.legal_moves())
+    pieces = [0]
+    peaks = []
+
+    def count_pieces(frame, event, arg):
+        if event == "call" and frame.f_code.co_name == "__init__" and \
+                type(frame.f_locals.get("self")).__name__ in ("Piece", "BitPiece"):
+            pieces[0] += 1
+
+    # build the ring index and the hash before measuring
+    time_make_move(game, *moves[0])
+
+    for sample in range(samples):
+        start, end = rng.choice(moves)
+        board = game.get_board()
+        start_coordinate = game.coordinate_conversion(start)
+        end_coordinate = game.coordinate_conversion(end)
+        record = (start_coordinate, board.save_footprint(start_coordinate),
+                  end_coordinate, board.save_footprint(end_coordinate),
+                  game.get_game_state(), game.get_whose_turn())
+
+        sys.setprofile(count_pieces)
+        game.make_move(start, end)
+        sys.setprofile(None)
+        game.restore(record)
+
+        tracemalloc.start()
+        game.make_move(start, end)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        game.restore(record)
+
+    return {"calls": samples,
+            "pieces_per_call": pieces[0] / samples,
+            "mean_peak_bytes": sum(peaks) / len(peaks),
+            "max_peak_bytes": max(peaks)}
+
+
+def bench_cloning(backend, samples):
+    """
+    Compares four ways of getting a game to play on: making a new game, copying a midgame with copy.deepcopy,
+    copying it with GessGame.clone, and taking a game from a GamePool and giving it back. The copies are kept until
+    the end, so the memory they hold is counted; games from the pool are given back at once, as a simulation would.
+    :return: for each way, the mean time per game in microseconds, and the bytes allocated per game and the peak
+             bytes allocated, measured with tracemalloc
+    """
+    game = make_position("midgame-12", backend)
+    game.count_legal_moves()
+    game.get_hash()
+    pool = GamePool(backend)
+    pool.release(pool.acquire())
+
+    def from_pool():
+        pooled = pool.acquire()
+        pool.release(pooled)
+
+    ways = {"new_game": lambda: GessGame(backend=backend),
+            "deepcopy": lambda: copy.deepcopy(game),
+            "clone": game.clone,
+            "pool": from_pool}
+    results = {}
+    for name, way in ways.items():
+        kept = []
+        started = time.perf_counter()
+        for sample in range(samples):
+            kept.append(way())
+        seconds = time.perf_counter() - started
+        kept = []
+
+        tracemalloc.start()
+        for sample in range(samples):
+            kept.append(way())
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        kept = []
+
+        results[name] = {"mean_us": seconds / samples * 1e6,
+                         "bytes_per_game": current / samples,
+                         "peak_bytes": peak}
+    return results
+
+
+def run(backends, perft_depth, samples, seed):
+    """
+    Runs every benchmark for each backend.
+    :return: a dictionary of results, ready to be written as JSON
+    """
+    results = {"python": platform.python_version(),
+               "perft_depth": perft_depth,
+               "samples": samples,
+               "seed": seed,
+               "backends": {}}
+    for backend in backends:
+        rng = random.Random(seed)
+        results["backends"][backend] = {"perft": bench_perft(backend, perft_depth),
+                                        "make_move": bench_make_move(backend, samples, rng),
+                                        "allocations": bench_allocations(backend, samples, rng),
+                                        "ring_scan": bench_ring_scan(backend, samples),
+                                        "cloning": bench_cloning(backend, samples)}
+    results["caches"] = cache_stats()
+    return results
+
+
+def main(argv=None):
+    """
+    Command-line entry point. Exits with status 1 if any perft count is not the known one.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark GessGame and check perft counts.")
+    parser.add_argument("--backend", default="all", choices=sorted(BOARD_BACKENDS) + ["all"],
+                        help="board backend to benchmark (default: all)")
+    parser.add_argument("--perft-depth", type=int, default=2, help="deepest perft count (default: 2)")
+    parser.add_argument("--samples", type=int, default=200, help="timed calls per position (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for choosing moves to time (default: 0)")
+    parser.add_argument("--output", help="file to write the JSON results to (default: standard output)")
+    args = parser.parse_args(argv)
+
+    backends = sorted(BOARD_BACKENDS) if args.backend == "all" else [args.backend]
+    results = run(backends, args.perft_depth, args.samples, args.seed)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+    for backend in results["backends"].values():
+        for count in backend["perft"]:
+            if count["correct"] is False:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
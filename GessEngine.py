@@ -0,0 +1,365 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: A search engine for bots that play Gess. The SearchEngine class runs a negamax alpha-beta search on a
+#              GessGame with iterative deepening, a transposition table, move ordering (captures and ring threats
+#              first, then killer moves and the history heuristic) and a hard wall-clock budget. Moves are made and
+#              taken back with GessGame.push_move and GessGame.pop_move, so the board is never copied.
+
+import time
+
+from GessGame import SQUARE_NAMES
+from TranspositionTable import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+# score of a won game; wins found sooner score higher
+MATE_SCORE = 1000000
+
+# evaluation weights, in points per ring and points per stone
+RING_WEIGHT = 1000
+STONE_WEIGHT = 10
+
+# deepest iteration of the iterative deepening loop
+MAX_DEPTH = 64
+
+# ordering bonuses; anything not given a bonus is ordered by its history score
+TABLE_MOVE_BONUS = 1 << 30
+CAPTURE_BONUS = 1 << 28
+RING_THREAT_BONUS = 1 << 27
+KILLER_BONUS = 1 << 26
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the wall-clock budget runs out, to unwind back to the iterative deepening loop.
+    """
+    pass
+
+
+def score_to_table(score, ply):
+    """
+    Mate scores count plies from the root, but a table entry can be reached at any ply, so they are stored as
+    plies from the position itself.
+    :param score: score of a position, as returned by SearchEngine.search
+    :param ply: distance of the position from the root position
+    :return: the score to keep in the transposition table
+    """
+    if score >= MATE_SCORE - MAX_DEPTH:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_DEPTH:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """
+    Undoes score_to_table for a position reached at the given ply.
+    :param score: score kept in the transposition table
+    :param ply: distance of the position from the root position
+    :return: the score of the position, as returned by SearchEngine.search
+    """
+    if score >= MATE_SCORE - MAX_DEPTH:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_DEPTH:
+        return score + ply
+    return score
+
+
+def square_index(coordinate):
+    """
+    :param coordinate: list of two integers indicating location on the board, as used by GessGame
+    :return: the square index of the coordinate, as used by SQUARE_NAMES
+    """
+    return 20 * (20 - coordinate[0]) + coordinate[1] - 1
+
+
+class SearchEngine:
+    """
+    The SearchEngine class picks moves for the player whose turn it is in a GessGame.
+    Moves are encoded as start square index * 400 + end square index, so they can be kept in the transposition
+    table and the killer and history tables as plain integers.
+    One SearchEngine can be used for many searches; the transposition table and history scores carry over between
+    them.
+    """
+    def __init__(self, table=None):
+        """
+        Initializes the data members of a SearchEngine object.
+        table - TranspositionTable object shared by every search
+        game - the GessGame object being searched
+        killers - two killer moves for each ply
+        history - history score of each move that caused a cutoff
+        deadline - perf_counter time at which the search must stop, or None for no limit
+        nodes - number of positions visited in the current search
+        info - statistics of the last search
+
+        :param table: a TranspositionTable object, or None to make one with the default memory budget
+        """
+        if table is None:
+            table = TranspositionTable()
+
+        self._table = table
+        self._game = None
+        self._killers = []
+        self._history = {}
+        self._deadline = None
+        self._nodes = 0
+        self._info = {}
+
+    def get_info(self):
+        """
+        :return: a dictionary of statistics of the last search - move, score, depth, nodes, seconds and
+                 nodes_per_second
+        """
+        return dict(self._info)
+
+    def best_move(self, game, time_ms=1000, depth=None):
+        """
+        Searches the position of a game and returns the best move found for the player whose turn it is.
+        The search deepens one ply at a time until it reaches the depth limit or runs out of time, and returns the
+        best move of the deepest iteration that finished. The game is left as it was.
+
+        :param game: a GessGame object
+        :param time_ms: wall-clock budget in milliseconds, or None for no limit
+        :param depth: deepest iteration to search, from 1 to MAX_DEPTH, or None to search until time runs out (up
+                      to MAX_DEPTH)
+        :return: a (start, end) tuple of game-board positions - for example ('m3', 'm6') - or None if the player
+                 has no legal move or the game is over
+        """
+        if time_ms is None and depth is None:
+            raise ValueError("best_move needs a time budget, a depth limit, or both")
+        if depth is not None and not 1 <= depth <= MAX_DEPTH:
+            raise ValueError("depth must be from 1 to " + str(MAX_DEPTH))
+
+        started = time.perf_counter()
+        self._game = game
+        self._deadline = None if time_ms is None else started + time_ms / 1000
+        self._nodes = 0
+        self._killers = [[-1, -1] for ply in range(MAX_DEPTH + 1)]
+        self._table.new_search()
+
+        moves = self.generate_moves()
+        best_move = moves[0] if moves else -1
+        best_score = 0
+        completed = 0
+
+        for iteration in range(1, (MAX_DEPTH if depth is None else depth) + 1):
+            if not moves:
+                break
+            try:
+                score, move = self.search_root(moves, iteration)
+            except SearchTimeout:
+                break
+            best_score, best_move = score, move
+            completed = iteration
+
+            # the best move so far is searched first on the next iteration
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+            if abs(best_score) >= MATE_SCORE - MAX_DEPTH:
+                break
+
+        seconds = time.perf_counter() - started
+        self._info = {"move": None if best_move == -1 else self.move_names(best_move),
+                      "score": best_score,
+                      "depth": completed,
+                      "nodes": self._nodes,
+                      "seconds": seconds,
+                      "nodes_per_second": self._nodes / seconds if seconds > 0 else 0.0}
+        self._game = None
+
+        return self._info["move"]
+
+    def search_root(self, moves, depth):
+        """
+        Searches every move of the root position to the given depth.
+        :param moves: legal moves of the root position, best guess first
+        :param depth: depth to search each move to, counting the move itself
+        :return: the best (score, move) found
+        """
+        alpha = -MATE_SCORE - 1
+        best_move = moves[0]
+        for move in moves:
+            score = self.search_move(move, depth - 1, -MATE_SCORE - 1, -alpha, 1)
+            if score is None:
+                continue
+            score = -score
+            if score > alpha:
+                alpha = score
+                best_move = move
+
+        self._table.store(self._game.get_hash(), depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def search_move(self, move, depth, alpha, beta, ply):
+        """
+        Makes a move, searches the position it leads to, and takes the move back - even if the search times out.
+        :return: the score of the position after the move, for the player whose turn it is then, or None if the
+                 move is illegal
+        """
+        start, end = self.move_names(move)
+        if not self._game.push_move(start, end):
+            return None
+        try:
+            return self.search(depth, alpha, beta, ply)
+        finally:
+            self._game.pop_move()
+
+    def search(self, depth, alpha, beta, ply):
+        """
+        Negamax alpha-beta search of the current position of the game.
+        :param depth: remaining depth to search
+        :param alpha: lower bound of the window
+        :param beta: upper bound of the window
+        :param ply: distance from the root position
+        :return: the score of the position for the player whose turn it is
+        """
+        self._nodes += 1
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        game = self._game
+        state = game.get_game_state()
+        if state != "UNFINISHED":
+            if state[0] == game.get_whose_turn():  # "BLACK_WON" starts with "B", "WHITE_WON" with "W"
+                return MATE_SCORE - ply
+            return -MATE_SCORE + ply
+
+        if depth <= 0 or ply >= MAX_DEPTH:
+            return self.evaluate()
+
+        key = game.get_hash()
+        table_move = -1
+        entry = self._table.probe(key)
+        if entry is not None:
+            table_depth, value, flag, table_move = entry
+            value = score_from_table(value, ply)
+            if table_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                elif flag == UPPER_BOUND:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        moves = self.generate_moves()
+        if not moves:
+            return self.evaluate()
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE - 1
+        best_move = -1
+        for move in self.order_moves(moves, table_move, ply):
+            score = self.search_move(move, depth - 1, -beta, -alpha, ply + 1)
+            if score is None:
+                continue
+            score = -score
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not self.is_capture(move):
+                    self.record_cutoff(move, depth, ply)
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        if best_move == -1:
+            return self.evaluate()
+        self._table.store(key, min(depth, 127), score_to_table(best_score, ply), flag, best_move)
+
+        return best_score
+
+    def evaluate(self):
+        """
+        Static evaluation of the current position: rings are worth much more than stones.
+        :return: the score of the position for the player whose turn it is
+        """
+        board = self._game.get_board()
+        me = self._game.get_whose_turn()
+        other = "W" if me == "B" else "B"
+        return (RING_WEIGHT * (len(board.get_rings(me)) - len(board.get_rings(other))) +
+                STONE_WEIGHT * (board.count_stones(me) - board.count_stones(other)))
+
+    def generate_moves(self):
+        """
+        :return: a list of every legal move of the current position, as encoded integers
+        """
+        moves = []
+        for start, direction, length in self._game.legal_rays():
+            start_index = square_index(start)
+            for distance in range(1, length + 1):
+                moves.append(start_index * 400 + square_index([start[0] + direction[0] * distance,
+                                                               start[1] + direction[1] * distance]))
+        return moves
+
+    def order_moves(self, moves, table_move, ply):
+        """
+        Sorts moves so that the ones most likely to cause a cutoff are searched first: the move from the
+        transposition table, then captures, then moves that land on an opponent's ring, then killer moves, then
+        everything else by history score.
+        :param moves: list of encoded moves
+        :param table_move: encoded move from the transposition table, or -1
+        :param ply: distance from the root position
+        :return: a new, sorted list of the moves
+        """
+        killers = self._killers[ply]
+        board = self._game.get_board()
+        other = "W" if self._game.get_whose_turn() == "B" else "B"
+        rings = board.get_rings(other)
+
+        def priority(move):
+            if move == table_move:
+                return TABLE_MOVE_BONUS
+            score = self._history.get(move, 0)
+            end = move % 400
+            row, column = 20 - end // 20, end % 20 + 1
+            if not board.valid_piece([row, column], other):
+                score += CAPTURE_BONUS
+            if any(abs(ring[0] - row) <= 2 and abs(ring[1] - column) <= 2 for ring in rings):
+                score += RING_THREAT_BONUS
+            if move == killers[0] or move == killers[1]:
+                score += KILLER_BONUS
+            return score
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def is_capture(self, move):
+        """
+        :param move: an encoded move of the current position
+        :return: True if the footprint the move lands on has stones of the opponent; False otherwise
+        """
+        end = move % 400
+        row, column = 20 - end // 20, end % 20 + 1
+        other = "W" if self._game.get_whose_turn() == "B" else "B"
+        return not self._game.get_board().valid_piece([row, column], other)
+
+    def record_cutoff(self, move, depth, ply):
+        """
+        Remembers a quiet move that caused a beta cutoff, as a killer move for its ply and in the history scores.
+        """
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self._history[move] = self._history.get(move, 0) + depth * depth
+
+    def move_names(self, move):
+        """
+        :param move: an encoded move
+        :return: the (start, end) game-board positions of the move
+        """
+        return SQUARE_NAMES[move // 400], SQUARE_NAMES[move % 400]
+
+
+def best_move(game, time_ms=1000, depth=None):
+    """
+    Searches a game with a new SearchEngine and returns the best move found. See SearchEngine.best_move.
+    """
+    return SearchEngine().best_move(game, time_ms=time_ms, depth=depth)
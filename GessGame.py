@@ -5,6 +5,132 @@
 #              destroys the ring of the opponent or someone concedes defeat. Each player starts with one ring, but can
 #              form more if desired. Valid distance and direction of a move are determined by the orientation of the
 #              footprint of a piece.
+#              The game board can be backed by the original list of lists (Board) or by one bitboard per colour
+#              (BitBoard); both backends give the same results for every move.
+#              A Position is an immutable snapshot of a game that can check and try moves without changing anything,
+#              for analysis from several threads at once.
+
+import numbers
+import random
+import threading
+from array import array
+from operator import itemgetter
+
+# the eight directions a piece can move in, as [row step, column step] - N, NE, E, SE, S, SW, W and NW
+DIRECTIONS = ([-1, 0], [-1, 1], [0, 1], [1, 1], [1, 0], [1, -1], [0, -1], [-1, -1])
+WEST = DIRECTIONS.index([0, -1])
+
+# Flat board layout shared by both backends: the cell in row r and column c of the board - row 0 and column 0 hold
+# the labels, and rows and columns 1 to 20 are the 20x20 grid - is cell r * STRIDE + c of a flat list, or bit
+# r * STRIDE + c of a bitboard. A stride of 22 leaves an always-blank padding column to the right of column t, so a
+# footprint never wraps around onto the next row.
+STRIDE = 22
+BOARD_CELLS = 21 * STRIDE
+
+# offsets of the cells of a footprint from its center, row by row: NW, N, NE, W, center, E, SW, S, SE
+FOOTPRINT_OFFSETS = (-STRIDE - 1, -STRIDE, -STRIDE + 1, -1, 0, 1, STRIDE - 1, STRIDE, STRIDE + 1)
+PERIMETER_OFFSETS = FOOTPRINT_OFFSETS[:4] + FOOTPRINT_OFFSETS[5:]
+# the same cells as [row step, column step] pairs
+FOOTPRINT_STEPS = tuple((row_step, column_step) for row_step in (-1, 0, 1) for column_step in (-1, 0, 1))
+
+
+def in_play_area(cell):
+    """
+    :param cell: index of a cell in the flat layout
+    :return: True if the cell is in columns b to s and rows 2 to 19; False otherwise
+    """
+    return 2 <= cell // STRIDE <= 19 and 2 <= cell % STRIDE <= 19
+
+
+# Per-square tables, indexed by the flat index of a footprint's center, for every center in rows 1 to 19 and
+# columns 1 to 20 (None elsewhere): the cells of the footprint in FOOTPRINT_OFFSETS order, the cells of its
+# perimeter, a getter that copies the footprint out of a flat list in one call, and the (cell, footprint index)
+# pairs that add_piece writes - empty unless the center itself is in the play area.
+FOOTPRINTS = [None] * BOARD_CELLS
+PERIMETERS = [None] * BOARD_CELLS
+FOOTPRINT_GETTERS = [None] * BOARD_CELLS
+PLACEMENTS = [None] * BOARD_CELLS
+for _center in range(STRIDE + 1, 20 * STRIDE):
+    if 1 <= _center % STRIDE <= 20:
+        FOOTPRINTS[_center] = tuple(_center + offset for offset in FOOTPRINT_OFFSETS)
+        PERIMETERS[_center] = tuple(_center + offset for offset in PERIMETER_OFFSETS)
+        FOOTPRINT_GETTERS[_center] = itemgetter(*FOOTPRINTS[_center])
+        PLACEMENTS[_center] = tuple((cell, index) for index, cell in enumerate(FOOTPRINTS[_center])
+                                    if in_play_area(_center) and in_play_area(cell))
+
+# every footprint center that make_move accepts, and for every cell, the centers whose footprints cover it
+CENTERS = tuple(center for center in range(BOARD_CELLS) if FOOTPRINTS[center] is not None)
+COVERING = [[] for _cell in range(BOARD_CELLS)]
+for _center in CENTERS:
+    for _cell in FOOTPRINTS[_center]:
+        COVERING[_cell].append(_center)
+COVERING = [tuple(centers) for centers in COVERING]
+
+# Sliding rays, indexed by center and then by direction (as in DIRECTIONS): the centers a footprint passes through
+# when it slides from the center along the direction, nearest first, for as long as make_move would accept the
+# center as the end of a move.
+RAYS = [None] * BOARD_CELLS
+for _center in CENTERS:
+    RAYS[_center] = tuple(tuple(_center + (_row_step * STRIDE + _column_step) * _distance
+                                for _distance in range(1, 20)
+                                if 1 <= _center // STRIDE + _row_step * _distance <= 19 and
+                                1 <= _center % STRIDE + _column_step * _distance <= 20)
+                          for _row_step, _column_step in DIRECTIONS)
+
+# offset of the neighbouring cell in each direction of DIRECTIONS, in the flat layout
+DIRECTION_OFFSETS = tuple(row_step * STRIDE + column_step for row_step, column_step in DIRECTIONS)
+
+# index of the cell of a footprint (in FOOTPRINT_OFFSETS order) in each direction of DIRECTIONS, and the index in
+# DIRECTIONS of each [row step, column step] pair
+DIRECTION_CELLS = tuple(FOOTPRINT_STEPS.index(tuple(direction)) for direction in DIRECTIONS)
+DIRECTION_INDICES = {tuple(direction): index for index, direction in enumerate(DIRECTIONS)}
+
+# cells of columns b to s and rows 2 to 19, row by row from row 19 down to row 2
+PLAY_AREA_CELLS = tuple(row * STRIDE + column for row in range(2, 20) for column in range(2, 20))
+
+# game-board positions by square index, where the index is 20 * (row number - 1) + (column number - 1) -
+# 'a1' is square 0, 't1' is square 19 and 't20' is square 399
+SQUARE_NAMES = tuple(chr(97 + index % 20) + str(index // 20 + 1) for index in range(400))
+SQUARE_INDICES = {name: index for index, name in enumerate(SQUARE_NAMES)}
+
+# the coordinate of every square, as used by GessGame (see coordinate_conversion), by square index and by name
+SQUARE_COORDINATES = tuple((20 - index // 20, index % 20 + 1) for index in range(400))
+COORDINATES = {name: SQUARE_COORDINATES[index] for index, name in enumerate(SQUARE_NAMES)}
+
+
+def is_square_name(name):
+    """
+    :param name: anything
+    :return: True if name looks like a game-board position - a letter and a row number in ASCII digits, such as
+             'm3' - whether or not the square is on the board; False otherwise
+    """
+    return isinstance(name, str) and 1 < len(name) <= 3 and name.isascii() and name[0].isalpha() and \
+        name[1:].isdigit()
+
+
+def is_square_index(index):
+    """
+    :param index: anything
+    :return: True if index is an integer (of any integer type but bool) from 0 to 399, the index of a square in
+             SQUARE_NAMES; False otherwise
+    """
+    return isinstance(index, numbers.Integral) and not isinstance(index, bool) and 0 <= index < 400
+
+# Snapshots cover the cells of columns b to s and rows 2 to 19. The text form lists them row by row from row 19 down
+# to row 2, separated by '/', with 'B' and 'W' for stones, 'x' for any other non-blank cell, and a number for a run
+# of blank cells, followed by whose turn it is and the game state - for example "18/.../18 B UNFINISHED".
+# The binary form packs each cell into two bits (0 blank, 1 black, 2 white, 3 other), followed by one byte holding
+# whose turn it is in bit 0 and the index of the game state in GAME_STATES in the bits above it.
+# Stones never reach the cells around the edge (EDGE_CELLS), but lifting a piece off the edge blanks the labels and
+# padding there, which changes which footprints are empty. If any edge cell differs from a new game, the snapshot
+# ends with a mask of the edge cells that are not blank: a fourth field in hex, or EDGE_BYTES more bytes.
+SNAPSHOT_CELLS = (" ", "B", "W", "x")
+GAME_STATES = ("UNFINISHED", "BLACK_WON", "WHITE_WON")
+SNAPSHOT_BYTES = 18 * 18 * 2 // 8 + 1
+EDGE_CELLS = tuple((row, column) for row in range(21) for column in range(21)
+                   if not (2 <= row <= 19 and 2 <= column <= 19))
+EDGE_BYTES = (len(EDGE_CELLS) + 7) // 8
+
 
 class GessGame:
     """
@@ -14,22 +140,58 @@ class GessGame:
     GessGame methods for move validation and execution communicate with the Board and Piece classes.
     GessGame methods for checking the game state or resigning the game do not require communication with other classes.
     """
-    def __init__(self):
+    def __init__(self, backend="list"):
         """
         Initializes the data members of a GessGame object.
-        board - stored in a Board object.
+        board - stored in a Board object, or a BitBoard object for the "bitboard" backend.
         game_state - who, if anyone, won the game
         whose_turn - player whose turn it is to make a move
         up_next - player who is not currently authorized to make a move
         direction - direction of the move being made (list of two integers)
         distance - distance of the move being made
+        history - undo stack of the moves made with push_move
+
+        :param backend: name of the board representation to use - a key of BOARD_BACKENDS ("list" or "bitboard")
+        """
+        if backend not in BOARD_BACKENDS:
+            raise ValueError("unknown board backend: " + repr(backend))
+
+        self._board = BOARD_BACKENDS[backend]()
+        self._game_state = "UNFINISHED"
+        self._whose_turn = "B"
+        self._up_next = "W"
+        self._direction = None
+        self._distance = None
+        self._history = []
+
+    def clone(self):
+        """
+        Copies the game: the board with Board.clone, and the turn, game state and undo stack of push_move. The
+        records on the undo stack are never changed, so the copy of the stack shares them.
+        :return: a new GessGame object in the same position, with the same backend
         """
-        self._board = Board()
+        game = GessGame.__new__(GessGame)
+        game._board = self._board.clone()
+        game._game_state = self._game_state
+        game._whose_turn = self._whose_turn
+        game._up_next = self._up_next
+        game._direction = self._direction
+        game._distance = self._distance
+        game._history = self._history[:]
+        return game
+
+    def reset(self):
+        """
+        Puts the game back to the starting position, reusing its board, so a finished game can be played again
+        without making new objects.
+        """
+        self._board.reset()
         self._game_state = "UNFINISHED"
         self._whose_turn = "B"
         self._up_next = "W"
         self._direction = None
         self._distance = None
+        self._history.clear()
 
     def get_board(self):
         """
@@ -43,6 +205,12 @@ class GessGame:
         """
         return self._game_state
 
+    def get_whose_turn(self):
+        """
+        :return: "B" or "W", the color of the player whose turn it is
+        """
+        return self._whose_turn
+
     def resign_game(self):
         """
         Allows a player to concede their demise.
@@ -66,14 +234,26 @@ class GessGame:
 
         A move cannot break the mover's own last ring.
 
+        The center of the piece can be anywhere in rows 1 to 19 and columns a to t. A piece centered on column t
+        is moved like any other; the cells to its east are the blank padding column of the flat layout, so its east
+        column never has stones. (The original list of lists had no cells past column t, and raised IndexError for
+        those pieces.)
+
         :param start: the starting coordinate of the piece to be moved (list of two integers)
         :param end: the ending coordinate of the piece to be moved (list of two integers)
         :return: True if valid move-request; False if invalid move-request
         """
         # convert input game-board position - 'k18' - to a list of corresponding list indices - [3, 11]
-        start = self.coordinate_conversion(start)
-        end = self.coordinate_conversion(end)
+        return self.move_coordinates(self.coordinate_conversion(start), self.coordinate_conversion(end))
 
+    def move_coordinates(self, start, end):
+        """
+        Makes a move the same way as make_move, given the coordinates of its start and end instead of their
+        game-board positions.
+        :param start: the starting coordinate of the piece to be moved (list of two integers)
+        :param end: the ending coordinate of the piece to be moved (list of two integers)
+        :return: True if valid move-request; False if invalid move-request
+        """
         # if the game is over
         if self._game_state != "UNFINISHED":
             return False
@@ -85,8 +265,7 @@ class GessGame:
             return False
 
         # if the piece has stones of the opponent
-        check_piece = Piece(start, self._board.get_game_board())
-        if not check_piece.valid_piece(self._up_next):
+        if not self._board.valid_piece(start, self._up_next):
             return False
 
         # if the direction and distance are valid, attempt the move
@@ -95,95 +274,331 @@ class GessGame:
         else:
             return False
 
-    def coordinate_conversion(self, position):
+    def apply_moves(self, moves):
         """
-        Converts a game-board position to a list with corresponding indices list[x][x]
-        Example: input of 'd16' returns  [5,4], which is used to access board[5][4]
+        Makes a sequence of moves, one after another, stopping at the first one that is not legal - for example to
+        replay a recorded game. Each move is a tuple or list of two game-board positions, such as ('m3', 'm6'), or
+        of two square indices (see SQUARE_NAMES), such as (42, 102), which skips parsing the names. Indices can be
+        of any integer type - NumPy integers, for example - except bool.
+        An item of any other shape, a pair that mixes names and indices, and a name that is not a letter followed by
+        a row number (see is_square_name) are not legal; nothing in the sequence raises an exception.
+        Square names are looked up in a table instead of being parsed, and the moves are made with move_coordinates
+        without going through make_move, so a long game costs one loop. A MoveInstruments object attached to the
+        game (see GessInstruments) times these moves from move_coordinates.
+        :param moves: an iterable of (start, end) pairs
+        :return: a dictionary of the number of moves made, the index in the sequence of the first move that was not
+                 legal (or None if every move was made), and the game state at the end
         """
-        return [21 - int(position[1:]), ord(position[0]) - 96]
+        coordinates = COORDINATES
+        made = 0
+        illegal = None
+        for move in moves:
+            if not isinstance(move, (tuple, list)) or len(move) != 2:
+                illegal = made
+                break
+            start, end = move
+            if isinstance(start, str) and isinstance(end, str):
+                start = coordinates.get(start) or (is_square_name(start) and self.coordinate_conversion(start))
+                end = coordinates.get(end) or (is_square_name(end) and self.coordinate_conversion(end))
+                if not (start and end):
+                    illegal = made
+                    break
+            elif is_square_index(start) and is_square_index(end):
+                start = SQUARE_COORDINATES[start]
+                end = SQUARE_COORDINATES[end]
+            else:
+                illegal = made
+                break
 
-    def valid_direction(self, start, end):
+            if not self.move_coordinates([start[0], start[1]], [end[0], end[1]]):
+                illegal = made
+                break
+            made += 1
+
+        return {"moves": made, "illegal": illegal, "game_state": self._game_state}
+
+    def is_legal(self, start, end):
         """
-        Checks whether the direction of a requested move is valid.
-        This is determined by checking the orientation of the footprint of a Piece object.
+        Checks whether make_move would make a move, without making it. Answers are kept in LEGALITY_CACHE by
+        position hash, so asking again about the same move in the same position is one lookup.
+        :param start: game-board position of the center of the piece to be moved - for example 'm3'
+        :param end: game-board position of the desired new location of the center - for example 'm6'
+        :return: True if make_move would make the move; False otherwise
+        """
+        if self._game_state != "UNFINISHED":
+            return False
 
-        If direction is valid, the direction attribute is set accordingly.
-        Example: an attempted northeastern move would set the direction attribute to [-1, 1].
+        key = (self.get_hash(), start, end)
+        legal = LEGALITY_CACHE.get(key)
+        if legal is None:
+            legal = self.push_move(start, end)
+            if legal:
+                self.pop_move()
+            LEGALITY_CACHE.put(key, legal)
+        return legal
 
-        :param start: the starting coordinate of the piece to be moved (list of two integers)
-        :param end: the ending coordinate of the piece to be moved (list of two integers)
-        :return: True if direction of requested move is valid; False if direction of requested move is invalid
+    def push_move(self, start, end):
         """
-        # make a piece object
-        moving_piece = Piece(start, self._board.get_game_board())
+        Makes a move the same way as make_move, and records what it changed so that pop_move can take it back.
 
-        # is the piece moving southward?
-        if end[0] > start[0]:
+        The record is the contents of the footprints at start and end before the move, the game state and whose
+        turn it was - enough to put the board back without copying it. If the move is not legal, nothing is recorded
+        and the board is left as it was.
 
-            # is the piece moving southeast?
-            if end[1] > start[1]:
+        :param start: game-board position of the center of the piece to be moved - for example 'm3'
+        :param end: game-board position of the desired new location of the center - for example 'm6'
+        :return: True if the move was made; False if the move was not legal
+        """
+        start_coordinate = self.coordinate_conversion(start)
+        end_coordinate = self.coordinate_conversion(end)
+
+        # make_move turns down moves that are not on the board before looking at the board
+        if not (1 <= start_coordinate[0] <= 19 and 1 <= start_coordinate[1] <= 20):
+            return False
+        if not (1 <= end_coordinate[0] <= 19 and 1 <= end_coordinate[1] <= 20):
+            return False
+
+        record = (start_coordinate, self._board.save_footprint(start_coordinate),
+                  end_coordinate, self._board.save_footprint(end_coordinate),
+                  self._game_state, self._whose_turn)
+
+        if not self.make_move(start, end):
+            # a move that is turned down part of the way through board_step can still take stones off the edge
+            self.restore(record)
+            return False
+
+        self._history.append(record)
+        return True
+
+    def pop_move(self):
+        """
+        Takes back the last move made with push_move.
+        :return: the (start, end) game-board positions of the move taken back, or None if there is nothing to undo
+        """
+        if not self._history:
+            return None
 
-                # is the move truly diagonal?
-                if abs(end[0] - start[0]) == abs(end[1] - start[1]):
+        record = self._history.pop()
+        self.restore(record)
+        return self.square_name(record[0]), self.square_name(record[2])
 
-                    # is there a stone in the SE position of the piece?
-                    if moving_piece.get_piece_SE() == self._whose_turn:
-                        self._direction = [1, 1]  # set the direction of the move
-                        return True
+    def restore(self, record):
+        """
+        Puts the board, game state and turn back the way they were when a push_move record was made.
+        Both footprints were saved before the move, so they can be written back in either order.
+        :param record: a tuple made by push_move
+        """
+        start, start_cells, end, end_cells, game_state, whose_turn = record
+        self._board.restore_footprint(end, end_cells)
+        self._board.restore_footprint(start, start_cells)
+        self._game_state = game_state
+        if whose_turn != self._whose_turn:
+            self._whose_turn, self._up_next = self._up_next, self._whose_turn
+
+    def get_rings(self, color):
+        """
+        :param color: "B" or "W"
+        :return: a frozenset of the game-board positions ('c3', 'r18', ...) of the centers of that player's rings
+        """
+        return frozenset(self.square_name(center) for center in self._board.get_rings(color))
 
-            # repeat of the above for a southwest move
-            elif end[1] < start[1]:
-                if abs(end[0] - start[0]) == abs(end[1] - start[1]):
-                    if moving_piece.get_piece_SW() == self._whose_turn:
-                        self._direction = [1, -1]  # set the direction of the move
-                        return True
+    def get_features(self):
+        """
+        :return: the array of evaluation features of the board, in the order of FEATURE_NAMES - kept up to date as
+                 moves are made, so reading it costs nothing after the first call
+        """
+        return self._board.get_features().get_values()
 
-            # must be direct south movement if reaches this line
+    def to_snapshot(self, binary=False):
+        """
+        Saves the position - the board inside columns b to s and rows 2 to 19, whose turn it is and the game state -
+        in the text or binary form described at SNAPSHOT_CELLS. The undo stack of push_move is not saved.
+        :param binary: True for the packed binary form; False for the text form
+        :return: the snapshot, as a string or as bytes
+        """
+        codes = []
+        for cell in self._board.get_cells():
+            if cell == " " or cell == "B" or cell == "W":
+                codes.append(SNAPSHOT_CELLS.index(cell))
             else:
-                if moving_piece.get_piece_S() == self._whose_turn:
-                    self._direction = [1, 0]  # set the direction of the move
-                    return True
+                codes.append(3)
+
+        edges = self._board.get_edge_mask()
+        if edges == NEW_GAME_EDGE_MASK:
+            edges = None
+
+        if binary:
+            packed = bytearray()
+            for index in range(0, len(codes), 4):
+                packed.append(codes[index] | codes[index + 1] << 2 | codes[index + 2] << 4 | codes[index + 3] << 6)
+            packed.append((self._whose_turn == "W") | GAME_STATES.index(self._game_state) << 1)
+            if edges is not None:
+                packed.extend(edges.to_bytes(EDGE_BYTES, "little"))
+            return bytes(packed)
+
+        rows = []
+        for row in range(18):
+            text = ""
+            blanks = 0
+            for code in codes[18 * row:18 * row + 18]:
+                if code == 0:
+                    blanks += 1
+                    continue
+                if blanks:
+                    text += str(blanks)
+                    blanks = 0
+                text += SNAPSHOT_CELLS[code]
+            if blanks:
+                text += str(blanks)
+            rows.append(text)
+        snapshot = "/".join(rows) + " " + self._whose_turn + " " + self._game_state
+        if edges is not None:
+            snapshot += " " + format(edges, "x")
+        return snapshot
+
+    @classmethod
+    def from_snapshot(cls, snapshot, backend="list"):
+        """
+        Makes a game in the position saved by to_snapshot. The board is filled in directly from the snapshot -
+        no moves are replayed. Cells outside columns b to s and rows 2 to 19 are as in a new game.
+        :param snapshot: a snapshot, as a string (text form) or as bytes (binary form)
+        :param backend: name of the board representation to use - a key of BOARD_BACKENDS
+        :return: a new GessGame object
+        """
+        edges = None
+        if isinstance(snapshot, (bytes, bytearray)):
+            if len(snapshot) not in (SNAPSHOT_BYTES, SNAPSHOT_BYTES + EDGE_BYTES) or \
+                    snapshot[SNAPSHOT_BYTES - 1] >> 1 >= len(GAME_STATES):
+                raise ValueError("not a binary Gess snapshot")
+            codes = []
+            for byte in snapshot[:SNAPSHOT_BYTES - 1]:
+                codes.extend((byte & 3, byte >> 2 & 3, byte >> 4 & 3, byte >> 6))
+            whose_turn = "W" if snapshot[SNAPSHOT_BYTES - 1] & 1 else "B"
+            game_state = GAME_STATES[snapshot[SNAPSHOT_BYTES - 1] >> 1]
+            if len(snapshot) > SNAPSHOT_BYTES:
+                edges = int.from_bytes(snapshot[SNAPSHOT_BYTES:], "little")
+        else:
+            fields = snapshot.split()
+            if len(fields) not in (3, 4) or fields[1] not in ("B", "W") or fields[2] not in GAME_STATES:
+                raise ValueError("not a Gess snapshot: " + repr(snapshot))
+            if len(fields) == 4:
+                edges = int(fields[3], 16)
+            codes = []
+            for text in fields[0].split("/"):
+                row = []
+                blanks = ""
+                for character in text + " ":
+                    if character.isdigit():
+                        blanks += character
+                        continue
+                    if blanks:
+                        row.extend([0] * int(blanks))
+                        blanks = ""
+                    if character in ("B", "W", "x"):
+                        row.append(SNAPSHOT_CELLS.index(character))
+                    elif character != " ":
+                        raise ValueError("not a Gess snapshot: " + repr(snapshot))
+                if len(row) != 18:
+                    raise ValueError("snapshot row does not have 18 cells: " + repr(text))
+                codes.extend(row)
+            if len(codes) != 18 * 18:
+                raise ValueError("snapshot does not have 18 rows: " + repr(snapshot))
+            whose_turn = fields[1]
+            game_state = fields[2]
+
+        game = cls(backend=backend)
+        game._board.load_cells([SNAPSHOT_CELLS[code] if code < 3 else "  " for code in codes])
+        if edges is not None:
+            game._board.load_edge_mask(edges)
+        game._game_state = game_state
+        if whose_turn == "W":
+            game._whose_turn, game._up_next = "W", "B"
+        return game
+
+    def get_position(self):
+        """
+        :return: an immutable Position object of the current position, for checking and trying moves without
+                 changing the game - for example from several threads at once
+        """
+        rows = tuple(tuple(row) + (" ",) for row in self._board.get_game_board())
+        rings = {color: self._board.get_rings(color) for color in ("B", "W")}
+        return Position(rows, self._whose_turn, self._game_state, rings)
+
+    @classmethod
+    def from_position(cls, position, backend="list"):
+        """
+        Makes a game in the position of a Position object.
+        :param position: a Position object
+        :param backend: name of the board representation to use - a key of BOARD_BACKENDS
+        :return: a new GessGame object
+        """
+        rows = position.get_rows()
+        game = cls(backend=backend)
+        game._board.load_cells([rows[cell // STRIDE][cell % STRIDE] for cell in PLAY_AREA_CELLS])
+        game._board.load_edge_mask(sum(1 << index for index in range(len(EDGE_CELLS))
+                                       if rows[EDGE_CELLS[index][0]][EDGE_CELLS[index][1]] != " "))
+        game._game_state = position.get_game_state()
+        if position.get_whose_turn() == "W":
+            game._whose_turn, game._up_next = "W", "B"
+        return game
+
+    def get_hash(self):
+        """
+        The position hash covers the board and whose turn it is, but not the game state.
+        :return: 64-bit Zobrist hash of the current position
+        """
+        if self._whose_turn == "W":
+            return self._board.get_hash() ^ ZOBRIST_WHITE_TO_MOVE
+        return self._board.get_hash()
 
-        # is the piece moving northward?
-        elif end[0] < start[0]:
+    def coordinate_conversion(self, position):
+        """
+        Converts a game-board position to a list with corresponding indices list[x][x]
+        Example: input of 'd16' returns  [5,4], which is used to access board[5][4]
+        The 400 squares of the board are looked up in COORDINATES; anything else is parsed.
+        """
+        coordinate = COORDINATES.get(position)
+        if coordinate is not None:
+            return [coordinate[0], coordinate[1]]
+        return [21 - int(position[1:]), ord(position[0]) - 96]
 
-            # is the piece moving northeast?
-            if end[1] > start[1]:
+    def square_name(self, coordinate):
+        """
+        Converts list indices back to a game-board position - the reverse of coordinate_conversion.
+        Example: input of [5, 4] (or (5, 4)) returns 'd16'
+        """
+        return chr(coordinate[1] + 96) + str(21 - coordinate[0])
 
-                # is the move truly diagonal?
-                if abs(end[0] - start[0]) == abs(end[1] - start[1]):
+    def valid_direction(self, start, end):
+        """
+        Checks whether the direction of a requested move is valid.
+        This is determined by checking the orientation of the footprint of the piece, as classified by
+        Board.classify: the move has to be straight or truly diagonal, toward a stone of the mover.
 
-                    # is there a stone in the NE position of the piece?
-                    if moving_piece.get_piece_NE() == self._whose_turn:
-                        self._direction = [-1, 1]  # set the direction of the move
-                        return True
+        If direction is valid, the direction attribute is set accordingly.
+        Example: an attempted northeastern move would set the direction attribute to [-1, 1].
 
-            # repeat of the above for a northwest move
-            elif end[1] < start[1]:
-                if abs(end[0] - start[0]) == abs(end[1] - start[1]):
-                    if moving_piece.get_piece_NW() == self._whose_turn:
-                        self._direction = [-1, -1]  # set the direction of the move
-                        return True
+        :param start: the starting coordinate of the piece to be moved (list of two integers)
+        :param end: the ending coordinate of the piece to be moved (list of two integers)
+        :return: True if direction of requested move is valid; False if direction of requested move is invalid
+        """
+        row_change = end[0] - start[0]
+        column_change = end[1] - start[1]
 
-            # must be direct north movement if this line is reached
-            else:
-                if moving_piece.get_piece_N() == self._whose_turn:
-                    self._direction = [-1, 0]  # set the direction of the move
-                    return True
+        # is the move neither straight nor truly diagonal?
+        if row_change != 0 and column_change != 0 and abs(row_change) != abs(column_change):
+            return False
 
-        # direct east movement
-        elif end[0] == start[0] and end[1] > start[1]:
-            if moving_piece.get_piece_E() == self._whose_turn:  # stone in the east position?
-                self._direction = [0, 1]  # set direction of the move
-                return True
+        index = DIRECTION_INDICES.get(((row_change > 0) - (row_change < 0), (column_change > 0) - (column_change < 0)))
+        if index is None:
+            return False  # not a valid direction of movement
 
-        # direct west movement
-        elif end[0] == start[0] and end[1] < start[1]:
-            if moving_piece.get_piece_W() == self._whose_turn:  # stone in the west position?
-                self._direction = [0, -1]  # set direction of the move
-                return True
+        # is there a stone of the mover in that direction of the piece?
+        if not self._board.classify(start)[3][self._whose_turn] >> index & 1:
+            return False
 
-        return False  # not a valid direction of movement
+        self._direction = list(DIRECTIONS[index])  # set the direction of the move
+        return True
 
     def valid_distance(self, start, end):
         """
@@ -198,31 +613,166 @@ class GessGame:
         :param end: the ending coordinate of the piece to be moved (list of two integers)
         :return: True if distance of requested move is valid; False if distance of requested move is invalid
         """
-        # make a piece object
-        moving_piece = Piece(start, self._board.get_game_board())
+        if not self.distance_in_range(self._board.classify(start)[0], start, end):
+            return False
 
-        # if there is a stone in the center of the piece, any distance is valid
-        if moving_piece.get_piece_center() == self._whose_turn:
-            if end[0] != start[0]:
-                self._distance = abs(end[0] - start[0])  # set distance based on vertical movement
+        if end[0] != start[0]:
+            self._distance = abs(end[0] - start[0])  # set distance based on vertical movement
+        elif end[1] != start[1]:
+            self._distance = abs(end[1] - start[1])  # set distance based on horizontal movement
+
+        return True
 
-            elif end[1] != start[1]:
-                self._distance = abs(end[1] - start[1])  # set distance based on horizontal movement
+    def distance_in_range(self, center, start, end):
+        """
+        The distance rule used by valid_distance, without setting the distance attribute.
 
+        :param center: color of the center stone of the piece to be moved, or None if it has no center stone
+        :param start: the starting coordinate of the piece to be moved (list of two integers)
+        :param end: the ending coordinate of the piece to be moved (list of two integers)
+        :return: True if the piece may travel from start to end; False otherwise
+        """
+        # if there is a stone in the center of the piece, any distance is valid
+        if center == self._whose_turn:
             return True
 
         # if there is no stone in the center of the piece, the move-distance cannot be greater than 3
-        else:
-            if abs(end[0] - start[0]) > 3 or abs(end[1] - start[1] > 3):
-                # the requested move-distance is greater than 3, but no stone in center of piece
-                return False
+        if abs(end[0] - start[0]) > 3 or abs(end[1] - start[1] > 3):
+            return False
+
+        return True
+
+    def legal_rays(self):
+        """
+        Finds every legal move for the player whose turn it is, one ray at a time.
 
-            if end[0] != start[0]:
-                self._distance = abs(end[0] - start[0])  # set distance based on vertical movement
-            elif end[1] != start[1]:
-                self._distance = abs(end[1] - start[1])  # set distance based on horizontal movement
+        A start is only considered if make_move would accept it as the center of a piece, the piece has no stones of
+        the opponent, and taking the piece off the board leaves the mover a ring whose footprint it doesn't touch.
+        Each direction with a stone of the mover is then followed outward from the start until the distance rule of
+        distance_in_range fails, the end goes off the board, or the next footprint along the path is obstructed.
+        The piece being moved is ignored while checking for obstructions, just as board_step takes it off first.
 
-            return True
+        :return: a generator of (start, direction, length) tuples - every distance from 1 to length along the
+                 direction is a legal move
+        """
+        if self._game_state != "UNFINISHED":
+            return
+
+        rings = self._board.get_rings(self._whose_turn)
+
+        for row in range(1, 20):
+            for column in range(1, 21):
+                start = [row, column]
+                if not self._board.valid_piece(start, self._up_next):
+                    continue
+
+                # a ring within two squares of the start overlaps the footprint, and is broken when the piece moves
+                if not any(abs(ring[0] - row) > 2 or abs(ring[1] - column) > 2 for ring in rings):
+                    continue
+
+                moving_piece = self._board.get_piece(start)
+                for index in range(8):
+                    length = self.ray_length(moving_piece, start, index)
+                    if length > 0:
+                        yield start, DIRECTIONS[index], length
+
+    def ray_length(self, moving_piece, start, index):
+        """
+        :param moving_piece: the Piece (or BitPiece) object at start
+        :param start: the coordinate of a piece that legal_rays would move (list of two integers)
+        :param index: index of a direction in DIRECTIONS
+        :return: the number of legal moves of the piece along the direction - every distance from 1 to the length
+                 is legal - or 0 if the piece has no stone of the mover in that direction
+        """
+        row, column = start
+        direction = DIRECTIONS[index]
+        if moving_piece.cell(direction[0], direction[1]) != self._whose_turn:
+            return 0
+
+        # the farthest end that is on the board and within the distance rule of distance_in_range, which lets a
+        # piece without a center stone go any distance west, but at most three in any other direction
+        reach = len(RAYS[row * STRIDE + column][index])
+        if moving_piece.get_piece_center() != self._whose_turn and index != WEST:
+            reach = min(reach, 3)
+        if reach == 0:
+            return 0
+
+        # every footprint between the start and the end has to be empty; the first two overlap the piece being
+        # moved, so they are checked without it, and the rest are looked up in the occupancy map
+        length = 1
+        while length < reach and length <= 2 and self._board.is_empty_without(
+                [row + direction[0] * length, column + direction[1] * length], start):
+            length += 1
+        if length == 3 and reach > 3:
+            length += self._board.slide_length([row + direction[0] * 2, column + direction[1] * 2],
+                                               index, reach - 3)
+        return length
+
+    def random_move(self, rng, tries=64):
+        """
+        Picks a legal move at random without finding every legal move first, for random playouts.
+        Starts are drawn at random until one can move, with the same checks as legal_rays; its directions are tried
+        from a random one, and the distance is drawn along the first ray with a move - so a draw costs a few
+        footprint lookups instead of a pass over the whole board. The moves are not equally likely. If no draw can
+        move after the given number of tries, one of the moves of legal_rays is picked instead, so None always means
+        there is no legal move.
+        :param rng: a random.Random object
+        :param tries: number of random draws before falling back to legal_rays
+        :return: a (start, end) tuple of game-board positions, or None if there is no legal move
+        """
+        if self._game_state != "UNFINISHED":
+            return None
+
+        rings = self._board.get_rings(self._whose_turn)
+        for attempt in range(tries):
+            row = rng.randrange(1, 20)
+            column = rng.randrange(1, 21)
+            start = [row, column]
+            if not self._board.valid_piece(start, self._up_next):
+                continue
+            if not any(abs(ring[0] - row) > 2 or abs(ring[1] - column) > 2 for ring in rings):
+                continue
+
+            # the directions are tried in turn from a random one
+            moving_piece = self._board.get_piece(start)
+            first = rng.randrange(8)
+            for turn in range(8):
+                index = (first + turn) % 8
+                length = self.ray_length(moving_piece, start, index)
+                if length > 0:
+                    distance = rng.randint(1, length)
+                    direction = DIRECTIONS[index]
+                    return self.square_name(start), self.square_name([row + direction[0] * distance,
+                                                                      column + direction[1] * distance])
+
+        rays = list(self.legal_rays())
+        count = sum(length for start, direction, length in rays)
+        if count == 0:
+            return None
+        choice = rng.randrange(count)
+        for start, direction, length in rays:
+            if choice < length:
+                distance = choice + 1
+                return self.square_name(start), self.square_name([start[0] + direction[0] * distance,
+                                                                  start[1] + direction[1] * distance])
+            choice -= length
+
+    def legal_moves(self):
+        """
+        :return: a generator of every legal move for the player whose turn it is, as (start, end) tuples of
+                 game-board positions that make_move would accept - for example ('m3', 'm6')
+        """
+        for start, direction, length in self.legal_rays():
+            start_name = self.square_name(start)
+            for distance in range(1, length + 1):
+                yield start_name, self.square_name([start[0] + direction[0] * distance,
+                                                    start[1] + direction[1] * distance])
+
+    def count_legal_moves(self):
+        """
+        :return: the number of legal moves for the player whose turn it is, without building the moves themselves
+        """
+        return sum(length for start, direction, length in self.legal_rays())
 
     def board_step(self, start, end):
         """
@@ -230,7 +780,8 @@ class GessGame:
         whether the requested move is obstructed. When only one step is left, the piece is added to the board in its
         final destination, overwriting whatever is there.
 
-        A spot is checked for obstructions by making piece object and then confirming that the piece is empty.
+        The path is checked for obstructions with one lookup along the sliding ray of the move, in the occupancy map
+        the board keeps of which footprints are empty.
 
         If movement is obstructed, the move is not made.
         If a the player who made the move broke their own last ring, the board is returned to its previous state.
@@ -240,22 +791,14 @@ class GessGame:
         :return: True if the move was unobstructed and executed; False if the move was obstructed and not executed
         """
         # make a copy of the piece to be moved and remove it from the board
-        moving_piece = Piece(start, self._board.get_game_board())
+        moving_piece = self._board.save_footprint(start)
         self._board.remove_piece(start)
 
-        # go in the direction of the move, one step at a time, checking for obstructions at each step
-        moving_coordinate = start[:]
-        while self._distance > 1:
-            # move the coordinate to the next check-position
-            moving_coordinate[0] += self._direction[0]
-            moving_coordinate[1] += self._direction[1]
-
-            check_piece = Piece(moving_coordinate, self._board.get_game_board())
-            if not check_piece.is_empty():  # if the "piece" has any stones, then the path of the move is obstructed
-                self._board.add_piece(moving_piece, start)  # return the piece to its starting position
-                return False
-
-            self._distance -= 1
+        # every footprint between the start and the end has to be empty, or the path is obstructed
+        path = self._distance - 1
+        if self._board.slide_length(start, DIRECTIONS.index(self._direction), path) < path:
+            self._board.add_piece(moving_piece, start)  # return the piece to its starting position
+            return False
 
         if self.still_in(self._board):  # if the mover didn't break their own last ring
             self._board.add_piece(moving_piece, end)  # add the piece, overwriting the contents of the board
@@ -272,7 +815,7 @@ class GessGame:
     def still_in(self, game_board):
         """
         Checks if each player is still in the game.
-        This is done by making a piece object at each valid spot on the board and checking for a ring.
+        This is done by looking up the ring index that the board keeps up to date as pieces are moved.
 
         Changes game_state if the player who made the move breaks the other player's last ring.
 
@@ -281,22 +824,8 @@ class GessGame:
         :param game_board: a board object
         :return: True if the player who made the move is still in, False otherwise.
         """
-        def check_piece(color):
-            """
-            Makes a temporary piece at each valid spot on the board, checking if the piece is a ring.
-
-            :param color: color of the player being checked
-            :return: True if the player has a ring; False if the player has no ring
-            """
-            for row in range(3, 19):
-                for column in range(3, 19):  # for every square on the board where rings are possible
-                    ring_check = Piece([row, column], game_board.get_game_board())  # make a piece
-                    if ring_check.is_ring(color):  # check if the piece is a ring
-                        return True
-            return False
-
-        if check_piece(self._whose_turn):  # if the move didn't break the mover's own last ring
-            if not check_piece(self._up_next):  # if the move broke the opponent's last ring
+        if game_board.has_ring(self._whose_turn):  # if the move didn't break the mover's own last ring
+            if not game_board.has_ring(self._up_next):  # if the move broke the opponent's last ring
                 # change game_state accordingly
                 if self._whose_turn == "B":
                     self._game_state = "BLACK_WON"
@@ -312,7 +841,7 @@ class GessGame:
     def still_in_double_check(self, game_board):
         """
         Checks if each player is still in the game.
-        This is done by making a piece object at each valid spot on the board and checking for a ring.
+        This is done by looking up the ring index that the board keeps up to date as pieces are moved.
 
         Changes game_state if the player who made the move breaks the other player's last ring.
 
@@ -322,22 +851,8 @@ class GessGame:
         :param game_board: a board object
         :return: True if the player who made the move is still in, False otherwise.
         """
-        def check_piece(color):
-            """
-            Makes a temporary piece at each valid spot on the board, checking if the piece is a ring.
-
-            :param color: color of the player being checked
-            :return: True if the player has a ring; False if the player has no ring
-            """
-            for row in range(3, 19):
-                for column in range(3, 19):  # for every square on the board where rings are possible
-                    ring_check = Piece([row, column], game_board.get_game_board())  # make a piece
-                    if ring_check.is_ring(color):  # check if the piece is a ring
-                        return True
-            return False
-
-        if check_piece(self._up_next):  # if the move didn't break the mover's own last ring
-            if not check_piece(self._whose_turn):  # if the move broke the opponent's last ring
+        if game_board.has_ring(self._up_next):  # if the move didn't break the mover's own last ring
+            if not game_board.has_ring(self._whose_turn):  # if the move broke the opponent's last ring
                 # change game_state accordingly
                 if self._whose_turn == "W":
                     self._game_state = "BLACK_WON"
@@ -351,231 +866,1606 @@ class GessGame:
             return False
 
 
+# The starting layout of the board, as a list of lists: the top row and left column hold the labels, and the
+# padding strings of the left column are there for printing purposes. NEW_GAME_CELLS is the same layout in the flat
+# layout of STRIDE, which every new or reset Board copies in one go.
+NEW_GAME_LAYOUT = [[' ', 'a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q','r','s','t'],
+                  [20,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [19,  '  ',' ','W',' ','W',' ','W','W','W','W','W','W','W','W',' ','W',' ','W',' ',' '],
+                  [18,  '  ','W','W','W',' ','W',' ','W','W','W','W',' ','W',' ','W',' ','W','W','W',' '],
+                  [17,  '  ',' ','W',' ','W',' ','W','W','W','W','W','W','W','W',' ','W',' ','W',' ',' '],
+                  [16,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [15,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [14,  '  ',' ','W',' ',' ','W',' ',' ','W',' ',' ','W',' ',' ','W',' ',' ','W',' ',' '],
+                  [13,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [12,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [11,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [10,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [9,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [8,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [7,   '   ',' ','B',' ',' ','B',' ',' ','B',' ',' ','B',' ',' ','B',' ',' ','B',' ',' '],
+                  [6,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [5,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
+                  [4,   '   ',' ','B',' ','B',' ','B','B','B','B','B','B','B','B',' ','B',' ','B',' ',' '],
+                  [3,   '   ','B','B','B',' ','B',' ','B','B','B','B',' ','B',' ','B',' ','B','B','B',' '],
+                  [2,   '   ',' ','B',' ','B',' ','B','B','B','B','B','B','B','B',' ','B',' ','B',' ',' '],
+                  [1,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ']]
+
+NEW_GAME_CELLS = [' '] * BOARD_CELLS
+for _row in range(len(NEW_GAME_LAYOUT)):
+    for _column in range(len(NEW_GAME_LAYOUT[_row])):
+        NEW_GAME_CELLS[_row * STRIDE + _column] = NEW_GAME_LAYOUT[_row][_column]
+
+
 class Board:
     """
-    The Board class has one data member: the board of a GessGame object.
+    The Board class has two data members: the board of a GessGame object, and an index of where the rings are.
     The GessGame class uses Board class methods and data member.
-    The Board class manages the state of the game board by adding and removing game Piece objects.
-    The Board class needs to communicate with a the Piece class in order to add a Piece, but removing a Piece can be
-    done without communication with the Piece class.
+    The Board class manages the state of the game board by adding and removing game pieces.
+    The board is one flat list of cells (see STRIDE), and every footprint operation goes through the precomputed
+    per-square tables FOOTPRINTS, PERIMETERS, FOOTPRINT_GETTERS and PLACEMENTS, so checking or moving a piece does not
+    make any new objects. Piece objects handed out by get_piece are views that read the flat list directly.
+    The ring index holds the centers of each player's rings. It is built with one full scan the first time it is
+    needed, and after that only the centers around a removed or added piece are checked again.
+    The Zobrist hash of the board is kept up to date the same way: it is computed once when first asked for, and
+    after that the keys of a footprint are XORed out before the footprint is written and XORed back in after.
+    The occupancy map counts the non-blank cells of the footprint at every center, so a footprint is empty when its
+    count is 0. It is also built on first use, and after that each cell that goes from blank to non-blank, or back,
+    changes the counts of the centers in COVERING. Together with RAYS it tells how far a footprint can slide.
+    The evaluation features (see FeatureTracker) are also built on first use, and after that every write of a
+    footprint hands the footprint to the tracker.
     """
 
     def __init__(self):
         """
         Initializes the board data member of the board class.
-        The board is a list of lists.
+        The flat list of cells is copied from NEW_GAME_CELLS, the starting layout.
         The top row and left column are completely inaccessible to the GessGame class, and are only there for playing
         purposes.
+        The ring index maps each color to a set of ring centers (tuples of two integers), or is None until first used.
+        The hash is a 64-bit Zobrist hash of every cell, or None until first used.
+        The occupancy map is a list of the number of non-blank cells of each footprint, by center, or None until first
+        used.
+        The feature tracker is a FeatureTracker object, or None until first used.
         """
-        self._board = [[' ', 'a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q','r','s','t'],
-                       [20,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [19,  '  ',' ','W',' ','W',' ','W','W','W','W','W','W','W','W',' ','W',' ','W',' ',' '],
-                       [18,  '  ','W','W','W',' ','W',' ','W','W','W','W',' ','W',' ','W',' ','W','W','W',' '],
-                       [17,  '  ',' ','W',' ','W',' ','W','W','W','W','W','W','W','W',' ','W',' ','W',' ',' '],
-                       [16,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [15,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [14,  '  ',' ','W',' ',' ','W',' ',' ','W',' ',' ','W',' ',' ','W',' ',' ','W',' ',' '],
-                       [13,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [12,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [11,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [10,  '  ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [9,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [8,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [7,   '   ',' ','B',' ',' ','B',' ',' ','B',' ',' ','B',' ',' ','B',' ',' ','B',' ',' '],
-                       [6,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [5,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' '],
-                       [4,   '   ',' ','B',' ','B',' ','B','B','B','B','B','B','B','B',' ','B',' ','B',' ',' '],
-                       [3,   '   ','B','B','B',' ','B',' ','B','B','B','B',' ','B',' ','B',' ','B','B','B',' '],
-                       [2,   '   ',' ','B',' ','B',' ','B','B','B','B','B','B','B','B',' ','B',' ','B',' ',' '],
-                       [1,   '   ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ',' ']]
+        self._rings = None
+        self._hash = None
+        self._occupancy = None
+        self._features = None
+        self._cells = NEW_GAME_CELLS[:]
 
     def get_game_board(self):
         """
-        :return: board data member (list of lists)
+        :return: a copy of the board as a list of lists, indexed [row][column] (list of lists)
         """
-        return self._board
+        return [self._cells[row * STRIDE:row * STRIDE + 21] for row in range(21)]
 
-    def remove_piece(self, location):
+    def clone(self):
         """
-        Removes a piece centered at the coordinates specified by the input parameter.
-        The center and all surrounding "squares" are filled with a string of one space, which indicates no stone.
-        :param location: list of two integers indicating location on the board
+        Copies the board with one copy of the flat list of cells. The ring index, the hash and the occupancy map
+        are copied too, so the copy does not have to rebuild them; the feature tracker is rebuilt the next time it is
+        needed.
+        :return: a new Board object in the same position
         """
-        self._board[location[0]][location[1]] = ' '
-        self._board[location[0] + 1][location[1]] = ' '
-        self._board[location[0] + 1][location[1] + 1] = ' '
-        self._board[location[0] + 1][location[1] - 1] = ' '
-        self._board[location[0]][location[1] + 1] = ' '
-        self._board[location[0] - 1][location[1]] = ' '
-        self._board[location[0] - 1][location[1] + 1] = ' '
-        self._board[location[0] - 1][location[1] - 1] = ' '
-        self._board[location[0]][location[1] - 1] = ' '
+        board = Board.__new__(Board)
+        board._cells = self._cells[:]
+        board._rings = None if self._rings is None else {"B": set(self._rings["B"]), "W": set(self._rings["W"])}
+        board._hash = self._hash
+        board._occupancy = None if self._occupancy is None else self._occupancy[:]
+        board._features = None
+        return board
+
+    def reset(self):
+        """
+        Puts the board back to the starting layout, writing into the flat list of cells that is already there.
+        The ring index, the hash, the occupancy map and the feature tracker are rebuilt the next time they are
+        needed.
+        """
+        self._cells[:] = NEW_GAME_CELLS
+        self._rings = None
+        self._hash = None
+        self._occupancy = None
+        self._features = None
 
-    def add_piece(self, piece, location):
+    def get_piece(self, location):
         """
-        Adds the attributes of a Piece object to the board attribute of a Board object.
-        The piece is only added if its center is on the board - b to s horizontally and 2 to 19 vertically.
-        Piece perimeter attributes are not added if they are off the board,
-        but the portion of the perimeter that is on the board is added.
-        :param piece: a Piece object
         :param location: list of two integers indicating location on the board
+        :return: a Piece object that views the board, centered at location
         """
-        # if the center of the piece is being added to a valid spot on the board...
-        if location[0] in range(2,20) and location[1] in range(2,20):
-            self._board[location[0]][location[1]] = piece.get_piece_center()
-
-            # then add the center, plus any other part of the piece that is not off the board
-            if location[0] - 1 in range(2,20) and location[1] in range(2,20):
-                self._board[location[0] - 1][location[1]] = piece.get_piece_N()
-
-            if location[0] - 1 in range(2,20) and location[1] - 1 in range(2,20):
-                self._board[location[0] - 1][location[1] - 1] = piece.get_piece_NW()
-
-            if location[0] - 1 in range(2,20) and location[1] + 1 in range(2,20):
-                self._board[location[0] - 1][location[1] + 1] = piece.get_piece_NE()
+        return Piece(location, self._cells)
 
-            if location[0] + 1 in range(2,20) and location[1] in range(2,20):
-                self._board[location[0] + 1][location[1]] = piece.get_piece_S()
-
-            if location[0] + 1 in range(2,20) and location[1] - 1 in range(2,20):
-                self._board[location[0] + 1][location[1] - 1] = piece.get_piece_SW()
-
-            if location[0] + 1 in range(2,20) and location[1] + 1 in range(2,20):
-                self._board[location[0] + 1][location[1] + 1] = piece.get_piece_SE()
-
-            if location[0] in range(2,20) and location[1] + 1 in range(2,20):
-                self._board[location[0]][location[1] + 1] = piece.get_piece_E()
+    def classify(self, location):
+        """
+        :param location: list of two integers indicating location on the board
+        :return: the classification of the piece centered at location (see classify_footprint), looked up in
+                 FOOTPRINT_CACHE by the nine cells of the footprint
+        """
+        pattern = FOOTPRINT_GETTERS[location[0] * STRIDE + location[1]](self._cells)
+        classification = FOOTPRINT_CACHE.get(pattern)
+        if classification is None:
+            classification = FOOTPRINT_CACHE.put(pattern, classify_footprint(pattern))
+        return classification
 
-            if location[0] in range(2,20) and location[1] - 1 in range(2,20):
-                self._board[location[0]][location[1] - 1] = piece.get_piece_W()
+    def valid_piece(self, location, up_next):
+        """
+        :param location: list of two integers indicating location on the board
+        :param up_next: color of the player who is not currently authorized to make a move
+        :return: True if the piece centered at location has no stones of the opponent; False otherwise
+        """
+        cells = self._cells
+        for cell in FOOTPRINTS[location[0] * STRIDE + location[1]]:
+            if cells[cell] == up_next:
+                return False
+        return True
 
+    def is_empty(self, location):
+        """
+        :param location: list of two integers indicating location on the board
+        :return: True if the piece centered at location has no stones; False otherwise
+        """
+        if self._occupancy is None:
+            self.find_occupancy()
+        return self._occupancy[location[0] * STRIDE + location[1]] == 0
 
-class Piece:
-    """
-    The Piece class has data members for keeping track of where stones are in a GessGame board-piece.
-    Piece class methods look at Piece attributes to return relevant information such as if the Piece is a ring or empty.
-    Communication with the Board class is required to make a Piece object;
-    a Piece object is a copy of a section of board from a Board object.
-    """
-    def __init__(self, location, board):
+    def slide_length(self, location, direction, limit):
         """
-        Fills the Piece with stones or spaces depending on the orientation
-        of the input Board object and location on the board.
         :param location: list of two integers indicating location on the board
-        :param board: a Board object
-        """
-        self._center = board[location[0]][location[1]]
-        self._N = board[location[0] - 1][location[1]]
-        self._NW = board[location[0] - 1][location[1] - 1]
-        self._NE = board[location[0] - 1][location[1] + 1]
-        self._S = board[location[0] + 1][location[1]]
-        self._SW = board[location[0] + 1][location[1] - 1]
-        self._SE = board[location[0] + 1][location[1] + 1]
-        self._W = board[location[0]][location[1] - 1]
-        self._E = board[location[0]][location[1] + 1]
-
-        self._piece_matrix = [[self._NW, self._N, self._NE],
-                              [self._W, self._center, self._E],
-                              [self._SW, self._S, self._SE]]
+        :param direction: index of a direction in DIRECTIONS
+        :param limit: the most steps to look at
+        :return: the number of empty footprints, up to limit, met one after another when sliding from location along
+                 the direction - not counting the footprint at location
+        """
+        if self._occupancy is None:
+            self.find_occupancy()
+        occupancy = self._occupancy
+        length = 0
+        for center in RAYS[location[0] * STRIDE + location[1]][direction]:
+            if length == limit or occupancy[center]:
+                break
+            length += 1
+        return length
+
+    def find_occupancy(self):
+        """
+        Builds the occupancy map from scratch by counting the non-blank cells of the footprint at every center.
+        """
+        self._occupancy = [0] * BOARD_CELLS
+        for center in CENTERS:
+            for cell in FOOTPRINTS[center]:
+                if self._cells[cell] != ' ':
+                    self._occupancy[center] += 1
 
-    def perimeter(self):
+    def is_empty_without(self, location, removed):
         """
-        The perimeter method is used by the is_ring method to check if a piece is a ring.
-        :return: a list with all attributes of the Piece except the center attribute
+        Checks whether the piece centered at location would be empty after removing the piece centered at removed,
+        without changing the board.
+        :param location: list of two integers indicating location on the board
+        :param removed: list of two integers indicating the center of the piece to leave out
+        :return: True if the piece centered at location has no stones outside the removed footprint; False otherwise
         """
-        return [self._N, self._NW, self._NE, self._S, self._SW, self._SE, self._W, self._E]
+        cells = self._cells
+        removed_cells = FOOTPRINTS[removed[0] * STRIDE + removed[1]]
+        for cell in FOOTPRINTS[location[0] * STRIDE + location[1]]:
+            if cells[cell] != ' ' and cell not in removed_cells:
+                return False
+        return True
 
-    def is_ring(self, color):
+    def is_ring(self, location, color):
         """
-        Checks whether a piece is a ring.
         A ring is a piece with a perimeter of all the same stone, but no center stone.
+        :param location: list of two integers indicating location on the board
         :param color: color of the stones of the piece that might be a ring
-        :return: True if piece is a ring; False if piece is not a ring
+        :return: True if the piece centered at location is a ring; False otherwise
         """
-        if self._center == " ":  # can only be a ring if center has no stone
-            perimeter_count = 0
-            for stone in self.perimeter():
-                if stone == color:
-                    perimeter_count += 1
-            if perimeter_count == 8:  # if every stone in the perimeter is the specified color
-                return True
-        else:
+        cells = self._cells
+        center = location[0] * STRIDE + location[1]
+        if cells[center] != ' ':
             return False
+        for cell in PERIMETERS[center]:
+            if cells[cell] != color:
+                return False
+        return True
 
-    def valid_piece(self, up_next):
+    def get_rings(self, color):
         """
-        Confirms that a piece does not have stones of the other player.
-        :param up_next: color of the player who is not currently authorized to make a move
-        :return: True if piece has no stones of the opponent; False otherwise
+        :param color: "B" or "W"
+        :return: a frozenset of the centers (tuples of two integers) of that player's rings
         """
-        if self._center == up_next:
-            return False
-        if up_next in self.perimeter():
-            return False
+        if self._rings is None:
+            self.find_rings()
+        return frozenset(self._rings[color])
 
-        return True
+    def has_ring(self, color):
+        """
+        :param color: "B" or "W"
+        :return: True if that player has at least one ring; False otherwise
+        """
+        if self._rings is None:
+            self.find_rings()
+        return len(self._rings[color]) > 0
 
-    def is_empty(self):
+    def get_cells(self):
         """
-        :return: True if a piece has no stones; False if a piece has a stone
+        :return: a list of the cells of columns b to s and rows 2 to 19, row by row from row 19 down to row 2
         """
-        for row in self._piece_matrix:
-            for space in row:
-                if space != ' ':  # no stone in the space
-                    return False
+        return [self._cells[cell] for cell in PLAY_AREA_CELLS]
 
-        return True
+    def load_cells(self, cells):
+        """
+        Overwrites the cells of columns b to s and rows 2 to 19, for example from a snapshot. The ring index, the
+        hash, the occupancy map and the feature tracker are rebuilt the next time they are needed.
+        :param cells: a list in the order of get_cells
+        """
+        for index in range(len(cells)):
+            self._cells[PLAY_AREA_CELLS[index]] = cells[index]
+        self._rings = None
+        self._hash = None
+        self._occupancy = None
+        self._features = None
+
+    def get_edge_mask(self):
+        """
+        :return: an integer with bit i set if the cell EDGE_CELLS[i] is not blank
+        """
+        mask = 0
+        for index in range(len(EDGE_CELLS)):
+            if self._cells[EDGE_CELLS[index][0] * STRIDE + EDGE_CELLS[index][1]] != " ":
+                mask |= 1 << index
+        return mask
 
-    def get_piece_center(self):
+    def load_edge_mask(self, mask):
         """
-        :return: center attribute of the piece
+        Blanks the edge cells whose bit is not set in mask. Edge cells whose bit is set keep their label or padding,
+        or get padding if they are blank. The hash and the occupancy map are rebuilt the next time they are
+        needed.
+        :param mask: an integer in the form made by get_edge_mask
+        """
+        for index in range(len(EDGE_CELLS)):
+            cell = EDGE_CELLS[index][0] * STRIDE + EDGE_CELLS[index][1]
+            if not (mask >> index) & 1:
+                self._cells[cell] = " "
+            elif self._cells[cell] == " ":
+                self._cells[cell] = "  "
+        self._hash = None
+        self._occupancy = None
+
+    def count_stones(self, color):
         """
-        return self._center
+        :param color: "B" or "W"
+        :return: the number of stones of that color on the board - columns b to s and rows 2 to 19
+        """
+        # stones never leave the play area, and no label is "B" or "W", so the whole list can be counted
+        return self._cells.count(color)
 
-    def get_piece_N(self):
+    def find_rings(self):
         """
-        :return: north attribute of the piece
+        Builds the ring index from scratch by checking for a ring at every square on the board where rings are
+        possible - rows and columns 3 to 18, since a ring's perimeter has to be on the board.
         """
-        return self._N
+        self._rings = {"B": set(), "W": set()}
+        self.update_rings(3, 18, 3, 18)
 
-    def get_piece_NW(self):
+    def update_rings(self, top, bottom, left, right):
         """
-        :return: northwest attribute of the piece
+        Checks again for rings centered in a rectangle of the board, adding and removing centers in the ring index.
+        The rectangle is clipped to the squares where rings are possible. Does nothing if the index is not built yet.
+        :param top: first row to check
+        :param bottom: last row to check
+        :param left: first column to check
+        :param right: last column to check
+        """
+        if self._rings is None:
+            return
+
+        for row in range(max(top, 3), min(bottom, 18) + 1):
+            for column in range(max(left, 3), min(right, 18) + 1):
+                for color in ("B", "W"):
+                    if self.is_ring([row, column], color):
+                        self._rings[color].add((row, column))
+                    else:
+                        self._rings[color].discard((row, column))
+
+    def update_rings_around(self, location):
         """
-        return self._NW
+        Checks again for rings whose footprint overlaps the footprint centered at location - the only rings that a
+        piece removed from or added at location can make or break.
+        :param location: list of two integers indicating location on the board
+        """
+        self.update_rings(location[0] - 2, location[0] + 2, location[1] - 2, location[1] + 2)
 
-    def get_piece_NE(self):
+    def get_features(self):
         """
-        :return: northeast attribute of the piece
+        :return: the FeatureTracker object of the board, built the first time it is asked for
         """
-        return self._NE
+        if self._features is None:
+            self._features = FeatureTracker(self)
+        return self._features
 
-    def get_piece_S(self):
+    def update_features(self, location):
         """
-        :return: south attribute of the piece
+        Hands a footprint that was just written to the feature tracker. Does nothing if the tracker is not built yet.
+        :param location: list of two integers indicating location on the board
         """
-        return self._S
+        if self._features is not None:
+            self._features.update(self, location)
 
-    def get_piece_SW(self):
+    def get_hash(self):
         """
-        :return: southwest attribute of the piece
+        :return: the 64-bit Zobrist hash of the board
         """
-        return self._SW
+        if self._hash is None:
+            self.find_hash()
+        return self._hash
 
-    def get_piece_SE(self):
+    def find_hash(self):
         """
-        :return: southeast attribute of the piece
+        Computes the Zobrist hash from scratch, by XORing together the keys of every cell that is not blank.
         """
-        return self._SE
+        self._hash = 0
+        for cell in range(BOARD_CELLS):
+            self._hash ^= zobrist_key(self._cells[cell], cell)
 
-    def get_piece_W(self):
+    def footprint_hash(self, location):
         """
-        :return: west attribute of the piece
+        :param location: list of two integers indicating location on the board
+        :return: the XOR of the Zobrist keys of the cells of the footprint centered at location
         """
-        return self._W
+        footprint_hash = 0
+        for cell in FOOTPRINTS[location[0] * STRIDE + location[1]]:
+            footprint_hash ^= zobrist_key(self._cells[cell], cell)
+        return footprint_hash
 
-    def get_piece_E(self):
+    def toggle_hash(self, location):
         """
-        :return: east attribute of the piece
+        XORs the keys of the footprint centered at location into the hash. Called once before the footprint is
+        written, to take the old cells out, and once after, to put the new cells in.
+        Does nothing if the hash is not computed yet.
+        :param location: list of two integers indicating location on the board
+        """
+        if self._hash is not None:
+            self._hash ^= self.footprint_hash(location)
+
+    def save_footprint(self, location):
+        """
+        Copies the nine cells of the footprint centered at location, in FOOTPRINT_OFFSETS order, so they can be put
+        back later or added somewhere else with add_piece.
+        :param location: list of two integers indicating location on the board
+        :return: a tuple of the nine cells
+        """
+        return FOOTPRINT_GETTERS[location[0] * STRIDE + location[1]](self._cells)
+
+    def restore_footprint(self, location, cells):
+        """
+        Writes back the cells of a footprint copied by save_footprint, including any that are off the board.
+        :param location: list of two integers indicating location on the board
+        :param cells: a tuple made by save_footprint at the same location
+        """
+        self.toggle_hash(location)
+        board_cells = self._cells
+        occupancy = self._occupancy
+        index = 0
+        for cell in FOOTPRINTS[location[0] * STRIDE + location[1]]:
+            if occupancy is not None and (board_cells[cell] == ' ') != (cells[index] == ' '):
+                change = 1 if board_cells[cell] == ' ' else -1
+                for center in COVERING[cell]:
+                    occupancy[center] += change
+            board_cells[cell] = cells[index]
+            index += 1
+
+        self.toggle_hash(location)
+        self.update_rings_around(location)
+        self.update_features(location)
+
+    def remove_piece(self, location):
+        """
+        Removes a piece centered at the coordinates specified by the input parameter.
+        The center and all surrounding "squares" are filled with a string of one space, which indicates no stone.
+        :param location: list of two integers indicating location on the board
+        """
+        self.toggle_hash(location)
+        cells = self._cells
+        occupancy = self._occupancy
+        for cell in FOOTPRINTS[location[0] * STRIDE + location[1]]:
+            if occupancy is not None and cells[cell] != ' ':
+                for center in COVERING[cell]:
+                    occupancy[center] -= 1
+            cells[cell] = ' '
+
+        self.toggle_hash(location)
+        self.update_rings_around(location)
+        self.update_features(location)
+
+    def add_piece(self, piece, location):
+        """
+        Adds a piece copied by save_footprint to the board, overwriting whatever is there.
+        The piece is only added if its center is on the board - b to s horizontally and 2 to 19 vertically.
+        Cells of the piece are not added if they are off the board,
+        but the portion of the piece that is on the board is added.
+        :param piece: a tuple made by save_footprint
+        :param location: list of two integers indicating location on the board
+        """
+        placements = PLACEMENTS[location[0] * STRIDE + location[1]]
+
+        # if the center of the piece is being added to a valid spot on the board...
+        if placements:
+            self.toggle_hash(location)
+            cells = self._cells
+            occupancy = self._occupancy
+            for cell, index in placements:
+                if occupancy is not None and (cells[cell] == ' ') != (piece[index] == ' '):
+                    change = 1 if cells[cell] == ' ' else -1
+                    for center in COVERING[cell]:
+                        occupancy[center] += change
+                cells[cell] = piece[index]
+
+            self.toggle_hash(location)
+            self.update_rings_around(location)
+            self.update_features(location)
+
+
+# the nine cells of a footprint, with its NW corner at bit 0 and its center at bit STRIDE + 1
+FOOTPRINT_MASK = sum(1 << (row * STRIDE + column) for row in range(3) for column in range(3))
+CENTER_MASK = 1 << (STRIDE + 1)
+PERIMETER_MASK = FOOTPRINT_MASK ^ CENTER_MASK
+
+# the starting layout as bitboards of black stones, white stones and every other non-blank cell
+NEW_GAME_BLACK = sum(1 << cell for cell in range(BOARD_CELLS) if NEW_GAME_CELLS[cell] == "B")
+NEW_GAME_WHITE = sum(1 << cell for cell in range(BOARD_CELLS) if NEW_GAME_CELLS[cell] == "W")
+NEW_GAME_OTHER = sum(1 << cell for cell in range(BOARD_CELLS) if NEW_GAME_CELLS[cell] not in (" ", "B", "W"))
+
+# cells that add_piece is allowed to write to - columns b to s and rows 2 to 19
+PLAY_AREA_MASK = sum(1 << (row * STRIDE + column) for row in range(2, 20) for column in range(2, 20))
+
+# every footprint center that make_move accepts, and each of the RAYS as a mask
+CENTERS_MASK = sum(1 << center for center in CENTERS)
+RAY_MASKS = [None if rays is None else tuple(sum(1 << center for center in ray) for ray in rays) for rays in RAYS]
+
+# Zobrist keys: one random 64-bit key per cell for each of the three kinds of non-blank cell (black stone,
+# white stone, other), indexed by bit number as in the BitBoard layout, plus one key for white to move.
+# The generator is seeded so that hashes are the same from one run to the next and can be stored.
+_zobrist_random = random.Random(20200527)
+ZOBRIST_KEYS = {kind: [_zobrist_random.getrandbits(64) for bit in range(BOARD_CELLS)] for kind in ("B", "W", "other")}
+ZOBRIST_WHITE_TO_MOVE = _zobrist_random.getrandbits(64)
+
+
+def zobrist_key(cell, index):
+    """
+    :param cell: contents of a cell of the Board class
+    :param index: index of the cell in the flat layout
+    :return: the Zobrist key of the cell, or 0 for a blank cell
+    """
+    if cell == " ":
+        return 0
+    if cell == "B" or cell == "W":
+        return ZOBRIST_KEYS[cell][index]
+    return ZOBRIST_KEYS["other"][index]
+
+
+class BitBoard(Board):
+    """
+    The BitBoard class is a drop-in replacement for the Board class that stores the board as three integers used as
+    bitboards: one for black stones, one for white stones, and one for every other non-blank cell (the row and column
+    labels and the padding strings of the original layout).
+    Footprint queries and piece moves are done with a handful of mask operations instead of indexing into a list of
+    lists. The BitBoard class hands out BitPiece objects, and only accepts BitPiece objects back in add_piece.
+    The occupancy map of a BitBoard is a bitboard of the centers whose footprint is empty. Growing the occupied cells
+    by one cell in every direction takes four shifts, so the map is simply dropped whenever a footprint is written,
+    and worked out again the next time it is needed.
+    """
+
+    def __init__(self):
+        """
+        Initializes the bitboards of the BitBoard class from the starting layout of the Board class.
+        The flat list of cells is kept only to label the rows and columns when the board is printed.
+        """
+        super().__init__()
+        self._black = NEW_GAME_BLACK
+        self._white = NEW_GAME_WHITE
+        self._other = NEW_GAME_OTHER
+
+    def clone(self):
+        """
+        Copies the board. The three bitboards are integers, so nothing is copied but the ring index and the
+        references; the flat list of cells is never written to, so the copy shares it. The feature tracker is rebuilt
+        the next time it is needed.
+        :return: a new BitBoard object in the same position
+        """
+        board = BitBoard.__new__(BitBoard)
+        board._cells = self._cells
+        board._black = self._black
+        board._white = self._white
+        board._other = self._other
+        board._rings = None if self._rings is None else {"B": set(self._rings["B"]), "W": set(self._rings["W"])}
+        board._hash = self._hash
+        board._occupancy = self._occupancy
+        board._features = None
+        return board
+
+    def reset(self):
+        """
+        Puts the board back to the starting layout. The ring index, the hash, the occupancy map and the feature
+        tracker are rebuilt the next time they are needed.
+        """
+        self._black = NEW_GAME_BLACK
+        self._white = NEW_GAME_WHITE
+        self._other = NEW_GAME_OTHER
+        self._rings = None
+        self._hash = None
+        self._occupancy = None
+        self._features = None
+
+    def get_game_board(self):
+        """
+        Builds a list of lists in the same layout as the Board class, for printing and comparison purposes.
+        Non-blank cells that are not stones are shown with their original label, or with two spaces.
+        :return: the board as a list of lists
+        """
+        game_board = []
+        for row in range(21):
+            game_board.append([])
+            for column in range(21):
+                cell = row * STRIDE + column
+                if (self._black >> cell) & 1:
+                    game_board[row].append("B")
+                elif (self._white >> cell) & 1:
+                    game_board[row].append("W")
+                elif not (self._other >> cell) & 1:
+                    game_board[row].append(" ")
+                elif self._cells[cell] not in (" ", "B", "W"):
+                    game_board[row].append(self._cells[cell])
+                else:
+                    game_board[row].append("  ")
+        return game_board
+
+    def stones(self, color):
+        """
+        :param color: "B" or "W"
+        :return: the bitboard of the stones of that color
+        """
+        if color == "B":
+            return self._black
+        return self._white
+
+    def get_cells(self):
+        """
+        :return: a list of the cells of columns b to s and rows 2 to 19, row by row from row 19 down to row 2 -
+                 "B", "W", " ", or "  " for a non-blank cell that is not a stone
+        """
+        cells = []
+        for row in range(2, 20):
+            for column in range(2, 20):
+                bit = 1 << (row * STRIDE + column)
+                if self._black & bit:
+                    cells.append("B")
+                elif self._white & bit:
+                    cells.append("W")
+                elif self._other & bit:
+                    cells.append("  ")
+                else:
+                    cells.append(" ")
+        return cells
+
+    def load_cells(self, cells):
+        """
+        Overwrites the cells of columns b to s and rows 2 to 19, for example from a snapshot. The ring index, the
+        hash, the occupancy map and the feature tracker are rebuilt the next time they are needed.
+        :param cells: a list in the order of get_cells
+        """
+        self._black &= ~PLAY_AREA_MASK
+        self._white &= ~PLAY_AREA_MASK
+        self._other &= ~PLAY_AREA_MASK
+        for index in range(len(cells)):
+            bit = 1 << ((2 + index // 18) * STRIDE + 2 + index % 18)
+            if cells[index] == "B":
+                self._black |= bit
+            elif cells[index] == "W":
+                self._white |= bit
+            elif cells[index] != " ":
+                self._other |= bit
+        self._rings = None
+        self._hash = None
+        self._occupancy = None
+        self._features = None
+
+    def get_edge_mask(self):
+        """
+        :return: an integer with bit i set if the cell EDGE_CELLS[i] is not blank
+        """
+        mask = 0
+        for index in range(len(EDGE_CELLS)):
+            if (self._other >> (EDGE_CELLS[index][0] * STRIDE + EDGE_CELLS[index][1])) & 1:
+                mask |= 1 << index
+        return mask
+
+    def load_edge_mask(self, mask):
+        """
+        Sets which edge cells are not blank. The hash and the occupancy map are rebuilt the next time they are
+        needed.
+        :param mask: an integer in the form made by get_edge_mask
+        """
+        for index in range(len(EDGE_CELLS)):
+            bit = 1 << (EDGE_CELLS[index][0] * STRIDE + EDGE_CELLS[index][1])
+            if (mask >> index) & 1:
+                self._other |= bit
+            else:
+                self._other &= ~bit
+        self._hash = None
+        self._occupancy = None
+
+    def count_stones(self, color):
+        """
+        :param color: "B" or "W"
+        :return: the number of stones of that color on the board - columns b to s and rows 2 to 19
+        """
+        return bin(self.stones(color) & PLAY_AREA_MASK).count("1")
+
+    def get_piece(self, location):
+        """
+        :param location: list of two integers indicating location on the board
+        :return: a BitPiece object copied from the board, centered at location
+        """
+        shift = location[0] * STRIDE + location[1] - STRIDE - 1
+        return BitPiece((self._black >> shift) & FOOTPRINT_MASK,
+                        (self._white >> shift) & FOOTPRINT_MASK,
+                        (self._other >> shift) & FOOTPRINT_MASK)
+
+    def classify(self, location):
+        """
+        :param location: list of two integers indicating location on the board
+        :return: the classification of the piece centered at location (see classify_footprint), looked up in
+                 FOOTPRINT_CACHE by the footprint bits of each bitboard
+        """
+        shift = location[0] * STRIDE + location[1] - STRIDE - 1
+        pattern = ((self._black >> shift) & FOOTPRINT_MASK, (self._white >> shift) & FOOTPRINT_MASK,
+                   (self._other >> shift) & FOOTPRINT_MASK)
+        classification = FOOTPRINT_CACHE.get(pattern)
+        if classification is None:
+            piece = BitPiece(*pattern)
+            classification = FOOTPRINT_CACHE.put(pattern, classify_footprint(
+                [piece.cell(row_step, column_step) for row_step, column_step in FOOTPRINT_STEPS]))
+        return classification
+
+    def valid_piece(self, location, up_next):
+        """
+        :param location: list of two integers indicating location on the board
+        :param up_next: color of the player who is not currently authorized to make a move
+        :return: True if the piece centered at location has no stones of the opponent; False otherwise
+        """
+        shift = location[0] * STRIDE + location[1] - STRIDE - 1
+        return not (self.stones(up_next) >> shift) & FOOTPRINT_MASK
+
+    def is_empty(self, location):
+        """
+        :param location: list of two integers indicating location on the board
+        :return: True if the piece centered at location has no stones; False otherwise
+        """
+        shift = location[0] * STRIDE + location[1] - STRIDE - 1
+        return not ((self._black | self._white | self._other) >> shift) & FOOTPRINT_MASK
+
+    def is_empty_without(self, location, removed):
+        """
+        :param location: list of two integers indicating location on the board
+        :param removed: list of two integers indicating the center of the piece to leave out
+        :return: True if the piece centered at location has no stones outside the removed footprint; False otherwise
+        """
+        occupied = (self._black | self._white | self._other) & \
+            ~(FOOTPRINT_MASK << (removed[0] * STRIDE + removed[1] - STRIDE - 1))
+        return not (occupied >> (location[0] * STRIDE + location[1] - STRIDE - 1)) & FOOTPRINT_MASK
+
+    def slide_length(self, location, direction, limit):
+        """
+        :param location: list of two integers indicating location on the board
+        :param direction: index of a direction in DIRECTIONS
+        :param limit: the most steps to look at
+        :return: the number of empty footprints, up to limit, met one after another when sliding from location along
+                 the direction - not counting the footprint at location
+        """
+        if self._occupancy is None:
+            self.find_occupancy()
+        center = location[0] * STRIDE + location[1]
+        blocked = RAY_MASKS[center][direction] & ~self._occupancy
+        if not blocked:
+            return min(limit, len(RAYS[center][direction]))
+
+        # the nearest blocked center is the lowest bit of the ray when sliding toward higher bits, else the highest
+        step = DIRECTIONS[direction][0] * STRIDE + DIRECTIONS[direction][1]
+        if step > 0:
+            nearest = (blocked & -blocked).bit_length() - 1
+        else:
+            nearest = blocked.bit_length() - 1
+        return min(limit, (nearest - center) // step - 1)
+
+    def find_occupancy(self):
+        """
+        Works out the occupancy map: a center is empty unless an occupied cell is within one cell of it.
+        """
+        occupied = self._black | self._white | self._other
+        occupied |= (occupied << 1) | (occupied >> 1)
+        occupied |= (occupied << STRIDE) | (occupied >> STRIDE)
+        self._occupancy = CENTERS_MASK & ~occupied
+
+    def is_ring(self, location, color):
+        """
+        :param location: list of two integers indicating location on the board
+        :param color: color of the stones of the piece that might be a ring
+        :return: True if the piece centered at location is a ring; False otherwise
+        """
+        shift = location[0] * STRIDE + location[1] - STRIDE - 1
+        if ((self._black | self._white | self._other) >> shift) & CENTER_MASK:
+            return False
+        return (self.stones(color) >> shift) & PERIMETER_MASK == PERIMETER_MASK
+
+    def find_hash(self):
+        """
+        Computes the Zobrist hash from scratch, by XORing together the keys of every bit that is set.
+        """
+        self._hash = 0
+        for bit in range(BOARD_CELLS):
+            self._hash ^= self.bit_hash(bit)
+
+    def bit_hash(self, bit):
+        """
+        :param bit: bit number of a cell
+        :return: the Zobrist key of the cell, or 0 for a blank cell
+        """
+        if (self._black >> bit) & 1:
+            return ZOBRIST_KEYS["B"][bit]
+        if (self._white >> bit) & 1:
+            return ZOBRIST_KEYS["W"][bit]
+        if (self._other >> bit) & 1:
+            return ZOBRIST_KEYS["other"][bit]
+        return 0
+
+    def footprint_hash(self, location):
+        """
+        :param location: list of two integers indicating location on the board
+        :return: the XOR of the Zobrist keys of the cells of the footprint centered at location
+        """
+        corner = location[0] * STRIDE + location[1] - STRIDE - 1
+        return (self.bit_hash(corner) ^ self.bit_hash(corner + 1) ^ self.bit_hash(corner + 2) ^
+                self.bit_hash(corner + STRIDE) ^ self.bit_hash(corner + STRIDE + 1) ^
+                self.bit_hash(corner + STRIDE + 2) ^ self.bit_hash(corner + 2 * STRIDE) ^
+                self.bit_hash(corner + 2 * STRIDE + 1) ^ self.bit_hash(corner + 2 * STRIDE + 2))
+
+    def save_footprint(self, location):
+        """
+        :param location: list of two integers indicating location on the board
+        :return: a BitPiece object holding the nine cells of the footprint centered at location
+        """
+        return self.get_piece(location)
+
+    def restore_footprint(self, location, cells):
+        """
+        Writes back the cells of a footprint copied by save_footprint, including any that are off the board.
+        :param location: list of two integers indicating location on the board
+        :param cells: a BitPiece object made by save_footprint at the same location
+        """
+        self.toggle_hash(location)
+        shift = location[0] * STRIDE + location[1] - STRIDE - 1
+        keep = ~(FOOTPRINT_MASK << shift)
+        self._black = (self._black & keep) | (cells.get_black() << shift)
+        self._white = (self._white & keep) | (cells.get_white() << shift)
+        self._other = (self._other & keep) | (cells.get_other() << shift)
+        self._occupancy = None
+
+        self.toggle_hash(location)
+        self.update_rings_around(location)
+        self.update_features(location)
+
+    def remove_piece(self, location):
+        """
+        Removes a piece centered at the coordinates specified by the input parameter.
+        :param location: list of two integers indicating location on the board
+        """
+        self.toggle_hash(location)
+        keep = ~(FOOTPRINT_MASK << (location[0] * STRIDE + location[1] - STRIDE - 1))
+        self._black &= keep
+        self._white &= keep
+        self._other &= keep
+        self._occupancy = None
+
+        self.toggle_hash(location)
+        self.update_rings_around(location)
+        self.update_features(location)
+
+    def add_piece(self, piece, location):
+        """
+        Adds the stones of a BitPiece object to the board, overwriting whatever is there.
+        As with the Board class, the piece is only added if its center is on the board - b to s horizontally and
+        2 to 19 vertically - and only the portion of the perimeter that is on the board is added.
+        :param piece: a BitPiece object
+        :param location: list of two integers indicating location on the board
+        """
+        if location[0] in range(2, 20) and location[1] in range(2, 20):
+            self.toggle_hash(location)
+            shift = location[0] * STRIDE + location[1] - STRIDE - 1
+            write = (FOOTPRINT_MASK << shift) & PLAY_AREA_MASK
+            self._black = (self._black & ~write) | ((piece.get_black() << shift) & write)
+            self._white = (self._white & ~write) | ((piece.get_white() << shift) & write)
+            self._other = (self._other & ~write) | ((piece.get_other() << shift) & write)
+            self._occupancy = None
+
+            self.toggle_hash(location)
+            self.update_rings_around(location)
+            self.update_features(location)
+
+
+# name of each board backend, and the class that implements it
+BOARD_BACKENDS = {"list": Board, "bitboard": BitBoard}
+
+
+class LRUCache:
+    """
+    The LRUCache class is a dictionary with a bounded number of entries: once it is full, adding an entry drops the
+    one that was used least recently. It counts hits and misses for the hit rate. None cannot be stored, since get
+    returns None for a miss.
+    The caches are shared by every game, and games are played on several threads at once (GamePool, the server), so
+    each lookup and update holds a lock. The entries are a plain dict, which keeps its keys in insertion order: a
+    hit takes its entry out and puts it back at the end, and the first key is the least recently used.
+    """
+    def __init__(self, capacity):
+        """
+        Initializes the data members of an LRUCache object.
+        capacity - the most entries kept
+        entries - the entries, from least to most recently used
+        hits, misses, evictions - statistics for the hit rate
+        lock - held while the entries or the statistics are read or changed
+
+        :param capacity: the most entries kept
+        """
+        if capacity < 1:
+            raise ValueError("cache capacity must be at least 1: " + str(capacity))
+
+        self._capacity = capacity
+        self._entries = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+        :return: the number of entries in the cache
+        """
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        :param key: a hashable key
+        :return: the value stored under the key, which becomes the most recently used, or None if there is none
+        """
+        with self._lock:
+            entries = self._entries
+            value = entries.pop(key, None)
+            if value is None:
+                self._misses += 1
+                return None
+            entries[key] = value  # put back at the end, as the most recently used
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores a value, dropping the least recently used entry if the cache is full.
+        :param key: a hashable key
+        :param value: the value to store (not None)
+        :return: the value
+        """
+        with self._lock:
+            entries = self._entries
+            entries.pop(key, None)
+            entries[key] = value
+            if len(entries) > self._capacity:
+                del entries[next(iter(entries))]
+                self._evictions += 1
+            return value
+
+    def clear(self):
+        """
+        Drops every entry and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def get_capacity(self):
+        """
+        :return: the most entries kept
+        """
+        return self._capacity
+
+    def get_hit_rate(self):
+        """
+        :return: the fraction of lookups that found their key, or 0.0 before the first lookup
+        """
+        hits, misses = self._hits, self._misses
+        if hits + misses == 0:
+            return 0.0
+        return hits / (hits + misses)
+
+    def get_stats(self):
+        """
+        :return: a dictionary of the hits, misses and evictions, the hit rate, and the size and capacity
+        """
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions,
+                    "hit_rate": self.get_hit_rate(), "size": len(self._entries), "capacity": self._capacity}
+
+
+def classify_footprint(cells):
+    """
+    Works out everything the rules ask about one footprint. The answer only depends on the nine cells, so it is kept
+    in FOOTPRINT_CACHE by their pattern.
+    :param cells: the nine cells of a footprint, in FOOTPRINT_OFFSETS order
+    :return: a (center, empty, ring, directions) tuple - the color of the center stone, or None if it has none;
+             True if the footprint has no stones or other non-blank cells; the color whose ring it is, or None; and
+             for each color, a bitmask of the directions of DIRECTIONS that have a stone of that color (bit i for
+             direction i)
+    """
+    center = cells[4] if cells[4] in ("B", "W") else None
+    empty = all(cell == " " for cell in cells)
+    ring = None
+    if cells[4] == " ":
+        for color in ("B", "W"):
+            if all(cells[index] == color for index in range(9) if index != 4):
+                ring = color
+    directions = {color: sum(1 << index for index, cell in enumerate(DIRECTION_CELLS) if cells[cell] == color)
+                  for color in ("B", "W")}
+    return center, empty, ring, directions
+
+
+# Bounded caches shared by every game: the classification of footprints by the pattern of their cells - a few
+# thousand patterns come up over and over, like the starting rings - and the answers of GessGame.is_legal by
+# position hash and move. A footprint pattern always has the same classification, so neither cache ever has to be
+# emptied when a board changes; is_legal relies on the 64-bit position hash, as a transposition table does.
+FOOTPRINT_CACHE = LRUCache(8192)
+LEGALITY_CACHE = LRUCache(65536)
+
+
+def cache_stats():
+    """
+    :return: a dictionary of the statistics (see LRUCache.get_stats) of FOOTPRINT_CACHE and LEGALITY_CACHE
+    """
+    return {"footprints": FOOTPRINT_CACHE.get_stats(), "legality": LEGALITY_CACHE.get_stats()}
+
+# edge cells that are not blank in a new game - the labels and the padding of column a
+NEW_GAME_EDGE_MASK = Board().get_edge_mask()
+
+
+# Evaluation features kept by FeatureTracker, in the order of its array of values. They are cheap stand-ins for
+# mobility and threats, not counts of legal moves (see count_legal_moves for those): a directed piece is one with no
+# stones of the opponent and a stone of its own in some direction, and its short reach is the first three centers
+# along each such direction - ignoring obstructions, the rule against breaking the mover's own last ring, and slides
+# longer than three. A ring is in reach when a center in the opponent's short reach has a footprint that overlaps it.
+FEATURE_NAMES = ("black_stones", "white_stones", "black_rings", "white_rings", "black_directed_pieces",
+                 "white_directed_pieces", "black_short_reach", "white_short_reach", "black_rings_in_reach",
+                 "white_rings_in_reach")
+
+# centers that legal_rays looks at as the start of a move; for each of them, the cell next to the center in each
+# direction paired with the first three centers of the ray in that direction; and for every ring center the centers
+# whose footprint overlaps the ring's
+START_CENTERS = frozenset(row * STRIDE + column for row in range(1, 20) for column in range(1, 21))
+SHORT_RAYS = [None] * BOARD_CELLS
+for _center in START_CENTERS:
+    SHORT_RAYS[_center] = tuple((_center + DIRECTION_OFFSETS[_index], RAYS[_center][_index][:3]) for _index in range(8))
+RING_WINDOWS = [None] * BOARD_CELLS
+for _row in range(3, 19):
+    for _column in range(3, 19):
+        RING_WINDOWS[_row * STRIDE + _column] = tuple((_row + _row_step) * STRIDE + _column + _column_step
+                                                      for _row_step in range(-2, 3) for _column_step in range(-2, 3))
+
+
+class FeatureTracker:
+    """
+    The FeatureTracker class keeps the evaluation features of FEATURE_NAMES up to date for one board.
+    It keeps its own copy of where the stones are, the short reach of every piece, and for each color a reach map
+    counting the pieces whose short reach takes in each center. When a footprint is written, only the cells of that
+    footprint are compared with the copy, and only the pieces whose footprint covers a cell that changed (see
+    COVERING) are looked at again, so keeping the features costs a few dozen lookups per write, and reading them
+    costs nothing. Ring counts come from the ring index of the board.
+    A board only builds its tracker when get_features is first called; SearchEngine does not call it, since the
+    upkeep on every push_move and pop_move costs the search more than its evaluation would save.
+    """
+    def __init__(self, board):
+        """
+        Initializes the data members of a FeatureTracker object from a full scan of a board.
+        colors - "B", "W" or None for every cell in the flat layout
+        reach - for each color, the short reach of the piece at each center, as a tuple of centers
+        reach_counts - for each color, the number of pieces whose short reach takes in each center
+        values - the features, in the order of FEATURE_NAMES
+
+        :param board: a Board or BitBoard object
+        """
+        self._colors = [None] * BOARD_CELLS
+        for cell, contents in zip(PLAY_AREA_CELLS, board.get_cells()):
+            if contents == "B" or contents == "W":
+                self._colors[cell] = contents
+        self._reach = {"B": [()] * BOARD_CELLS, "W": [()] * BOARD_CELLS}
+        self._reach_counts = {"B": [0] * BOARD_CELLS, "W": [0] * BOARD_CELLS}
+        self._values = array("i", [0] * len(FEATURE_NAMES))
+        self._values[0] = self._colors.count("B")
+        self._values[1] = self._colors.count("W")
+        for center in START_CENTERS:
+            self.update_center(center)
+        self.update_rings(board)
+
+    def get_values(self):
+        """
+        :return: the array of features, in the order of FEATURE_NAMES - kept up to date, so it must not be changed
+        """
+        return self._values
+
+    def get_feature(self, name):
+        """
+        :param name: a name from FEATURE_NAMES
+        :return: the value of that feature
+        """
+        return self._values[FEATURE_NAMES.index(name)]
+
+    def get_reach(self, center):
+        """
+        :param center: list of two integers indicating location on the board
+        :return: a (black, white) tuple of the number of pieces of each color whose short reach takes in the center
+        """
+        cell = center[0] * STRIDE + center[1]
+        return self._reach_counts["B"][cell], self._reach_counts["W"][cell]
+
+    def get_ring_reach(self, board, color):
+        """
+        :param board: the board of the tracker
+        :param color: "B" or "W"
+        :return: a dictionary of the number of times the opponent's short reach takes in a center whose footprint
+                 overlaps each ring of that color, by ring center
+        """
+        reach_counts = self._reach_counts["W" if color == "B" else "B"]
+        return {ring: sum(reach_counts[center] for center in RING_WINDOWS[ring[0] * STRIDE + ring[1]])
+                for ring in board.get_rings(color)}
+
+    def update(self, board, location):
+        """
+        Brings the features up to date after the footprint centered at location was written.
+        :param board: the board of the tracker
+        :param location: list of two integers indicating location on the board
+        """
+        colors = self._colors
+        values = self._values
+        piece = board.get_piece(location)
+        changed = set()
+        for (row_step, column_step), cell in zip(FOOTPRINT_STEPS, FOOTPRINTS[location[0] * STRIDE + location[1]]):
+            contents = piece.cell(row_step, column_step)
+            if contents != "B" and contents != "W":
+                contents = None
+            if contents != colors[cell]:
+                if colors[cell] is not None:
+                    values[colors[cell] == "W"] -= 1
+                if contents is not None:
+                    values[contents == "W"] += 1
+                colors[cell] = contents
+                changed.update(COVERING[cell])
+
+        for center in changed & START_CENTERS:
+            self.update_center(center)
+        self.update_rings(board)
+
+    def update_center(self, center):
+        """
+        Works out the short reach of the piece at a center again for both colors, and moves its counts in the
+        features and the reach maps from the old reach to the new.
+        :param center: index of a center in START_CENTERS
+        """
+        colors = self._colors
+        footprint = [colors[cell] for cell in FOOTPRINTS[center]]
+        for color, feature in (("B", 4), ("W", 5)):
+            reach = ()
+            if ("W" if color == "B" else "B") not in footprint:
+                for cell, ray in SHORT_RAYS[center]:
+                    if colors[cell] == color:
+                        reach += ray
+
+            old_reach = self._reach[color][center]
+            if reach == old_reach:
+                continue
+            reach_counts = self._reach_counts[color]
+            for end in old_reach:
+                reach_counts[end] -= 1
+            for end in reach:
+                reach_counts[end] += 1
+            self._values[feature] += (len(reach) > 0) - (len(old_reach) > 0)
+            self._values[feature + 2] += len(reach) - len(old_reach)
+            self._reach[color][center] = reach
+
+    def update_rings(self, board):
+        """
+        Counts the rings of each color, and the rings of each color in the opponent's short reach, from the ring
+        index of the board and the reach maps.
+        :param board: the board of the tracker
+        """
+        for color, other, feature in (("B", "W", 2), ("W", "B", 3)):
+            rings = board.get_rings(color)
+            reach_counts = self._reach_counts[other]
+            self._values[feature] = len(rings)
+            self._values[feature + 6] = sum(1 for ring in rings
+                                            if any(reach_counts[center] for center in RING_WINDOWS[ring[0] * STRIDE +
+                                                                                                   ring[1]]))
+
+
+class Piece:
+    """
+    The Piece class looks at where stones are in a GessGame board-piece.
+    Piece class methods look at the cells of the Piece to return relevant information such as if the Piece is a ring
+    or empty.
+    Communication with the Board class is required to make a Piece object;
+    a Piece object is a view of a section of board from a Board object, not a copy, so it only has two slots and
+    reads the cells of the board when asked. Use Board.save_footprint to copy a footprint.
+    """
+    __slots__ = ("_cells", "_center")
+
+    def __init__(self, location, cells):
+        """
+        Points the Piece at the footprint centered at location.
+        :param location: list of two integers indicating location on the board
+        :param cells: the flat list of cells of a Board object
+        """
+        self._cells = cells
+        self._center = location[0] * STRIDE + location[1]
+
+    def cell(self, row, column):
+        """
+        :param row: -1, 0 or 1, relative to the center of the piece
+        :param column: -1, 0 or 1, relative to the center of the piece
+        :return: the attribute of the piece at that offset from the center
+        """
+        return self._cells[self._center + row * STRIDE + column]
+
+    def perimeter(self):
+        """
+        The perimeter method is used by the is_ring method to check if a piece is a ring.
+        :return: a list with all attributes of the Piece except the center attribute
+        """
+        return [self._cells[cell] for cell in PERIMETERS[self._center]]
+
+    def is_ring(self, color):
+        """
+        Checks whether a piece is a ring.
+        A ring is a piece with a perimeter of all the same stone, but no center stone.
+        :param color: color of the stones of the piece that might be a ring
+        :return: True if piece is a ring; False if piece is not a ring
+        """
+        if self._cells[self._center] != " ":  # can only be a ring if center has no stone
+            return False
+        for cell in PERIMETERS[self._center]:
+            if self._cells[cell] != color:
+                return False
+        return True
+
+    def valid_piece(self, up_next):
+        """
+        Confirms that a piece does not have stones of the other player.
+        :param up_next: color of the player who is not currently authorized to make a move
+        :return: True if piece has no stones of the opponent; False otherwise
+        """
+        for cell in FOOTPRINTS[self._center]:
+            if self._cells[cell] == up_next:
+                return False
+        return True
+
+    def is_empty(self):
+        """
+        :return: True if a piece has no stones; False if a piece has a stone
+        """
+        for cell in FOOTPRINTS[self._center]:
+            if self._cells[cell] != ' ':  # no stone in the space
+                return False
+        return True
+
+    def get_piece_center(self):
+        """
+        :return: center attribute of the piece
+        """
+        return self.cell(0, 0)
+
+    def get_piece_N(self):
+        """
+        :return: north attribute of the piece
+        """
+        return self.cell(-1, 0)
+
+    def get_piece_NW(self):
+        """
+        :return: northwest attribute of the piece
+        """
+        return self.cell(-1, -1)
+
+    def get_piece_NE(self):
+        """
+        :return: northeast attribute of the piece
+        """
+        return self.cell(-1, 1)
+
+    def get_piece_S(self):
+        """
+        :return: south attribute of the piece
+        """
+        return self.cell(1, 0)
+
+    def get_piece_SW(self):
+        """
+        :return: southwest attribute of the piece
+        """
+        return self.cell(1, -1)
+
+    def get_piece_SE(self):
+        """
+        :return: southeast attribute of the piece
+        """
+        return self.cell(1, 1)
+
+    def get_piece_W(self):
+        """
+        :return: west attribute of the piece
+        """
+        return self.cell(0, -1)
+
+    def get_piece_E(self):
+        """
+        :return: east attribute of the piece
+        """
+        return self.cell(0, 1)
+
+
+class BitPiece:
+    """
+    The BitPiece class is the BitBoard counterpart of the Piece class.
+    A BitPiece object stores the nine cells of a footprint as three small bitboards (black, white and other),
+    with the NW corner of the footprint at bit 0, so it can be shifted into place anywhere on a BitBoard.
+    """
+    __slots__ = ("_black", "_white", "_other")
+
+    def __init__(self, black, white, other):
+        """
+        :param black: footprint bits holding black stones
+        :param white: footprint bits holding white stones
+        :param other: footprint bits holding non-blank cells that are not stones
+        """
+        self._black = black
+        self._white = white
+        self._other = other
+
+    def get_black(self):
+        """
+        :return: footprint bits holding black stones
+        """
+        return self._black
+
+    def get_white(self):
+        """
+        :return: footprint bits holding white stones
+        """
+        return self._white
+
+    def get_other(self):
+        """
+        :return: footprint bits holding non-blank cells that are not stones
+        """
+        return self._other
+
+    def cell(self, row, column):
+        """
+        :param row: -1, 0 or 1, relative to the center of the piece
+        :param column: -1, 0 or 1, relative to the center of the piece
+        :return: "B", "W", " " (no stone), or "  " for a non-blank cell that is not a stone
+        """
+        bit = 1 << ((row + 1) * STRIDE + column + 1)
+        if self._black & bit:
+            return "B"
+        if self._white & bit:
+            return "W"
+        if self._other & bit:
+            return "  "
+        return " "
+
+    def is_ring(self, color):
+        """
+        :param color: color of the stones of the piece that might be a ring
+        :return: True if piece is a ring; False if piece is not a ring
+        """
+        if (self._black | self._white | self._other) & CENTER_MASK:
+            return False
+        if color == "B":
+            return self._black & PERIMETER_MASK == PERIMETER_MASK
+        return self._white & PERIMETER_MASK == PERIMETER_MASK
+
+    def valid_piece(self, up_next):
+        """
+        :param up_next: color of the player who is not currently authorized to make a move
+        :return: True if piece has no stones of the opponent; False otherwise
+        """
+        if up_next == "B":
+            return not self._black
+        return not self._white
+
+    def is_empty(self):
+        """
+        :return: True if a piece has no stones; False if a piece has a stone
+        """
+        return not (self._black | self._white | self._other)
+
+    def get_piece_center(self):
+        """
+        :return: center attribute of the piece
+        """
+        return self.cell(0, 0)
+
+    def get_piece_N(self):
+        """
+        :return: north attribute of the piece
+        """
+        return self.cell(-1, 0)
+
+    def get_piece_NW(self):
+        """
+        :return: northwest attribute of the piece
+        """
+        return self.cell(-1, -1)
+
+    def get_piece_NE(self):
+        """
+        :return: northeast attribute of the piece
+        """
+        return self.cell(-1, 1)
+
+    def get_piece_S(self):
+        """
+        :return: south attribute of the piece
+        """
+        return self.cell(1, 0)
+
+    def get_piece_SW(self):
+        """
+        :return: southwest attribute of the piece
+        """
+        return self.cell(1, -1)
+
+    def get_piece_SE(self):
+        """
+        :return: southeast attribute of the piece
+        """
+        return self.cell(1, 1)
+
+    def get_piece_W(self):
+        """
+        :return: west attribute of the piece
+        """
+        return self.cell(0, -1)
+
+    def get_piece_E(self):
+        """
+        :return: east attribute of the piece
+        """
+        return self.cell(0, 1)
+
+
+class Position:
+    """
+    The Position class is an immutable snapshot of a game: the board, whose turn it is, and the game state.
+    It answers whether a move is legal, and makes the position a move leads to, without changing anything - so one
+    Position can be shared by any number of threads with no locks and no copies.
+
+    The board is a tuple of 21 rows, each a tuple of STRIDE cells laid out as in the Board class. A move only
+    touches the rows of the footprints at its start and end, so apply copies at most six rows and shares the rest with
+    the position it came from.
+    The ring index is a dictionary of each player's ring centers (frozensets of tuples of two integers). It is worked
+    out the first time it is needed, or handed down from the Board or Position the Position was made from.
+
+    is_legal and apply follow the rules of GessGame.make_move exactly, except that a move make_move turns down part of
+    the way through - which can leave stones off the edge of the board blanked - changes nothing here.
+    """
+    __slots__ = ("_rows", "_whose_turn", "_game_state", "_rings")
+
+    def __init__(self, rows, whose_turn="B", game_state="UNFINISHED", rings=None):
+        """
+        :param rows: the board, as a tuple of 21 tuples of STRIDE cells
+        :param whose_turn: "B" or "W", the color of the player whose turn it is
+        :param game_state: who, if anyone, won the game
+        :param rings: the ring index of the board, or None to work it out when it is needed
+        """
+        self._rows = rows
+        self._whose_turn = whose_turn
+        self._game_state = game_state
+        self._rings = rings
+
+    def get_rows(self):
+        """
+        :return: the board, as a tuple of 21 tuples of STRIDE cells, indexed [row][column]
+        """
+        return self._rows
+
+    def get_whose_turn(self):
+        """
+        :return: "B" or "W", the color of the player whose turn it is
+        """
+        return self._whose_turn
+
+    def get_game_state(self):
+        """
+        :return: a string indicating which player has won, or that the game is unfinished
+        """
+        return self._game_state
+
+    def get_rings(self, color):
+        """
+        :param color: "B" or "W"
+        :return: a frozenset of the centers (tuples of two integers) of that player's rings
+        """
+        if self._rings is None:
+            self._rings = {color: self.find_rings(self._rows, color, 3, 18, 3, 18, frozenset()) for color in ("B", "W")}
+        return self._rings[color]
+
+    def is_legal(self, start, end):
+        """
+        :param start: game-board position of the center of the piece to be moved - for example 'm3'
+        :param end: game-board position of the desired new location of the center - for example 'm6'
+        :return: True if make_move would make the move in this position; False otherwise
+        """
+        return self.play([21 - int(start[1:]), ord(start[0]) - 96], [21 - int(end[1:]), ord(end[0]) - 96]) is not None
+
+    def apply(self, start, end):
+        """
+        :param start: game-board position of the center of the piece to be moved - for example 'm3'
+        :param end: game-board position of the desired new location of the center - for example 'm6'
+        :return: a new Position object for the position after the move
+        """
+        position = self.play([21 - int(start[1:]), ord(start[0]) - 96], [21 - int(end[1:]), ord(end[0]) - 96])
+        if position is None:
+            raise ValueError("illegal move: " + start + "-" + end)
+        return position
+
+    def play(self, start, end):
+        """
+        Checks a move step by step in the same order as make_move, and makes the position it leads to.
+        :param start: the starting coordinate of the piece to be moved (list of two integers)
+        :param end: the ending coordinate of the piece to be moved (list of two integers)
+        :return: a new Position object, or None if the move is not legal
+        """
+        rows = self._rows
+        me = self._whose_turn
+        other = "W" if me == "B" else "B"
+        if self._game_state != "UNFINISHED":
+            return None
+        if not (1 <= start[0] <= 19 and 1 <= start[1] <= 20 and 1 <= end[0] <= 19 and 1 <= end[1] <= 20):
+            return None
+
+        # the piece cannot have stones of the opponent
+        row, column = start
+        footprint = (rows[row - 1][column - 1:column + 2], rows[row][column - 1:column + 2],
+                     rows[row + 1][column - 1:column + 2])
+        if other in footprint[0] or other in footprint[1] or other in footprint[2]:
+            return None
+
+        # the direction rule of valid_direction: straight or truly diagonal, toward a stone of the mover
+        row_change = end[0] - row
+        column_change = end[1] - column
+        if row_change != 0 and column_change != 0 and abs(row_change) != abs(column_change):
+            return None
+        row_step = (row_change > 0) - (row_change < 0)
+        column_step = (column_change > 0) - (column_change < 0)
+        if (row_step == 0 and column_step == 0) or footprint[1 + row_step][1 + column_step] != me:
+            return None
+
+        # the distance rule of distance_in_range, with its unbounded moves west for a piece without a center stone
+        if footprint[1][1] != me and (abs(row_change) > 3 or column_change > 3):
+            return None
+
+        # every footprint on the path has to be empty once the piece is taken off the board
+        distance = max(abs(row_change), abs(column_change))
+        for step in range(1, distance):
+            path_row = row + row_step * step
+            path_column = column + column_step * step
+            for cell_row in range(path_row - 1, path_row + 2):
+                for cell_column in range(path_column - 1, path_column + 2):
+                    if rows[cell_row][cell_column] != " " and \
+                            (abs(cell_row - row) > 1 or abs(cell_column - column) > 1):
+                        return None
+
+        # take the piece off the board; the mover has to keep a ring
+        new_rows = list(rows)
+        for cell_row in range(row - 1, row + 2):
+            cells = list(new_rows[cell_row])
+            cells[column - 1:column + 2] = (" ", " ", " ")
+            new_rows[cell_row] = tuple(cells)
+        my_rings = self.find_rings(new_rows, me, row - 2, row + 2, column - 2, column + 2, self.get_rings(me))
+        if not my_rings:
+            return None
+        other_rings = self.find_rings(new_rows, other, row - 2, row + 2, column - 2, column + 2,
+                                      self.get_rings(other))
+        game_state = "UNFINISHED" if other_rings else ("BLACK_WON" if me == "B" else "WHITE_WON")
+
+        # put it down at the end, writing only the cells inside columns b to s and rows 2 to 19
+        row, column = end
+        if 2 <= row <= 19 and 2 <= column <= 19:
+            for cell_row in range(max(row - 1, 2), min(row + 1, 19) + 1):
+                cells = list(new_rows[cell_row])
+                for cell_column in range(max(column - 1, 2), min(column + 1, 19) + 1):
+                    cells[cell_column] = footprint[cell_row - row + 1][cell_column - column + 1]
+                new_rows[cell_row] = tuple(cells)
+            my_rings = self.find_rings(new_rows, me, row - 2, row + 2, column - 2, column + 2, my_rings)
+            other_rings = self.find_rings(new_rows, other, row - 2, row + 2, column - 2, column + 2, other_rings)
+            if my_rings and not other_rings:
+                game_state = "BLACK_WON" if me == "B" else "WHITE_WON"
+
+        return Position(tuple(new_rows), other, game_state, {me: my_rings, other: other_rings})
+
+    @staticmethod
+    def find_rings(rows, color, top, bottom, left, right, rings):
+        """
+        Checks again for rings of one color centered in a rectangle of the board, clipped to rows and columns 3 to 18.
+        :param rows: the board, indexed [row][column]
+        :param color: "B" or "W"
+        :param rings: the ring centers of that color before the check
+        :return: a frozenset of the ring centers after the check
+        """
+        found = set(rings)
+        for row in range(max(top, 3), min(bottom, 18) + 1):
+            for column in range(max(left, 3), min(right, 18) + 1):
+                if rows[row][column] == " " and rows[row - 1][column - 1:column + 2] == (color, color, color) and \
+                        rows[row][column - 1] == color and rows[row][column + 1] == color and \
+                        rows[row + 1][column - 1:column + 2] == (color, color, color):
+                    found.add((row, column))
+                else:
+                    found.discard((row, column))
+        return frozenset(found)
+
+
+class GamePool:
+    """
+    The GamePool class hands out GessGame objects in the starting position and takes them back when they are
+    finished, so simulations that play many games can reuse the same objects instead of making new ones.
+    """
+    def __init__(self, backend="list", max_size=64):
+        """
+        Initializes the data members of a GamePool object.
+        backend - board backend of the games
+        max_size - the most finished games kept for reuse; games given back beyond that are dropped
+        free - the games ready to be handed out again
+        created - number of games made by the pool
+        reused - number of games handed out again
+
+        :param backend: name of the board representation to use - a key of BOARD_BACKENDS
+        :param max_size: the most games kept for reuse
+        """
+        if backend not in BOARD_BACKENDS:
+            raise ValueError("unknown board backend: " + repr(backend))
+
+        self._backend = backend
+        self._max_size = max_size
+        self._free = []
+        self._created = 0
+        self._reused = 0
+
+    def acquire(self):
+        """
+        :return: a GessGame object in the starting position - a reused one if the pool has one, or a new one
+        """
+        if self._free:
+            self._reused += 1
+            return self._free.pop()
+        self._created += 1
+        return GessGame(backend=self._backend)
+
+    def release(self, game):
+        """
+        Gives a game back to the pool. The game is reset, and must not be used again until acquire hands it out.
+        :param game: a GessGame object made by acquire
+        """
+        if len(self._free) < self._max_size:
+            game.reset()
+            self._free.append(game)
+
+    def get_stats(self):
+        """
+        :return: a dictionary of the number of games made, the number handed out again, and the number waiting in
+                 the pool
         """
-        return self._E
+        return {"created": self._created, "reused": self._reused, "free": len(self._free)}
@@ -0,0 +1,361 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Optional instrumentation of the move pipeline of a GessGame. Attaching a MoveInstruments object to a
+#              game times each stage of make_move, counts the footprints read and the ring checks done, and works
+#              out why a move was turned down. Every move - through make_move, push_move or apply_moves - is handed
+#              to a sink as one event, a dictionary that can be charted as it is. A sink is any callable; HistogramRegistry is one that keeps latency
+#              histograms and counts in memory:
+#                  registry = HistogramRegistry()
+#                  instruments = instrument(game, registry)
+#                  game.make_move('m3', 'm6')
+#                  print(registry.get_summary())
+#              The stages are timed by wrapping the methods of the game and its board on those two objects only, so
+#              a game without instruments runs exactly the code it ran before - there is nothing to switch off.
+#              latency_summary gives the percentiles of a list of timings, for the benchmarks and the server.
+
+import bisect
+import time
+
+# stages of make_move that are timed; a stage that calls another includes its time (board_step includes still_in
+# and still_in_double_check)
+STAGES = ("coordinate_conversion", "valid_piece", "valid_direction", "valid_distance", "board_step", "still_in",
+          "still_in_double_check")
+
+# reasons make_move turns a move down
+REJECTION_REASONS = ("game_over", "off_board", "opponent_stones", "invalid_direction", "invalid_distance",
+                     "obstructed", "breaks_own_ring")
+
+# upper bounds of the histogram buckets, in microseconds; anything slower goes in one more bucket at the end
+BUCKET_BOUNDS_US = tuple(2 ** power for power in range(21))
+
+
+class MoveInstruments:
+    """
+    The MoveInstruments class times and counts the work of make_move on one GessGame.
+    attach puts timing wrappers over the game's make_move and move_coordinates, the stage methods in STAGES, and the
+    board's classify, save_footprint and is_ring; detach takes them off again. Each move then sends an event to the
+    sink:
+        start, end - the game-board positions asked for
+        legal - what make_move returned
+        reason - one of REJECTION_REASONS, or None if the move was made
+        seconds - the time taken by make_move
+        stages - the time spent in each stage that ran, in seconds
+        footprints - the number of footprints classified or copied out of the board
+        ring_squares - the number of squares checked for a ring of one color
+    Moves made through push_move are sent the same way. Moves made through apply_moves skip make_move and are timed
+    from move_coordinates, so their events have no coordinate_conversion stage.
+    """
+    def __init__(self, game, sink, clock=time.perf_counter):
+        """
+        Initializes the data members of a MoveInstruments object.
+        game - the GessGame object to instrument
+        sink - callable that is handed each event
+        clock - function returning the time in seconds
+        event - the event of the make_move call in progress, or None
+        attached - True while the wrappers are in place
+
+        :param game: a GessGame object
+        :param sink: a callable taking one event dictionary
+        :param clock: a function returning the time in seconds
+        """
+        self._game = game
+        self._sink = sink
+        self._clock = clock
+        self._event = None
+        self._attached = False
+
+    def is_attached(self):
+        """
+        :return: True while the wrappers are in place; False otherwise
+        """
+        return self._attached
+
+    def attach(self):
+        """
+        Puts the timing wrappers over the methods of the game and its board.
+        """
+        if self._attached:
+            return
+        game = self._game
+        board = game.get_board()
+        game.make_move = self.wrap_make_move(game.make_move)
+        game.move_coordinates = self.wrap_move_coordinates(game.move_coordinates)
+        for stage in STAGES:
+            owner = board if stage == "valid_piece" else game
+            setattr(owner, stage, self.wrap_stage(stage, getattr(owner, stage)))
+        board.classify = self.wrap_counter("footprints", board.classify)
+        board.save_footprint = self.wrap_counter("footprints", board.save_footprint)
+        board.is_ring = self.wrap_counter("ring_squares", board.is_ring)
+        self._attached = True
+
+    def detach(self):
+        """
+        Takes the timing wrappers off again, so the game runs its own methods.
+        """
+        if not self._attached:
+            return
+        game = self._game
+        board = game.get_board()
+        for name in ("make_move", "move_coordinates") + STAGES:
+            owner = board if name == "valid_piece" else game
+            delattr(owner, name)
+        del board.classify
+        del board.save_footprint
+        del board.is_ring
+        self._attached = False
+
+    def wrap_make_move(self, make_move):
+        """
+        :param make_move: the make_move method of the game
+        :return: a function that makes the move, then sends its event to the sink
+        """
+        def timed_make_move(start, end):
+            return self.run_event(start, end, make_move, start, end)
+
+        return timed_make_move
+
+    def wrap_move_coordinates(self, move_coordinates):
+        """
+        :param move_coordinates: the move_coordinates method of the game
+        :return: a function that makes the move and, unless make_move called it, sends its event to the sink
+        """
+        def timed_move_coordinates(start, end):
+            if self._event is not None:
+                return move_coordinates(start, end)
+            game = self._game
+            return self.run_event(game.square_name(start), game.square_name(end), move_coordinates, start, end)
+
+        return timed_move_coordinates
+
+    def run_event(self, start, end, method, *args):
+        """
+        Makes a move with one of the game's methods, then sends its event to the sink.
+        :param start: game-board position of the start of the move, for the event
+        :param end: game-board position of the end of the move, for the event
+        :param method: make_move or move_coordinates of the game
+        :return: what the method returned
+        """
+        event = {"start": start, "end": end, "legal": False, "reason": None, "seconds": 0.0,
+                 "stages": {}, "footprints": 0, "ring_squares": 0}
+        outer = self._event
+        self._event = event
+        results = {}
+        event["results"] = results
+        game_state = self._game.get_game_state()
+        started = self._clock()
+        try:
+            legal = method(*args)
+        finally:
+            event["seconds"] = self._clock() - started
+            self._event = outer
+        del event["results"]
+
+        event["legal"] = legal
+        if not legal:
+            event["reason"] = rejection_reason(game_state, results)
+        self._sink(event)
+        return legal
+
+    def wrap_stage(self, stage, method):
+        """
+        :param stage: a name from STAGES
+        :param method: the bound method of that stage
+        :return: a function that calls the method and adds its time and result to the event in progress
+        """
+        clock = self._clock
+
+        def timed_stage(*args):
+            event = self._event
+            if event is None:
+                return method(*args)
+            started = clock()
+            result = method(*args)
+            stages = event["stages"]
+            stages[stage] = stages.get(stage, 0.0) + clock() - started
+            event["results"][stage] = result
+            return result
+
+        return timed_stage
+
+    def wrap_counter(self, counter, method):
+        """
+        :param counter: the name of a count in the event
+        :param method: a bound method of the board
+        :return: a function that calls the method and adds one to the count of the event in progress
+        """
+        def counted(*args):
+            event = self._event
+            if event is not None:
+                event[counter] += 1
+            return method(*args)
+
+        return counted
+
+
+def rejection_reason(game_state, results):
+    """
+    Works out why make_move turned a move down, from the stages it got through.
+    :param game_state: the game state before the move
+    :param results: the result of each stage that ran, by stage name
+    :return: one of REJECTION_REASONS
+    """
+    if game_state != "UNFINISHED":
+        return "game_over"
+    if "valid_piece" not in results:
+        return "off_board"
+    if not results["valid_piece"]:
+        return "opponent_stones"
+    if not results.get("valid_direction"):
+        return "invalid_direction"
+    if not results.get("valid_distance"):
+        return "invalid_distance"
+    if results.get("still_in") is False:
+        return "breaks_own_ring"
+    return "obstructed"
+
+
+def instrument(game, sink):
+    """
+    :param game: a GessGame object
+    :param sink: a callable taking one event dictionary, such as a HistogramRegistry object
+    :return: a new MoveInstruments object, already attached to the game
+    """
+    instruments = MoveInstruments(game, sink)
+    instruments.attach()
+    return instruments
+
+
+def percentile(samples, fraction):
+    """
+    :param samples: a sorted list of numbers
+    :param fraction: a number from 0 to 1
+    :return: the sample at that fraction of the way through the list
+    """
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def latency_summary(seconds):
+    """
+    :param seconds: a list of timings in seconds
+    :return: a dictionary of the count, p50, p99 and mean of the timings, in microseconds
+    """
+    seconds = sorted(seconds)
+    return {"count": len(seconds),
+            "p50_us": percentile(seconds, 0.50) * 1e6,
+            "p99_us": percentile(seconds, 0.99) * 1e6,
+            "mean_us": sum(seconds) / len(seconds) * 1e6}
+
+
+class Histogram:
+    """
+    The Histogram class counts timings in buckets whose bounds double, from 1 microsecond up (BUCKET_BOUNDS_US).
+    """
+    def __init__(self):
+        """
+        Initializes the data members of a Histogram object.
+        counts - number of timings in each bucket; the last bucket holds everything above the last bound
+        total - sum of the timings, in seconds
+        maximum - the slowest timing, in seconds
+        """
+        self._counts = [0] * (len(BUCKET_BOUNDS_US) + 1)
+        self._total = 0.0
+        self._maximum = 0.0
+
+    def record(self, seconds):
+        """
+        Adds one timing.
+        :param seconds: the timing, in seconds
+        """
+        self._counts[bisect.bisect_left(BUCKET_BOUNDS_US, seconds * 1e6)] += 1
+        self._total += seconds
+        if seconds > self._maximum:
+            self._maximum = seconds
+
+    def get_count(self):
+        """
+        :return: the number of timings
+        """
+        return sum(self._counts)
+
+    def percentile(self, fraction):
+        """
+        :param fraction: a number from 0 to 1
+        :return: the upper bound, in microseconds, of the bucket holding that fraction of the timings, or None if
+                 there are none (the slowest timing if it is in the last bucket)
+        """
+        count = self.get_count()
+        if count == 0:
+            return None
+        seen = 0
+        for index, bucket in enumerate(self._counts):
+            seen += bucket
+            if seen > fraction * count or seen == count:
+                if index < len(BUCKET_BOUNDS_US):
+                    return BUCKET_BOUNDS_US[index]
+                return self._maximum * 1e6
+
+    def get_summary(self):
+        """
+        :return: a dictionary of the count, mean, p50, p99 and maximum of the timings in microseconds, and the
+                 bucket counts by upper bound ("inf" for the last)
+        """
+        count = self.get_count()
+        buckets = {str(bound): number for bound, number in zip(BUCKET_BOUNDS_US, self._counts) if number}
+        if self._counts[-1]:
+            buckets["inf"] = self._counts[-1]
+        return {"count": count,
+                "mean_us": self._total / count * 1e6 if count else 0.0,
+                "p50_us": self.percentile(0.50),
+                "p99_us": self.percentile(0.99),
+                "max_us": self._maximum * 1e6,
+                "buckets": buckets}
+
+
+class HistogramRegistry:
+    """
+    The HistogramRegistry class is a sink that keeps everything in memory: a Histogram of make_move and of each
+    stage, split by whether the move was legal, the totals of the counts, and how often each rejection reason came
+    up. get_summary gives it all as one dictionary, ready to be written as JSON.
+    """
+    def __init__(self):
+        """
+        Initializes the data members of a HistogramRegistry object.
+        histograms - Histogram objects by name - "make_move.legal", "make_move.illegal", or a stage name
+        counters - totals of the moves, the legal moves, the footprints read and the ring squares checked
+        reasons - number of moves turned down for each reason
+        """
+        self._histograms = {}
+        self._counters = {"moves": 0, "legal": 0, "footprints": 0, "ring_squares": 0}
+        self._reasons = dict.fromkeys(REJECTION_REASONS, 0)
+
+    def __call__(self, event):
+        """
+        Records one event of MoveInstruments.
+        :param event: an event dictionary
+        """
+        self.histogram("make_move.legal" if event["legal"] else "make_move.illegal").record(event["seconds"])
+        for stage, seconds in event["stages"].items():
+            self.histogram(stage).record(seconds)
+        self._counters["moves"] += 1
+        self._counters["legal"] += event["legal"]
+        self._counters["footprints"] += event["footprints"]
+        self._counters["ring_squares"] += event["ring_squares"]
+        if event["reason"] is not None:
+            self._reasons[event["reason"]] += 1
+
+    def histogram(self, name):
+        """
+        :param name: name of a histogram
+        :return: the Histogram object of that name, made empty the first time it is asked for
+        """
+        if name not in self._histograms:
+            self._histograms[name] = Histogram()
+        return self._histograms[name]
+
+    def get_summary(self):
+        """
+        :return: a dictionary of the summary of every histogram by name, the counters and the rejection reasons
+        """
+        return {"histograms": {name: histogram.get_summary() for name, histogram in self._histograms.items()},
+                "counters": dict(self._counters),
+                "reasons": dict(self._reasons)}
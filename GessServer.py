@@ -0,0 +1,599 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: An asyncio server that hosts many Gess games at once over a local TCP socket. Each request and each
+#              response is one JSON object on one line. Requests name a command and, except for create, the session
+#              (game) they are for:
+#                  {"command": "create", "backend": "bitboard", "bot": "random", "bot_color": "W"}
+#                  {"command": "move", "session": "1", "start": "m3", "end": "m6"}
+#                  {"command": "resign", "session": "1"}
+#                  {"command": "state", "session": "1"}
+#                  {"command": "metrics", "session": "1"}        (or without a session for every session)
+#                  {"command": "close", "session": "1"}
+#              Responses have "ok": true and the result, or "ok": false and an "error". An "id" field of a request is
+#              copied into its response. Bot replies are worked out on a process pool, so a thinking bot never holds
+#              up the other games. From the command line:
+#                  python GessServer.py serve --port 8765
+#                  python GessServer.py load --port 8765 --sessions 1000 --moves 20
+#              The load generator plays random legal moves on many sessions over several connections and prints the
+#              round-trip latency and request rate.
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import GessGame, BOARD_BACKENDS, is_square_name
+from GessInstruments import latency_summary
+from SelfPlay import RandomPolicy, SearchPolicy
+
+# bots a session can be created with
+BOTS = ("random", "search")
+
+# the most time a search bot can be given to reply, in milliseconds, and the range of seeds
+MAX_TIME_MS = 60000
+MAX_SEED = 2 ** 63 - 1
+
+# policies made in a bot worker process, by bot name and time budget, so search engines are kept between replies
+_worker_policies = {}
+
+
+def integer_field(request, name, default, low, high):
+    """
+    :param request: a request, as a dictionary
+    :param name: name of a field of the request
+    :param default: value of the field if the request does not have it
+    :param low: smallest value allowed
+    :param high: largest value allowed
+    :return: the value of the field, as an int
+    """
+    value = request.get(name, default)
+    # JSON numbers with a fraction part, or too large for a double, are floats; 100.0 is still an integer
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ValueError(name + " must be an integer from " + str(low) + " to " + str(high))
+    return value
+
+
+def choose_reply(bot, time_ms, snapshot, backend, seed):
+    """
+    Picks a bot's move in a worker process. The game is sent as a snapshot, so only a few hundred bytes cross the
+    process boundary.
+    :param bot: a name in BOTS
+    :param time_ms: time budget of the search bot, in milliseconds
+    :param snapshot: text snapshot of the game, made by GessGame.to_snapshot
+    :param backend: board backend to rebuild the game with
+    :param seed: seed for the random choices of the bot
+    :return: a (start, end) tuple of game-board positions, or None if the bot has no legal move
+    """
+    key = (bot, time_ms)
+    if key not in _worker_policies:
+        _worker_policies[key] = RandomPolicy() if bot == "random" else SearchPolicy(time_ms=time_ms)
+    game = GessGame.from_snapshot(snapshot, backend=backend)
+    return _worker_policies[key].choose_move(game, random.Random(seed))
+
+
+class Session:
+    """
+    The Session class is one game hosted by the server: the GessGame object, the bot that plays one side of it (if
+    any), a lock so that only one command changes the game at a time, and the latencies of its commands.
+    """
+    def __init__(self, name, backend="bitboard", bot=None, bot_color="W", time_ms=100, seed=0, history_size=1024):
+        """
+        Initializes the data members of a Session object.
+        name - the session id used in requests
+        game - the GessGame object
+        bot, bot_color, time_ms - the bot's name (or None for no bot), the color it plays, and its search budget
+        seed - seed for the random choices of the bot
+        lock - asyncio.Lock held while a command changes the game
+        latencies - the latest history_size latencies of each command, in seconds, by command name
+        """
+        self._name = name
+        self._backend = backend
+        self._game = GessGame(backend=backend)
+        self._bot = bot
+        self._bot_color = bot_color
+        self._time_ms = time_ms
+        self._seed = seed
+        self._lock = asyncio.Lock()
+        self._history_size = history_size
+        self._latencies = {}
+        self._moves = 0
+
+    def get_name(self):
+        """
+        :return: the session id
+        """
+        return self._name
+
+    def get_game(self):
+        """
+        :return: the GessGame object of the session
+        """
+        return self._game
+
+    def get_lock(self):
+        """
+        :return: the asyncio.Lock held while a command changes the game
+        """
+        return self._lock
+
+    def bot_to_move(self):
+        """
+        :return: True if the session has a bot, the game is not over, and it is the bot's turn; False otherwise
+        """
+        return self._bot is not None and self._game.get_game_state() == "UNFINISHED" and \
+            self._game.get_whose_turn() == self._bot_color
+
+    def reply_arguments(self):
+        """
+        :return: the arguments of choose_reply for the bot's next move
+        """
+        return self._bot, self._time_ms, self._game.to_snapshot(), self._backend, self._seed + self._moves
+
+    def count_move(self):
+        """
+        Counts a move made in the session, so every bot reply gets its own seed.
+        """
+        self._moves += 1
+
+    def record_latency(self, command, seconds):
+        """
+        :param command: name of the command, or "bot" for the time a bot took to reply
+        :param seconds: time taken
+        """
+        if command not in self._latencies:
+            self._latencies[command] = deque(maxlen=self._history_size)
+        self._latencies[command].append(seconds)
+
+    def get_metrics(self):
+        """
+        :return: a dictionary of the number of moves made and a latency summary for each command
+        """
+        return {"moves": self._moves,
+                "latency": {command: latency_summary(list(samples)) for command, samples in self._latencies.items()}}
+
+    def describe(self):
+        """
+        :return: a dictionary of the session id, game state, whose turn it is, and a snapshot of the board
+        """
+        return {"session": self._name,
+                "game_state": self._game.get_game_state(),
+                "whose_turn": self._game.get_whose_turn(),
+                "snapshot": self._game.to_snapshot()}
+
+
+class GessServer:
+    """
+    The GessServer class serves Gess sessions over line-delimited JSON on a TCP socket.
+    Requests on one connection are answered in order; any number of connections are served at once, and any
+    connection can use any session. make_move takes well under a millisecond, so moves are made on the event loop;
+    bot replies, which can take as long as their search budget, are handed to an executor.
+    """
+    def __init__(self, host="127.0.0.1", port=8765, executor=None, history_size=1024):
+        """
+        Initializes the data members of a GessServer object.
+        host, port - the address to listen on (port 0 picks a free port)
+        executor - concurrent.futures executor for bot replies
+        history_size - number of latencies kept for each command of each session
+        sessions - Session objects by session id
+        server - the asyncio server once started
+        connections - stream writers of the open connections
+
+        :param executor: an executor, or None to make a process pool the first time a bot replies
+        """
+        self._host = host
+        self._port = port
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._history_size = history_size
+        self._sessions = {}
+        self._names = itertools.count(1)
+        self._server = None
+        self._connections = set()
+
+    def get_port(self):
+        """
+        :return: the port the server is listening on, or None before it is started
+        """
+        if self._server is None:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    def get_sessions(self):
+        """
+        :return: a dictionary of the Session objects, by session id
+        """
+        return self._sessions
+
+    async def start(self):
+        """
+        Starts listening for connections.
+        """
+        self._server = await asyncio.start_server(self.handle_connection, self._host, self._port)
+
+    async def serve_forever(self):
+        """
+        Starts the server if it is not started, and serves until cancelled.
+        """
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening, closes the open connections, and shuts down the executor if the server made it.
+        """
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            while self._connections:
+                await asyncio.sleep(0.001)
+            await self._server.wait_closed()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answers the requests of one connection, one line at a time, until the client closes it.
+        """
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # the line is longer than the stream limit; the rest of it cannot be told from the next request
+                    writer.write(json.dumps({"ok": False, "error": "bad request: line too long"}).encode() + b"\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def handle_line(self, line):
+        """
+        :param line: one request, as a line of JSON
+        :return: the response, as a dictionary
+        """
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+        except ValueError as error:
+            return {"ok": False, "error": "bad request: " + str(error)}
+
+        started = time.perf_counter()
+        try:
+            response = await self.handle_request(request)
+        except (KeyError, ValueError, TypeError, OverflowError) as error:
+            # a field of the wrong type that gets past the checks of the commands is a bad request too
+            response = {"ok": False, "error": error.args[0] if error.args else type(error).__name__}
+        else:
+            response["ok"] = True
+            session = self._sessions.get(response.get("session"))
+            if session is not None:
+                session.record_latency(request["command"], time.perf_counter() - started)
+
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def handle_request(self, request):
+        """
+        :param request: a request, as a dictionary
+        :return: the result, as a dictionary
+        """
+        command = request.get("command")
+        if command == "create":
+            return await self.command_create(request)
+        if command == "metrics":
+            return self.command_metrics(request)
+
+        session = self.find_session(request)
+        if command == "move":
+            return await self.command_move(session, request)
+        if command == "resign":
+            async with session.get_lock():
+                if session.get_game().get_game_state() != "UNFINISHED":
+                    raise ValueError("the game is over")
+                session.get_game().resign_game()
+            return session.describe()
+        if command == "state":
+            return session.describe()
+        if command == "close":
+            del self._sessions[session.get_name()]
+            return {"session": None, "closed": session.get_name()}
+        raise ValueError("unknown command: " + repr(command))
+
+    def find_session(self, request):
+        """
+        :param request: a request, as a dictionary
+        :return: the Session object the request is for
+        """
+        name = request.get("session")
+        if not isinstance(name, str) or name not in self._sessions:
+            raise KeyError("unknown session: " + repr(name))
+        return self._sessions[name]
+
+    async def command_create(self, request):
+        """
+        Makes a new session. If its bot plays black, the bot moves before the response is sent.
+        """
+        backend = request.get("backend", "bitboard")
+        bot = request.get("bot")
+        bot_color = request.get("bot_color", "W")
+        if not isinstance(backend, str) or backend not in BOARD_BACKENDS:
+            raise ValueError("unknown board backend: " + repr(backend))
+        if bot is not None and (not isinstance(bot, str) or bot not in BOTS):
+            raise ValueError("unknown bot: " + repr(bot))
+        if bot_color not in ("B", "W"):
+            raise ValueError("bot_color must be 'B' or 'W'")
+        time_ms = integer_field(request, "time_ms", 100, 1, MAX_TIME_MS)
+        seed = integer_field(request, "seed", 0, 0, MAX_SEED)
+
+        name = str(next(self._names))
+        session = Session(name, backend, bot, bot_color, time_ms, seed, self._history_size)
+        self._sessions[name] = session
+
+        response = {}
+        async with session.get_lock():
+            if session.bot_to_move():
+                response["reply"] = await self.bot_reply(session)
+        response.update(session.describe())
+        return response
+
+    async def command_move(self, session, request):
+        """
+        Makes a move for the player whose turn it is, then lets the bot reply if it is the bot's turn.
+        """
+        start = request.get("start")
+        end = request.get("end")
+        if not (is_square_name(start) and is_square_name(end)):
+            raise ValueError("start and end must be game-board positions, such as 'm3'")
+
+        response = {}
+        async with session.get_lock():
+            if session.bot_to_move():
+                raise ValueError("it is the bot's turn")
+            response["legal"] = session.get_game().make_move(start, end)
+            if response["legal"]:
+                session.count_move()
+                if session.bot_to_move():
+                    response["reply"] = await self.bot_reply(session)
+        response.update(session.describe())
+        return response
+
+    async def bot_reply(self, session):
+        """
+        Has the bot of a session pick its move on the executor, and makes the move. Called with the session's lock
+        held.
+        :return: the move as a [start, end] list, or None if the bot has no legal move
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+
+        started = time.perf_counter()
+        move = await asyncio.get_running_loop().run_in_executor(self._executor, choose_reply,
+                                                                *session.reply_arguments())
+        session.record_latency("bot", time.perf_counter() - started)
+        if move is None:
+            return None
+
+        session.get_game().make_move(move[0], move[1])
+        session.count_move()
+        return [move[0], move[1]]
+
+    def command_metrics(self, request):
+        """
+        :return: the metrics of the session named in the request, or of every session if none is named
+        """
+        if request.get("session") is not None:
+            session = self.find_session(request)
+            return dict(session.get_metrics(), session=session.get_name())
+        return {"sessions": {name: session.get_metrics() for name, session in self._sessions.items()}}
+
+
+class GessClient:
+    """
+    The GessClient class is a small asyncio client for GessServer. Requests are sent one at a time on one
+    connection.
+    """
+    def __init__(self, host="127.0.0.1", port=8765):
+        """
+        :param host: address of the server
+        :param port: port of the server
+        """
+        self._host = host
+        self._port = port
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        """
+        Opens the connection.
+        """
+        self._reader, self._writer = await asyncio.open_connection(self._host, self._port)
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+    async def request(self, command, **fields):
+        """
+        Sends one request and waits for its response.
+        :param command: name of the command
+        :param fields: the other fields of the request
+        :return: the response, as a dictionary
+        """
+        fields["command"] = command
+        self._writer.write(json.dumps(fields).encode() + b"\n")
+        await self._writer.drain()
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def create(self, **fields):
+        """
+        :param fields: backend, bot, bot_color, time_ms and seed of the new session, all optional
+        :return: the response to a create request
+        """
+        return await self.request("create", **fields)
+
+    async def move(self, session, start, end):
+        """
+        :return: the response to a move request
+        """
+        return await self.request("move", session=session, start=start, end=end)
+
+    async def resign(self, session):
+        """
+        :return: the response to a resign request
+        """
+        return await self.request("resign", session=session)
+
+    async def state(self, session):
+        """
+        :return: the response to a state request
+        """
+        return await self.request("state", session=session)
+
+    async def metrics(self, session=None):
+        """
+        :return: the response to a metrics request, for one session or for every session
+        """
+        return await self.request("metrics", session=session)
+
+
+async def play_connection(host, port, sessions, moves, backend, seed, latencies):
+    """
+    One connection of the load generator: creates its sessions, then plays random legal moves on them in turn,
+    keeping a local copy of each game to choose the moves from.
+    :param sessions: number of sessions to create on this connection
+    :param moves: number of moves to play in each session
+    :param latencies: list that the round-trip time of every request is added to, in seconds
+    """
+    client = GessClient(host, port)
+    await client.connect()
+    rng = random.Random(seed)
+    policy = RandomPolicy()
+    try:
+        games = {}
+        for number in range(sessions):
+            started = time.perf_counter()
+            response = await client.create(backend=backend)
+            latencies.append(time.perf_counter() - started)
+            games[response["session"]] = GessGame(backend=backend)
+
+        for turn in range(moves):
+            for name, game in list(games.items()):
+                move = policy.choose_move(game, rng) if game.get_game_state() == "UNFINISHED" else None
+                if move is None:
+                    continue
+                started = time.perf_counter()
+                response = await client.move(name, move[0], move[1])
+                latencies.append(time.perf_counter() - started)
+                if not response.get("legal"):
+                    raise RuntimeError("server turned down a legal move: " + json.dumps(response))
+                game.make_move(move[0], move[1])
+
+        for name in games:
+            await client.request("close", session=name)
+    finally:
+        await client.close()
+
+
+async def generate_load(host, port, sessions=1000, moves=20, connections=50, backend="bitboard", seed=0):
+    """
+    Plays moves on many sessions at once, spread over several connections.
+    :return: a dictionary of the number of sessions and requests, the time taken, requests per second, and a
+             summary of the round-trip latencies
+    """
+    latencies = []
+    started = time.perf_counter()
+    per_connection = [sessions // connections + (number < sessions % connections) for number in range(connections)]
+    await asyncio.gather(*[play_connection(host, port, count, moves, backend, seed + number, latencies)
+                           for number, count in enumerate(per_connection) if count > 0])
+    seconds = time.perf_counter() - started
+    return {"sessions": sessions,
+            "connections": connections,
+            "requests": len(latencies),
+            "seconds": seconds,
+            "requests_per_second": len(latencies) / seconds if seconds > 0 else 0.0,
+            "latency": latency_summary(latencies) if latencies else None}
+
+
+async def run_load(args):
+    """
+    Runs the load generator against a running server, or against one started here if args.local is set.
+    """
+    server = None
+    port = args.port
+    if args.local:
+        server = GessServer(args.host, 0)
+        await server.start()
+        port = server.get_port()
+    try:
+        return await generate_load(args.host, port, args.sessions, args.moves, args.connections, args.backend,
+                                   args.seed)
+    finally:
+        if server is not None:
+            await server.close()
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Serve Gess games over TCP, or put load on a server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the server")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    load = commands.add_parser("load", help="play random games on many sessions and report latency")
+    load.add_argument("--host", default="127.0.0.1", help="address of the server (default: 127.0.0.1)")
+    load.add_argument("--port", type=int, default=8765, help="port of the server (default: 8765)")
+    load.add_argument("--local", action="store_true", help="start a server in this process instead")
+    load.add_argument("--sessions", type=int, default=1000, help="number of sessions (default: 1000)")
+    load.add_argument("--moves", type=int, default=20, help="moves per session (default: 20)")
+    load.add_argument("--connections", type=int, default=50, help="number of connections (default: 50)")
+    load.add_argument("--backend", default="bitboard", choices=sorted(BOARD_BACKENDS), help="board backend")
+    load.add_argument("--seed", type=int, default=0, help="seed for choosing moves (default: 0)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(GessServer(args.host, args.port).serve_forever())
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(asyncio.run(run_load(args)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
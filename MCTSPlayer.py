@@ -0,0 +1,460 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: A Monte Carlo tree search player for Gess. The MCTSPlayer class grows a search tree with UCT, finishes
+#              each new line with a random playout, and picks the move that was tried the most. The tree is kept
+#              between moves and reused when the game reaches one of its positions, and it stops growing at a cap on
+#              the number of nodes. Playouts can be spread over a process pool, either as independent trees that are
+#              merged at the root (root-parallel) or as several playouts of each new leaf at once (leaf-parallel).
+#              From the command line:
+#                  python MCTSPlayer.py --time-ms 1000 --workers 4 --parallel root
+#              searches the starting position and prints the move and playouts/sec.
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import GessGame
+
+# score of a playout for the player who made the move into a node: a win, a draw and a loss
+WIN = 1.0
+DRAW = 0.5
+LOSS = 0.0
+
+# ways of spreading playouts over worker processes
+PARALLEL_MODES = ("root", "leaf")
+
+# MCTSPlayer objects of worker processes, by settings, so their trees can be reused on the next move
+_worker_players = {}
+
+
+class Node:
+    """
+    The Node class is one position of the search tree, reached from its parent by a move.
+    wins is the total playout score for the player who made that move, so the parent can pick the child that is
+    best for the player to move there.
+    """
+    __slots__ = ("_move", "_parent", "_children", "_untried", "_visits", "_wins", "_hash")
+
+    def __init__(self, move, parent, position_hash):
+        """
+        :param move: the (start, end) move from the parent, or None for the root
+        :param parent: the parent Node object, or None for the root
+        :param position_hash: GessGame.get_hash of the position of the node
+        """
+        self._move = move
+        self._parent = parent
+        self._children = []
+        self._untried = None
+        self._visits = 0
+        self._wins = 0.0
+        self._hash = position_hash
+
+    def get_move(self):
+        """
+        :return: the (start, end) move from the parent, or None for the root
+        """
+        return self._move
+
+    def get_children(self):
+        """
+        :return: a list of the child Node objects
+        """
+        return self._children
+
+    def get_visits(self):
+        """
+        :return: the number of playouts through the node
+        """
+        return self._visits
+
+    def get_wins(self):
+        """
+        :return: the total playout score for the player who made the move into the node
+        """
+        return self._wins
+
+    def get_hash(self):
+        """
+        :return: the position hash of the node
+        """
+        return self._hash
+
+    def uct_child(self, exploration):
+        """
+        :param exploration: the exploration constant of UCT
+        :return: the child with the highest UCT score - its mean score plus an exploration bonus that shrinks the
+                 more often it is tried
+        """
+        scale = exploration * math.sqrt(math.log(self._visits))
+        best = None
+        best_score = -1.0
+        for child in self._children:
+            score = child._wins / child._visits + scale / math.sqrt(child._visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def count_nodes(self):
+        """
+        :return: the number of nodes in the subtree of the node, including itself
+        """
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node._children)
+        return count
+
+
+def playout(game, rng, max_plies):
+    """
+    Plays random moves from the current position of a game until it ends, then takes them all back with pop_move.
+    :param game: a GessGame object
+    :param rng: a random.Random object
+    :param max_plies: number of moves after which the playout is stopped and scored as a draw
+    :return: "B" or "W" for the winner, or None for a draw - the player to move had no legal move, or the playout
+             hit max_plies
+    """
+    plies = 0
+    while game.get_game_state() == "UNFINISHED" and plies < max_plies:
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.push_move(move[0], move[1])
+        plies += 1
+
+    state = game.get_game_state()
+    for ply in range(plies):
+        game.pop_move()
+    if state == "BLACK_WON":
+        return "B"
+    if state == "WHITE_WON":
+        return "W"
+    return None
+
+
+def playout_batch(snapshot, backend, seed, playouts, max_plies):
+    """
+    Runs random playouts from one position in a worker process, for leaf-parallel search.
+    :return: a (black wins, white wins, playouts) tuple
+    """
+    game = GessGame.from_snapshot(snapshot, backend=backend)
+    rng = random.Random(seed)
+    wins = {"B": 0, "W": 0, None: 0}
+    for number in range(playouts):
+        wins[playout(game, rng, max_plies)] += 1
+    return wins["B"], wins["W"], playouts
+
+
+def search_tree(settings, snapshot, backend, seed, time_ms, playouts):
+    """
+    Grows a search tree in a worker process, for root-parallel search. Each worker keeps its player, and so its
+    tree, for the next move.
+    :param settings: a tuple of the exploration constant, the node cap and max_plies of the player
+    :return: a (statistics, playouts) tuple - a list of [start, end, visits, wins] for each move of the root, and
+             the number of playouts run
+    """
+    if settings not in _worker_players:
+        _worker_players[settings] = MCTSPlayer(exploration=settings[0], max_nodes=settings[1],
+                                               max_plies=settings[2])
+    player = _worker_players[settings]
+    game = GessGame.from_snapshot(snapshot, backend=backend)
+    root = player.grow(game, random.Random(seed), time_ms, playouts)
+    return ([[child.get_move()[0], child.get_move()[1], child.get_visits(), child.get_wins()]
+             for child in root.get_children()], root.get_visits())
+
+
+class MCTSPlayer:
+    """
+    The MCTSPlayer class picks moves for the player whose turn it is in a GessGame with Monte Carlo tree search.
+    Each playout walks down the tree by UCT, adds one child for an untried move, plays the rest of the game at random
+    with GessGame.random_move, and scores every node on the way back up. Moves are made and taken back with
+    push_move and pop_move, so the board is never copied.
+    It can be used as a policy of SelfPlay, through choose_move.
+    """
+    def __init__(self, exploration=1.4, max_nodes=200000, max_plies=400, workers=1, parallel="root",
+                 leaf_playouts=None, backend="list", time_ms=100):
+        """
+        Initializes the data members of an MCTSPlayer object.
+        exploration - the exploration constant of UCT
+        max_nodes - the most nodes the tree may hold; once it is full, playouts still run but no nodes are added
+        max_plies - number of moves after which a playout is scored as a draw
+        workers - number of worker processes; 1 searches in this process
+        parallel - "root" for a tree in each worker, merged at the root, or "leaf" for several playouts of each
+                   leaf at once
+        leaf_playouts - playouts per worker for each leaf, in leaf-parallel search
+        backend - board backend of the games sent to the workers
+        time_ms - wall-clock budget per move of choose_move, in milliseconds
+        root - root Node of the tree kept from the last search, or None
+        nodes - number of nodes in the tree
+        pool - the process pool, made the first time it is needed
+        info - statistics of the last search
+
+        :param leaf_playouts: playouts per worker for each leaf, or None for 1
+        """
+        if parallel not in PARALLEL_MODES:
+            raise ValueError("parallel must be one of " + ", ".join(PARALLEL_MODES))
+
+        self._exploration = exploration
+        self._max_nodes = max_nodes
+        self._max_plies = max_plies
+        self._workers = workers or os.cpu_count() or 1
+        self._parallel = parallel
+        self._leaf_playouts = leaf_playouts or 1
+        self._backend = backend
+        self._time_ms = time_ms
+        self._root = None
+        self._nodes = 0
+        self._pool = None
+        self._info = {}
+
+    def __getstate__(self):
+        """
+        :return: the settings of the player, without its tree or process pool
+        """
+        state = dict(self.__dict__)
+        state.update(_root=None, _nodes=0, _pool=None, _info={})
+        return state
+
+    def get_info(self):
+        """
+        :return: a dictionary of statistics of the last search - move, visits, playouts, nodes, reused, seconds and
+                 playouts_per_second
+        """
+        return dict(self._info)
+
+    def close(self):
+        """
+        Shuts down the process pool, if there is one.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def choose_move(self, game, rng):
+        """
+        :param game: a GessGame object
+        :param rng: a random.Random object
+        :return: a (start, end) tuple of game-board positions, or None if there is no legal move
+        """
+        return self.best_move(game, time_ms=self._time_ms, rng=rng)
+
+    def best_move(self, game, time_ms=1000, playouts=None, rng=None):
+        """
+        Searches the position of a game and returns the move tried the most for the player whose turn it is.
+        The game is left as it was.
+        :param game: a GessGame object
+        :param time_ms: wall-clock budget in milliseconds, or None for no limit
+        :param playouts: number of playouts to run, or None for no limit
+        :param rng: a random.Random object, or None for a new one
+        :return: a (start, end) tuple of game-board positions, or None if the player has no legal move or the game
+                 is over
+        """
+        if time_ms is None and playouts is None:
+            raise ValueError("best_move needs a time budget, a playout budget, or both")
+        if rng is None:
+            rng = random.Random()
+
+        started = time.perf_counter()
+        if game.get_game_state() != "UNFINISHED":
+            return None
+
+        if self._workers > 1 and self._parallel == "root":
+            statistics, count = self.search_root_parallel(game, rng, time_ms, playouts)
+        else:
+            root = self.grow(game, rng, time_ms, playouts)
+            statistics = {child.get_move(): [child.get_visits(), child.get_wins()] for child in root.get_children()}
+            count = self._info["playouts"]
+
+        move = max(statistics, key=lambda key: statistics[key][0]) if statistics else None
+        seconds = time.perf_counter() - started
+        self._info.update(move=move,
+                          visits=statistics[move][0] if move else 0,
+                          playouts=count,
+                          seconds=seconds,
+                          playouts_per_second=count / seconds if seconds > 0 else 0.0)
+        return move
+
+    def grow(self, game, rng, time_ms, playouts):
+        """
+        Grows the tree of the position of a game until the time or playout budget runs out. The tree of the last
+        search is reused if the game is at one of its positions within two moves of the old root.
+        Leaf-parallel players run their playouts on the process pool.
+        :return: the root Node of the tree
+        """
+        deadline = None if time_ms is None else time.perf_counter() + time_ms / 1000
+        root = self.find_root(game)
+        reused = root is not None
+        if root is None:
+            root = Node(None, None, game.get_hash())
+            self._nodes = 1
+        self._root = root
+
+        count = 0
+        while (playouts is None or count < playouts) and (deadline is None or time.perf_counter() < deadline):
+            count += self.run_playout(game, root, rng)
+            if root._untried == [] and not root._children:
+                break
+
+        self._info = {"playouts": count, "nodes": self._nodes, "reused": reused}
+        return root
+
+    def find_root(self, game):
+        """
+        :param game: a GessGame object
+        :return: the node of the kept tree at the position of the game - the old root, one of its children or one
+                 of their children - cut loose from the rest of the tree, or None
+        """
+        if self._root is None:
+            return None
+
+        position_hash = game.get_hash()
+        for node in [self._root] + self._root.get_children():
+            for candidate in [node] + node.get_children():
+                if candidate.get_hash() == position_hash:
+                    if candidate is not self._root:
+                        candidate._parent = None
+                        candidate._move = None
+                        self._nodes = candidate.count_nodes()
+                    return candidate
+        self._root = None
+        return None
+
+    def run_playout(self, game, root, rng):
+        """
+        Runs one iteration of the search: selection, expansion, playout and backpropagation.
+        :return: the number of playouts run
+        """
+        node = root
+        plies = 0
+
+        # selection: walk down through nodes with no untried moves left
+        while node._untried == [] and node._children:
+            node = node.uct_child(self._exploration)
+            game.push_move(node._move[0], node._move[1])
+            plies += 1
+
+        # expansion: find the moves of a new node, then add a child for one of them unless the tree is full
+        if node._untried is None:
+            node._untried = list(game.legal_moves())
+            rng.shuffle(node._untried)
+        if node._untried and self._nodes < self._max_nodes:
+            move = node._untried.pop()
+            game.push_move(move[0], move[1])
+            plies += 1
+            child = Node(move, node, game.get_hash())
+            node._children.append(child)
+            self._nodes += 1
+            node = child
+
+        # playout, scored for each player
+        mover = "W" if game.get_whose_turn() == "B" else "B"
+        if self._workers > 1 and self._parallel == "leaf":
+            black, white, count = self.playout_leaf_parallel(game, rng)
+        else:
+            winner = playout(game, rng, self._max_plies)
+            black, white, count = winner == "B", winner == "W", 1
+        scores = {"B": black * WIN + white * LOSS + (count - black - white) * DRAW,
+                  "W": white * WIN + black * LOSS + (count - black - white) * DRAW}
+
+        for ply in range(plies):
+            game.pop_move()
+
+        # backpropagation: each node is scored for the player who made the move into it
+        while node is not None:
+            node._visits += count
+            node._wins += scores[mover]
+            mover = "W" if mover == "B" else "B"
+            node = node._parent
+        return count
+
+    def get_pool(self):
+        """
+        :return: the process pool, made the first time it is needed
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._workers)
+        return self._pool
+
+    def playout_leaf_parallel(self, game, rng):
+        """
+        Runs leaf_playouts playouts of the current position on each worker process.
+        :return: a (black wins, white wins, playouts) tuple
+        """
+        snapshot = game.to_snapshot(binary=True)
+        futures = [self.get_pool().submit(playout_batch, snapshot, self._backend, rng.getrandbits(64),
+                                          self._leaf_playouts, self._max_plies)
+                   for worker in range(self._workers)]
+        black = white = count = 0
+        for future in futures:
+            result = future.result()
+            black += result[0]
+            white += result[1]
+            count += result[2]
+        return black, white, count
+
+    def search_root_parallel(self, game, rng, time_ms, playouts):
+        """
+        Grows an independent tree of the position on each worker process, with the whole time budget and a share
+        of the playout budget, and adds up the visits and wins of each move of the roots.
+        :return: a (statistics, playouts) tuple - [visits, wins] of each move, and the number of playouts run
+        """
+        snapshot = game.to_snapshot(binary=True)
+        settings = (self._exploration, self._max_nodes, self._max_plies)
+        share = None if playouts is None else -(-playouts // self._workers)
+        futures = [self.get_pool().submit(search_tree, settings, snapshot, self._backend, rng.getrandbits(64),
+                                          time_ms, share)
+                   for worker in range(self._workers)]
+
+        statistics = {}
+        count = 0
+        for future in futures:
+            children, runs = future.result()
+            count += runs
+            for start, end, visits, wins in children:
+                totals = statistics.setdefault((start, end), [0, 0.0])
+                totals[0] += visits
+                totals[1] += wins
+        self._info = {"playouts": count, "nodes": None, "reused": None}
+        return statistics, count
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Search a Gess position with Monte Carlo tree search.")
+    parser.add_argument("--time-ms", type=int, default=1000, help="time per move in milliseconds (default: 1000)")
+    parser.add_argument("--playouts", type=int, help="playouts per move (default: no limit)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument("--parallel", default="root", choices=PARALLEL_MODES, help="how to use the workers")
+    parser.add_argument("--exploration", type=float, default=1.4, help="UCT exploration constant (default: 1.4)")
+    parser.add_argument("--max-nodes", type=int, default=200000, help="most nodes in the tree (default: 200000)")
+    parser.add_argument("--moves", type=int, default=1, help="moves to play from the start, reusing the tree")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random playouts (default: 0)")
+    args = parser.parse_args(argv)
+
+    player = MCTSPlayer(exploration=args.exploration, max_nodes=args.max_nodes, workers=args.workers,
+                        parallel=args.parallel)
+    rng = random.Random(args.seed)
+    game = GessGame()
+    try:
+        for number in range(args.moves):
+            move = player.best_move(game, time_ms=args.time_ms, playouts=args.playouts, rng=rng)
+            print(json.dumps(player.get_info()))
+            if move is None:
+                break
+            game.make_move(move[0], move[1])
+    finally:
+        player.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: An opening book for Gess, keyed by position hash. The book is built offline from recorded games - the
+#              moves played in the first few plies, with how often each was played and how it scored - and can add
+#              the move a SearchEngine picks in each position that came up often enough. Entries are sorted by hash
+#              in one file, which the reader memory-maps and binary-searches, so a lookup only touches a few pages
+#              and the book is never loaded into memory. From the command line:
+#                  python OpeningBook.py build games.jsonl book.gob --plies 8 --search-ms 500
+#                  python OpeningBook.py show book.gob c3-c5 q18-r18
+#              (game records written by SelfPlay.py, or a GameArchive file ending in .gar)
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+
+from GessGame import GessGame
+from GessEngine import SearchEngine
+from GameArchive import GameArchiveReader, encode_move, decode_move
+
+BOOK_MAGIC = b"GESSBOK1"
+
+# the header is the number of entries and the number of plies the book covers; each entry is a position hash, an
+# encoded move (see GameArchive.encode_move), the number of games it was played in, the points it scored for the
+# player who made it (2 for a win, 1 for an unfinished game, 0 for a loss), the search score, and flags
+BOOK_HEADER = struct.Struct("<QB")
+ENTRY = struct.Struct("<QHIIiB")
+HASH = struct.Struct("<Q")
+
+# flag of an entry that is the move picked by the search
+SEARCHED = 1
+
+# points of a game for the player who moved, by result and mover
+POINTS = {("BLACK_WON", "B"): 2, ("BLACK_WON", "W"): 0, ("WHITE_WON", "W"): 2, ("WHITE_WON", "B"): 0}
+
+
+class OpeningBookBuilder:
+    """
+    The OpeningBookBuilder class gathers the moves of the first plies of many games in memory, optionally searches
+    the positions that came up most often, and writes the book file.
+    """
+    def __init__(self, plies=8):
+        """
+        Initializes the data members of an OpeningBookBuilder object.
+        plies - number of moves from the start of each game that go into the book
+        entries - [games, points, search score, flags] of each move, by (position hash, move code)
+        positions - binary snapshot of each position, by hash, for searching it later
+        games - number of games of each position, by hash
+
+        :param plies: number of moves of each game to add
+        """
+        self._plies = plies
+        self._entries = {}
+        self._positions = {}
+        self._games = {}
+
+    def add_game(self, moves, result):
+        """
+        Adds the first plies of a game. The game is replayed, and stops at the first illegal move.
+        :param moves: the moves of the game, as (start, end) pairs of game-board positions
+        :param result: the game state at the end of the game
+        """
+        game = GessGame()
+        for start, end in moves[:self._plies]:
+            position_hash = game.get_hash()
+            mover = game.get_whose_turn()
+            if position_hash not in self._positions:
+                self._positions[position_hash] = game.to_snapshot(binary=True)
+            if not game.make_move(start, end):
+                break
+            entry = self._entries.setdefault((position_hash, encode_move(start, end)), [0, 0, 0, 0])
+            entry[0] += 1
+            entry[1] += POINTS.get((result, mover), 1)
+            self._games[position_hash] = self._games.get(position_hash, 0) + 1
+
+    def add_search(self, time_ms, min_games=1, engine=None):
+        """
+        Searches every position that came up in at least min_games games, and flags the move the search picks,
+        with its score. A picked move that was never played is added with no games.
+        :param time_ms: search budget per position, in milliseconds
+        :param min_games: fewest games a position has to come up in to be searched
+        :param engine: a SearchEngine object, or None for a new one
+        :return: the number of positions searched
+        """
+        if engine is None:
+            engine = SearchEngine()
+
+        searched = 0
+        for position_hash, games in self._games.items():
+            if games < min_games:
+                continue
+            game = GessGame.from_snapshot(self._positions[position_hash])
+            move = engine.best_move(game, time_ms=time_ms)
+            if move is None:
+                continue
+            entry = self._entries.setdefault((position_hash, encode_move(move[0], move[1])), [0, 0, 0, 0])
+            entry[2] = engine.get_info()["score"]
+            entry[3] |= SEARCHED
+            searched += 1
+        return searched
+
+    def __len__(self):
+        """
+        :return: the number of entries gathered
+        """
+        return len(self._entries)
+
+    def write(self, path):
+        """
+        Writes the book file, with the entries sorted by position hash and then by move.
+        :param path: path of the book file
+        """
+        with open(path, "wb") as book:
+            book.write(BOOK_MAGIC)
+            book.write(BOOK_HEADER.pack(len(self._entries), self._plies))
+            for (position_hash, code), (games, points, score, flags) in sorted(self._entries.items()):
+                book.write(ENTRY.pack(position_hash, code, games, points, score, flags))
+
+
+class OpeningBook:
+    """
+    The OpeningBook class looks up positions in a book file through a memory map, with a binary search on the
+    sorted hashes - about 20 probes for a million entries, and only the pages probed are read from disk.
+    """
+    def __init__(self, path):
+        """
+        Opens and memory-maps the book file.
+        :param path: path of the book file
+        """
+        self._file = open(path, "rb")
+        self._book = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._book[:len(BOOK_MAGIC)] != BOOK_MAGIC:
+            self.close()
+            raise ValueError("not a Gess opening book: " + path)
+        self._count, self._plies = BOOK_HEADER.unpack_from(self._book, len(BOOK_MAGIC))
+        self._first = len(BOOK_MAGIC) + BOOK_HEADER.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """
+        :return: the number of entries in the book
+        """
+        return self._count
+
+    def get_plies(self):
+        """
+        :return: the number of plies from the start of a game that the book covers
+        """
+        return self._plies
+
+    def lookup(self, position_hash):
+        """
+        :param position_hash: a position hash, as made by GessGame.get_hash
+        :return: a list of the book's moves in the position, each a dictionary of the move as a (start, end) tuple,
+                 the number of games it was played in, its mean points per game for the player who made it (from 0
+                 to 2, or None if it was never played), its search score, and whether the search picked it
+        """
+        return [{"move": decode_move(code),
+                 "games": games,
+                 "points": points / games if games else None,
+                 "search_score": score,
+                 "searched": bool(flags & SEARCHED)}
+                for entry_hash, code, games, points, score, flags in self.read_entries(position_hash)]
+
+    def read_entries(self, position_hash):
+        """
+        :param position_hash: a position hash
+        :return: an iterator of the raw entries of the position, as (hash, move code, games, points, search score,
+                 flags) tuples
+        """
+        first = self.find(position_hash, 0)
+        last = self.find(position_hash + 1, first)
+        return ENTRY.iter_unpack(self._book[self._first + first * ENTRY.size:self._first + last * ENTRY.size])
+
+    def find(self, position_hash, low):
+        """
+        :param position_hash: a position hash
+        :param low: number of the first entry to consider - every entry before it has a lower hash
+        :return: the number of the first entry whose hash is not lower than position_hash, or the number of entries
+        """
+        book = self._book
+        first = self._first
+        high = self._count
+        while low < high:
+            middle = (low + high) // 2
+            if HASH.unpack_from(book, first + middle * ENTRY.size)[0] < position_hash:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def probe(self, game):
+        """
+        :param game: a GessGame object
+        :return: the book's moves in the position of the game, as for lookup
+        """
+        return self.lookup(game.get_hash())
+
+    def choose_move(self, game, rng):
+        """
+        Picks a book move: the move picked by the search if there is one, or else a played move, chosen at random in
+        proportion to the number of games it was played in.
+        A move is only handed out if it is legal in the game, so a hash collision, or a book built under other rules,
+        cannot make a player play an illegal move; a move that is not legal is passed over.
+        :param game: a GessGame object
+        :param rng: a random.Random object
+        :return: a (start, end) tuple of game-board positions, or None if the position is not in the book or none
+                 of its book moves is legal
+        """
+        if game.get_game_state() != "UNFINISHED":
+            return None
+
+        # only the moves that are picked are decoded
+        entries = list(self.read_entries(game.get_hash()))
+        for entry in entries:
+            if entry[5] & SEARCHED:
+                move = decode_move(entry[1])
+                if game.is_legal(*move):
+                    return move
+
+        entries = [entry for entry in entries if entry[2]]
+        while entries:
+            choice = rng.randrange(sum(entry[2] for entry in entries))
+            for index, entry in enumerate(entries):
+                if choice < entry[2]:
+                    break
+                choice -= entry[2]
+            move = decode_move(entries[index][1])
+            if game.is_legal(*move):
+                return move
+            del entries[index]
+        return None
+
+    def close(self):
+        """
+        Closes the memory map and the file under it.
+        """
+        self._book.close()
+        self._file.close()
+
+
+class BookPolicy:
+    """
+    The BookPolicy class plays from an opening book while the game is in it, and hands over to another policy
+    after that. Each worker process opens the book the first time the policy is used there, so only the path and
+    the fallback policy are sent to the workers.
+    """
+    def __init__(self, path, fallback):
+        """
+        :param path: path of the book file
+        :param fallback: policy to use when the position is not in the book, such as a SearchPolicy
+        """
+        self._path = path
+        self._fallback = fallback
+        self._book = None
+
+    def __getstate__(self):
+        """
+        :return: the settings of the policy, without its open book
+        """
+        return {"_path": self._path, "_fallback": self._fallback, "_book": None}
+
+    def choose_move(self, game, rng):
+        """
+        :param game: a GessGame object
+        :param rng: a random.Random object
+        :return: a (start, end) tuple of game-board positions, or None if there is no legal move
+        """
+        if self._book is None:
+            self._book = OpeningBook(self._path)
+        move = self._book.choose_move(game, rng)
+        if move is not None:
+            return move
+        return self._fallback.choose_move(game, rng)
+
+
+def read_records(path):
+    """
+    :param path: a file of JSON-lines game records, or a GameArchive file ending in .gar
+    :return: a generator of (moves, result) tuples
+    """
+    if path.endswith(".gar"):
+        with GameArchiveReader(path) as reader:
+            yield from reader
+        return
+
+    with open(path) as records:
+        for line in records:
+            if line.strip():
+                record = json.loads(line)
+                yield record["moves"], record["result"]
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Build a Gess opening book, or show the book moves of a position.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a book from game records")
+    build.add_argument("records", help="game records, one JSON object per line, or a GameArchive file (.gar)")
+    build.add_argument("book", help="book file to write")
+    build.add_argument("--plies", type=int, default=8, help="moves of each game to add (default: 8)")
+    build.add_argument("--search-ms", type=int, help="search each common position for this long (default: no search)")
+    build.add_argument("--min-games", type=int, default=2, help="games a position needs to be searched (default: 2)")
+    show = commands.add_parser("show", help="print the book moves of the position after some moves")
+    show.add_argument("book", help="book file")
+    show.add_argument("moves", nargs="*", help="moves from the start, as start-end pairs such as c3-c5")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        builder = OpeningBookBuilder(plies=args.plies)
+        for moves, result in read_records(args.records):
+            builder.add_game(moves, result)
+        searched = 0
+        if args.search_ms is not None:
+            searched = builder.add_search(args.search_ms, args.min_games)
+        builder.write(args.book)
+        print(json.dumps({"entries": len(builder), "searched": searched}))
+    else:
+        game = GessGame()
+        for move in args.moves:
+            start, separator, end = move.partition("-")
+            if not game.make_move(start, end):
+                print("illegal move: " + move, file=sys.stderr)
+                return 1
+        with OpeningBook(args.book) as book:
+            print(json.dumps(book.probe(game), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Replays recorded Gess games through GessGame.make_move to check that every move was legal and that the
+#              recorded result is the game state the moves lead to. Games are streamed from the file one line at a
+#              time and handed to worker processes in chunks, with only a few chunks in flight at once, so memory
+#              stays bounded however large the file is. Two formats are read, one game per line:
+#                  JSONL - game records as written by SelfPlay.py: {"moves": [["c3", "c5"], ...], "result": "..."}
+#                  text  - moves as start-end pairs separated by spaces, optionally followed by the result:
+#                          c3-c5 q18-r18 UNFINISHED
+#              From the command line:
+#                  python ReplayValidator.py games.jsonl --workers 4 --output problems.jsonl
+#              writes one JSON object per game with a problem, and prints the totals and games/sec.
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import GessGame, GAME_STATES
+
+# formats of game files
+FORMATS = ("jsonl", "text")
+
+
+def file_format(path):
+    """
+    :param path: path of a game file
+    :return: "jsonl" if the file name ends in .jsonl or .json; "text" otherwise
+    """
+    return "jsonl" if path.endswith((".jsonl", ".json")) else "text"
+
+
+def read_lines(path):
+    """
+    Reads a game file one line at a time, skipping blank lines and lines starting with '#'.
+    :param path: path of a game file
+    :return: a generator of (line number, line) tuples - line numbers start at 1
+    """
+    with open(path) as games:
+        for line_number, line in enumerate(games, 1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line_number, line
+
+
+def read_chunks(lines, chunk_size):
+    """
+    :param lines: an iterable of (line number, line) tuples
+    :param chunk_size: number of lines in each chunk
+    :return: a generator of lists of up to chunk_size (line number, line) tuples
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_game(line, text_format):
+    """
+    :param line: one line of a game file
+    :param text_format: "jsonl" or "text"
+    :return: a (moves, result) tuple - a list of (start, end) tuples, and the recorded result, or None if the line
+             has no result
+    """
+    if text_format == "jsonl":
+        record = json.loads(line)
+        return [(move[0], move[1]) for move in record["moves"]], record.get("result")
+
+    tokens = line.split()
+    result = None
+    if tokens and tokens[-1] in GAME_STATES:
+        result = tokens.pop()
+    moves = []
+    for token in tokens:
+        start, separator, end = token.partition("-")
+        if not separator:
+            raise ValueError("not a move: " + repr(token))
+        moves.append((start, end))
+    return moves, result
+
+
+def replay_game(moves, result, backend="list"):
+    """
+    Replays a game from the starting position.
+    :param moves: a list of (start, end) tuples of game-board positions
+    :param result: the recorded result, or None to only check the moves
+    :param backend: board backend of the replay
+    :return: None if every move was legal and the result matches; otherwise a dictionary describing the first
+             problem - "illegal_move" with the ply (counting from 1) and the move, or "result_mismatch" with the
+             recorded and the replayed result
+    """
+    game = GessGame(backend=backend)
+    for ply, (start, end) in enumerate(moves, 1):
+        try:
+            legal = game.make_move(start, end)
+        except (ValueError, IndexError, TypeError):
+            legal = False
+        if not legal:
+            return {"problem": "illegal_move", "ply": ply, "move": [start, end]}
+
+    if result is not None and result != game.get_game_state():
+        return {"problem": "result_mismatch", "recorded": result, "replayed": game.get_game_state()}
+    return None
+
+
+def validate_chunk(chunk, text_format, backend):
+    """
+    Replays a chunk of games in a worker process.
+    :param chunk: a list of (line number, line) tuples
+    :param text_format: "jsonl" or "text"
+    :param backend: board backend of the replays
+    :return: a (problems, games, moves) tuple - a list of problem dictionaries, each with the line number of its
+             game, and the number of games and moves replayed
+    """
+    problems = []
+    moves_replayed = 0
+    for line_number, line in chunk:
+        try:
+            moves, result = parse_game(line, text_format)
+        except (ValueError, KeyError, TypeError, IndexError) as error:
+            problems.append({"line": line_number, "problem": "bad_record", "error": str(error)})
+            continue
+
+        problem = replay_game(moves, result, backend)
+        if problem is None:
+            moves_replayed += len(moves)
+            continue
+        moves_replayed += problem.get("ply", len(moves))
+        problems.append(dict({"line": line_number}, **problem))
+    return problems, len(chunk), moves_replayed
+
+
+class ReplayValidator:
+    """
+    The ReplayValidator class replays every game of a file on a process pool. Chunks of lines are read from the file
+    as the workers need them - no more than a few chunks per worker are in flight - and the problems are handed back
+    in the order of the file.
+    """
+    def __init__(self, workers=None, chunk_size=256, backend="list", in_flight=2):
+        """
+        Initializes the data members of a ReplayValidator object.
+        workers - number of worker processes
+        chunk_size - number of games in each chunk sent to a worker
+        backend - board backend of the replays
+        in_flight - number of chunks per worker that are read ahead of the oldest unfinished chunk
+        stats - totals of the last run
+
+        :param workers: number of worker processes, or None for one per CPU
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+        self._backend = backend
+        self._in_flight = in_flight
+        self._stats = {}
+
+    def run(self, path, text_format=None):
+        """
+        Replays every game of a file.
+        :param path: path of a game file
+        :param text_format: "jsonl" or "text", or None to go by the file name (see file_format)
+        :return: a generator of problem dictionaries, in the order of the file
+        """
+        if text_format is None:
+            text_format = file_format(path)
+        if text_format not in FORMATS:
+            raise ValueError("format must be one of " + ", ".join(FORMATS))
+
+        self._stats = {"games": 0, "moves": 0, "problems": 0, "seconds": 0.0}
+        started = time.perf_counter()
+        chunks = read_chunks(read_lines(path), self._chunk_size)
+        with ProcessPoolExecutor(max_workers=self._workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(validate_chunk, chunk, text_format, self._backend))
+                if len(pending) >= self._workers * self._in_flight:
+                    yield from self.collect(pending.popleft(), started)
+            while pending:
+                yield from self.collect(pending.popleft(), started)
+
+    def collect(self, future, started):
+        """
+        Waits for a chunk to be replayed and adds it to the totals.
+        :param future: the future of a validate_chunk call
+        :param started: perf_counter time at which the run started
+        :return: the list of problems of the chunk
+        """
+        problems, games, moves = future.result()
+        self._stats["games"] += games
+        self._stats["moves"] += moves
+        self._stats["problems"] += len(problems)
+        self._stats["seconds"] = time.perf_counter() - started
+        return problems
+
+    def get_stats(self):
+        """
+        :return: a dictionary of the games, moves and problems of the last run, the time taken, and games/sec and
+                 moves/sec
+        """
+        seconds = self._stats.get("seconds", 0.0)
+        return dict(self._stats,
+                    games_per_second=self._stats.get("games", 0) / seconds if seconds > 0 else 0.0,
+                    moves_per_second=self._stats.get("moves", 0) / seconds if seconds > 0 else 0.0)
+
+
+def main(argv=None):
+    """
+    Command-line entry point. Exits with status 1 if any game has a problem.
+    """
+    parser = argparse.ArgumentParser(description="Replay recorded Gess games and check every move and result.")
+    parser.add_argument("path", help="game file, one game per line")
+    parser.add_argument("--format", choices=FORMATS, help="format of the file (default: by file name)")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="games per chunk (default: 256)")
+    parser.add_argument("--output", help="file to write the problems to, one JSON object per line")
+    args = parser.parse_args(argv)
+
+    validator = ReplayValidator(workers=args.workers, chunk_size=args.chunk_size)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for problem in validator.run(args.path, args.format):
+            output.write(json.dumps(problem) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    stats = validator.get_stats()
+    print(json.dumps(stats, indent=2), file=sys.stderr if output is sys.stdout else sys.stdout)
+    return 1 if stats["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
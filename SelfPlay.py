@@ -0,0 +1,240 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Self-play runner for generating Gess game records. Games between two move-picking policies are
+#              spread across a pool of worker processes in batches, and each batch of finished games is handed back
+#              as soon as it is done. From the command line:
+#                  python SelfPlay.py --games 1000 --workers 4 --policy random --output games.jsonl
+#              writes one JSON game record per line and prints games/sec and moves/sec for each worker.
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from GessGame import GessGame
+from GessEngine import SearchEngine
+
+
+class RandomPolicy:
+    """
+    The RandomPolicy class picks a legal move at random, with GessGame.random_move.
+    """
+    def choose_move(self, game, rng):
+        """
+        :param game: a GessGame object
+        :param rng: a random.Random object
+        :return: a (start, end) tuple of game-board positions, or None if there is no legal move
+        """
+        return game.random_move(rng)
+
+
+class SearchPolicy:
+    """
+    The SearchPolicy class picks moves with a SearchEngine. Each worker process makes its own engine the first
+    time the policy is used there, so only the settings are sent to the workers.
+    """
+    def __init__(self, time_ms=100, depth=None):
+        """
+        :param time_ms: wall-clock budget per move, in milliseconds, or None for no limit
+        :param depth: deepest iteration per move, or None to search until time runs out
+        """
+        self._time_ms = time_ms
+        self._depth = depth
+        self._engine = None
+
+    def __getstate__(self):
+        """
+        :return: the settings of the policy, without its engine
+        """
+        return {"_time_ms": self._time_ms, "_depth": self._depth, "_engine": None}
+
+    def choose_move(self, game, rng):
+        """
+        :param game: a GessGame object
+        :param rng: a random.Random object (not used - the search is deterministic)
+        :return: a (start, end) tuple of game-board positions, or None if there is no legal move
+        """
+        if self._engine is None:
+            self._engine = SearchEngine()
+        return self._engine.best_move(game, time_ms=self._time_ms, depth=self._depth)
+
+
+# policies that can be chosen from the command line
+POLICIES = {"random": RandomPolicy, "search": SearchPolicy}
+
+
+def play_game(black, white, seed, max_plies=400, backend="bitboard"):
+    """
+    Plays one game between two policies.
+    :param black: policy that moves for black
+    :param white: policy that moves for white
+    :param seed: seed for the random choices of the policies
+    :param max_plies: number of moves after which the game is stopped
+    :param backend: board backend of the game
+    :return: a game record - a dictionary of the seed, the moves as [start, end] lists, and the result, which is the
+             game state at the end ('UNFINISHED' if the game hit max_plies or the player to move had no legal move)
+    """
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    moves = []
+    while game.get_game_state() == "UNFINISHED" and len(moves) < max_plies:
+        policy = black if game.get_whose_turn() == "B" else white
+        move = policy.choose_move(game, rng)
+        if move is None:
+            break
+        game.make_move(move[0], move[1])
+        moves.append([move[0], move[1]])
+
+    return {"seed": seed, "moves": moves, "result": game.get_game_state()}
+
+
+def play_batch(black, white, seeds, max_plies, backend):
+    """
+    Plays a batch of games in a worker process.
+    :return: a (records, stats) tuple - the game records, and a dictionary of the worker's process id, the number
+             of games and moves played, and the time taken
+    """
+    started = time.perf_counter()
+    records = [play_game(black, white, seed, max_plies, backend) for seed in seeds]
+    return records, {"pid": os.getpid(),
+                     "games": len(records),
+                     "moves": sum(len(record["moves"]) for record in records),
+                     "seconds": time.perf_counter() - started}
+
+
+class SelfPlayRunner:
+    """
+    The SelfPlayRunner class plays many games on a process pool. Games are numbered from a base seed, so a run
+    with the same settings plays the same games no matter how many workers there are. Batches are handed to the
+    pool as the workers need them - no more than a few batches per worker are in flight.
+    """
+    def __init__(self, black=None, white=None, workers=None, batch_size=16, max_plies=400, backend="bitboard",
+                 in_flight=2):
+        """
+        Initializes the data members of a SelfPlayRunner object.
+        black, white - the policies of the two players
+        workers - number of worker processes
+        batch_size - number of games each worker plays before handing them back
+        max_plies - number of moves after which a game is stopped
+        backend - board backend of the games
+        in_flight - number of batches per worker submitted to the pool and not yet handed back
+        stats - games, moves and time for each worker process, by process id
+
+        :param black: policy for black, or None for a RandomPolicy
+        :param white: policy for white, or None for the same policy as black
+        :param workers: number of worker processes, or None for one per CPU
+        """
+        if black is None:
+            black = RandomPolicy()
+        if white is None:
+            white = black
+
+        self._black = black
+        self._white = white
+        self._workers = workers or os.cpu_count() or 1
+        self._batch_size = batch_size
+        self._max_plies = max_plies
+        self._backend = backend
+        self._in_flight = in_flight
+        self._stats = {}
+
+    def run(self, games, seed=0):
+        """
+        Plays games on the process pool, handing back each batch as soon as it is finished. Batches can finish out
+        of order.
+        :param games: number of games to play
+        :param seed: seed of the first game; game i is played with seed + i
+        :return: a generator of lists of game records
+        """
+        self._stats = {}
+        with ProcessPoolExecutor(max_workers=self._workers) as pool:
+            pending = set()
+            for first in range(seed, seed + games, self._batch_size):
+                seeds = list(range(first, min(first + self._batch_size, seed + games)))
+                pending.add(pool.submit(play_batch, self._black, self._white, seeds, self._max_plies,
+                                        self._backend))
+                if len(pending) >= self._workers * self._in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self.collect(done)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from self.collect(done)
+
+    def collect(self, futures):
+        """
+        Adds finished batches to the totals of the workers that played them.
+        :param futures: finished futures of play_batch calls
+        :return: a generator of the lists of game records of the batches
+        """
+        for future in futures:
+            records, stats = future.result()
+            self.record_stats(stats)
+            yield records
+
+    def record_stats(self, stats):
+        """
+        Adds the statistics of a finished batch to the totals of the worker that played it.
+        """
+        totals = self._stats.setdefault(stats["pid"], {"games": 0, "moves": 0, "seconds": 0.0})
+        totals["games"] += stats["games"]
+        totals["moves"] += stats["moves"]
+        totals["seconds"] += stats["seconds"]
+
+    def get_stats(self):
+        """
+        :return: a dictionary of games, moves, seconds, games_per_second and moves_per_second for each worker
+                 process, by process id
+        """
+        stats = {}
+        for pid, totals in self._stats.items():
+            seconds = totals["seconds"]
+            stats[pid] = dict(totals,
+                              games_per_second=totals["games"] / seconds if seconds > 0 else 0.0,
+                              moves_per_second=totals["moves"] / seconds if seconds > 0 else 0.0)
+        return stats
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Play Gess games against each other on a process pool.")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play (default: 100)")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=16, help="games per batch (default: 16)")
+    parser.add_argument("--max-plies", type=int, default=400, help="moves before a game is stopped (default: 400)")
+    parser.add_argument("--policy", default="random", choices=sorted(POLICIES), help="move-picking policy")
+    parser.add_argument("--time-ms", type=int, default=100, help="time per move of the search policy")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game (default: 0)")
+    parser.add_argument("--output", help="file to write the game records to, one JSON object per line")
+    args = parser.parse_args(argv)
+
+    policy = SearchPolicy(time_ms=args.time_ms) if args.policy == "search" else RandomPolicy()
+    runner = SelfPlayRunner(policy, workers=args.workers, batch_size=args.batch_size, max_plies=args.max_plies)
+
+    output = open(args.output, "w") if args.output else None
+    started = time.perf_counter()
+    games = 0
+    try:
+        for records in runner.run(args.games, seed=args.seed):
+            games += len(records)
+            if output is not None:
+                for record in records:
+                    output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+
+    seconds = time.perf_counter() - started
+    print(json.dumps({"games": games,
+                      "seconds": seconds,
+                      "games_per_second": games / seconds if seconds > 0 else 0.0,
+                      "workers": runner.get_stats()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
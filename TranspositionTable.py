@@ -0,0 +1,113 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: A bounded transposition table for searchers built on GessGame. Positions are keyed by the 64-bit
+#              Zobrist hash from GessGame.get_hash. The table is a fixed number of buckets that fits in a memory
+#              budget, and each bucket has two slots: one that keeps the deepest search of a position, and one that
+#              always takes the newest entry.
+
+from array import array
+
+# what the value of an entry means, relative to the alpha-beta window it was searched with
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# bytes used by one slot: key (8), value (4), move (4), depth (1), flag (1) and age (1)
+SLOT_BYTES = 19
+
+
+class TranspositionTable:
+    """
+    The TranspositionTable class stores search results by position hash in flat typed arrays, so that the memory
+    it uses is fixed when it is made and does not grow during a search.
+
+    Bucket i is made up of slot 2 * i, which is depth-preferred, and slot 2 * i + 1, which is always-replace.
+    A new entry goes in the depth-preferred slot if that slot holds the same position, an entry from an earlier
+    search, or a search that was no deeper; otherwise it goes in the always-replace slot.
+    """
+    def __init__(self, memory_bytes=16 * 1024 * 1024):
+        """
+        Initializes the data members of a TranspositionTable object.
+        buckets - number of two-slot buckets that fit in the memory budget
+        keys, values, moves, depths, flags, ages - one typed array per field, indexed by slot
+        age - number of the current search, so that entries from earlier searches can be replaced first
+        probes, hits - statistics for the hit rate
+
+        :param memory_bytes: memory budget for the table, in bytes
+        """
+        if memory_bytes < 2 * SLOT_BYTES:
+            raise ValueError("memory budget too small for one bucket: " + str(memory_bytes))
+
+        self._buckets = memory_bytes // (2 * SLOT_BYTES)
+        self._keys = array("Q", bytes(8 * 2 * self._buckets))
+        self._values = array("i", bytes(4 * 2 * self._buckets))
+        self._moves = array("i", bytes(4 * 2 * self._buckets))
+        self._depths = array("b", [-1]) * (2 * self._buckets)
+        self._flags = array("b", bytes(2 * self._buckets))
+        self._ages = array("B", bytes(2 * self._buckets))
+        self._age = 0
+        self._probes = 0
+        self._hits = 0
+
+    def clear(self):
+        """
+        Empties every slot. An empty slot has a depth of -1.
+        """
+        self._depths = array("b", [-1]) * (2 * self._buckets)
+        self._probes = 0
+        self._hits = 0
+
+    def new_search(self):
+        """
+        Marks the start of a new search. Entries from earlier searches stay usable, but are the first to be replaced.
+        """
+        self._age = (self._age + 1) % 256
+
+    def store(self, key, depth, value, flag, move=-1):
+        """
+        Stores the result of searching a position.
+        :param key: 64-bit position hash
+        :param depth: depth the position was searched to (0 to 127)
+        :param value: score of the position for the player to move
+        :param flag: EXACT, LOWER_BOUND or UPPER_BOUND
+        :param move: best move found, as an integer chosen by the searcher, or -1 for none
+        """
+        slot = 2 * (key % self._buckets)
+        if self._depths[slot] != -1 and self._keys[slot] != key and self._ages[slot] == self._age and \
+                depth < self._depths[slot]:
+            slot += 1  # the depth-preferred slot keeps its deeper entry
+
+        self._keys[slot] = key
+        self._depths[slot] = depth
+        self._values[slot] = value
+        self._flags[slot] = flag
+        self._moves[slot] = move
+        self._ages[slot] = self._age
+
+    def probe(self, key):
+        """
+        :param key: 64-bit position hash
+        :return: a (depth, value, flag, move) tuple for the position, or None if it is not in the table
+        """
+        self._probes += 1
+        slot = 2 * (key % self._buckets)
+        for slot in (slot, slot + 1):
+            if self._depths[slot] != -1 and self._keys[slot] == key:
+                self._hits += 1
+                return self._depths[slot], self._values[slot], self._flags[slot], self._moves[slot]
+
+        return None
+
+    def get_capacity(self):
+        """
+        :return: the number of slots in the table
+        """
+        return 2 * self._buckets
+
+    def get_hit_rate(self):
+        """
+        :return: the fraction of probes that found their position, or 0.0 before the first probe
+        """
+        if self._probes == 0:
+            return 0.0
+        return self._hits / self._probes
@@ -0,0 +1,70 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks GessGame.apply_moves against making the same moves one at a time with make_move.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, SQUARE_INDICES, BOARD_BACKENDS
+
+
+def random_moves(backend, seed, plies):
+    """
+    :return: a list of up to the given number of legal (start, end) moves of a random game
+    """
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    moves = []
+    for ply in range(plies):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+        moves.append(move)
+    return moves
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(4))
+def test_apply_moves_matches_make_move(backend, seed):
+    moves = random_moves(backend, seed, 60) + [("m3", "m6"), ("c3", "c5")]
+
+    expected = GessGame(backend=backend)
+    made = 0
+    for start, end in moves:
+        if not expected.make_move(start, end):
+            break
+        made += 1
+
+    by_name = GessGame(backend=backend)
+    by_index = GessGame(backend=backend)
+    summary = {"moves": made, "illegal": made if made < len(moves) else None,
+               "game_state": expected.get_game_state()}
+    assert by_name.apply_moves(iter(moves)) == summary
+    assert by_index.apply_moves([(SQUARE_INDICES[start], SQUARE_INDICES[end]) for start, end in moves]) == summary
+    assert by_name.get_hash() == by_index.get_hash() == expected.get_hash()
+    assert by_name.get_whose_turn() == expected.get_whose_turn()
+
+
+@pytest.mark.parametrize("pair", [(5, "c3"), ("c3", 5), (True, 5), (None, None), (-1, 40), (40, 400), ("u5", "m6"),
+                                  ("c3", "zz"), ("c3", ""), ("c3", "c5x"), ("c3",), ("c3", "c5", "c7"), "c3c5", None,
+                                  ("c3", 5.0)])
+def test_bad_pairs_are_illegal(pair):
+    game = GessGame()
+    assert game.apply_moves([("c3", "c5"), pair]) == {"moves": 1, "illegal": 1, "game_state": "UNFINISHED"}
+
+
+def test_apply_moves_mixes_names_and_indices():
+    game = GessGame()
+    summary = game.apply_moves([(SQUARE_INDICES["c3"], SQUARE_INDICES["c5"]), ("q18", "r18")])
+    assert summary == {"moves": 2, "illegal": None, "game_state": "UNFINISHED"}
+    assert game.get_whose_turn() == "B"
+
+
+def test_apply_moves_takes_numpy_indices():
+    np = pytest.importorskip("numpy")
+    game = GessGame()
+    summary = game.apply_moves([(np.int64(SQUARE_INDICES["c3"]), np.int32(SQUARE_INDICES["c5"])),
+                                [np.int16(SQUARE_INDICES["q18"]), np.uint16(SQUARE_INDICES["r18"])]])
+    assert summary == {"moves": 2, "illegal": None, "game_state": "UNFINISHED"}
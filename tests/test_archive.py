@@ -0,0 +1,113 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks GameArchive - move codes, archive round trips across writing sessions, and corrupt input.
+
+import random
+import struct
+
+import pytest
+
+from GessGame import GessGame, DIRECTIONS, SQUARE_NAMES
+from GameArchive import GameArchiveWriter, GameArchiveReader, encode_move, decode_move, MOVE_CODES, INDEX_MAGIC, \
+    OFFSET
+
+
+def random_game(seed, plies):
+    """
+    :return: a (game, moves) tuple - a GessGame object after up to the given number of random moves, and the moves
+    """
+    rng = random.Random(seed)
+    game = GessGame()
+    moves = []
+    for ply in range(plies):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+        moves.append(move)
+    return game, moves
+
+
+def test_every_code_decodes_to_the_move_it_encodes():
+    moves = 0
+    for start in SQUARE_NAMES:
+        for end in SQUARE_NAMES:
+            try:
+                code = encode_move(start, end)
+            except ValueError:
+                continue
+            assert 0 <= code < MOVE_CODES
+            assert decode_move(code) == (start, end)
+            moves += 1
+    assert moves == 25080
+
+
+def test_encode_move_refuses_moves_off_the_eight_directions():
+    with pytest.raises(ValueError):
+        encode_move("c3", "d5")
+    with pytest.raises(ValueError):
+        encode_move("c3", "c3")
+
+
+@pytest.mark.parametrize("code", [-1, MOVE_CODES, 65535,
+                                  # a1 going down a row, and t20 going right five columns
+                                  (SQUARE_NAMES.index("a1") * 8 + DIRECTIONS.index([1, 0])) * 19,
+                                  (SQUARE_NAMES.index("t20") * 8 + DIRECTIONS.index([0, 1])) * 19 + 4])
+def test_decode_move_refuses_bad_codes(code):
+    with pytest.raises(ValueError):
+        decode_move(code)
+
+
+def test_archive_round_trip(tmp_path):
+    path = str(tmp_path / "games.gar")
+    games = [random_game(seed, 30 + 15 * seed) for seed in range(4)]
+    with GameArchiveWriter(path) as writer:
+        for game, moves in games[:2]:
+            writer.append(moves, game.get_game_state())
+    with GameArchiveWriter(path) as writer:
+        for game, moves in games[2:]:
+            writer.append(moves, game.get_game_state())
+
+    with GameArchiveReader(path) as reader:
+        assert len(reader) == len(games)
+        assert list(reader) == [(moves, game.get_game_state()) for game, moves in games]
+        for number, (game, moves) in enumerate(games):
+            assert reader.replay(number).get_hash() == game.get_hash()
+        with pytest.raises(IndexError):
+            reader[len(games)]
+
+
+def test_index_points_at_each_game(tmp_path):
+    path = str(tmp_path / "games.gar")
+    with GameArchiveWriter(path) as writer:
+        writer.append([("c3", "c5")], "UNFINISHED")
+        writer.append([], "BLACK_WON")
+    with open(path + ".idx", "rb") as index:
+        data = index.read()
+    offsets = [OFFSET.unpack_from(data, len(INDEX_MAGIC) + number * OFFSET.size)[0] for number in range(2)]
+    assert offsets == [8, 8 + 3 + 2]
+
+
+def test_corrupt_archives_are_refused(tmp_path):
+    path = str(tmp_path / "games.gar")
+    with GameArchiveWriter(path) as writer:
+        writer.append([("c3", "c5")], "UNFINISHED")
+    with open(path, "r+b") as archive:
+        archive.seek(8)
+        archive.write(struct.pack("<HBH", 1, 0, 65535))
+    with GameArchiveReader(path) as reader:
+        with pytest.raises(ValueError):
+            reader[0]
+
+    with open(path, "r+b") as archive:
+        archive.seek(8)
+        archive.write(struct.pack("<HB", 1, 7))
+    with GameArchiveReader(path) as reader:
+        with pytest.raises(ValueError):
+            reader[0]
+
+    with open(str(tmp_path / "other.gar"), "wb") as other, open(str(tmp_path / "other.gar.idx"), "wb") as index:
+        other.write(b"not an archive")
+        index.write(INDEX_MAGIC)
+    with pytest.raises(ValueError):
+        GameArchiveReader(str(tmp_path / "other.gar"))
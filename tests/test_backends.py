@@ -0,0 +1,53 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks that the bitboard backend (BitBoard) gives the same result as the list backend (Board) for
+#              every move request, legal or not, and leaves the same board behind.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, BitBoard, Board, BOARD_BACKENDS
+
+
+def cell_kinds(board):
+    """
+    :param board: a Board or BitBoard object
+    :return: the whole board as a list of lists, with every non-blank cell that is not a stone as "x"
+    """
+    return [[cell if cell in (" ", "B", "W") else "x" for cell in row] for row in board.get_game_board()]
+
+
+def test_backends_are_registered():
+    assert BOARD_BACKENDS == {"list": Board, "bitboard": BitBoard}
+    with pytest.raises(ValueError):
+        GessGame(backend="abacus")
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_backends_agree_on_every_request(seed):
+    rng = random.Random(seed)
+    games = [GessGame(backend="list"), GessGame(backend="bitboard")]
+    columns = "abcdefghijklmnopqrst"
+    for request in range(400):
+        if rng.random() < 0.5:
+            move = games[0].random_move(rng)
+            if move is None:
+                break
+        else:
+            # a request that is often not legal: any start, and an end up to four squares away
+            start_row, start_column = rng.randint(1, 20), rng.randrange(20)
+            end_row = max(1, min(20, start_row + rng.randint(-4, 4)))
+            end_column = max(0, min(19, start_column + rng.randint(-4, 4)))
+            move = (columns[start_column] + str(start_row), columns[end_column] + str(end_row))
+
+        results = [game.make_move(*move) for game in games]
+        assert results[0] == results[1], move
+        assert cell_kinds(games[0].get_board()) == cell_kinds(games[1].get_board())
+        assert games[0].get_whose_turn() == games[1].get_whose_turn()
+        assert games[0].get_game_state() == games[1].get_game_state()
+
+
+def test_bitboard_counts_stones():
+    board = BitBoard()
+    assert board.count_stones("B") == board.count_stones("W") == Board().count_stones("B")
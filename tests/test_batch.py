@@ -0,0 +1,76 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks BatchGessGame against GessGame game by game - random games, mostly illegal requests, legality
+#              checks and rings.
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from GessGame import GessGame, SQUARE_NAMES, SQUARE_INDICES
+from BatchGessGame import BatchGessGame, random_games
+
+
+def same_games(batch, games):
+    return all(batch.get_game(number).to_snapshot() == game.to_snapshot() for number, game in enumerate(games))
+
+
+def test_random_games_match():
+    starts, ends = random_games(32, 40, 3)
+    batch = BatchGessGame(32)
+    games = [GessGame() for number in range(32)]
+    for ply in range(40):
+        made = batch.make_moves(starts[ply], ends[ply])
+        for number, game in enumerate(games):
+            if starts[ply, number] >= 0:
+                assert game.make_move(SQUARE_NAMES[starts[ply, number]], SQUARE_NAMES[ends[ply, number]])
+                assert made[number]
+            else:
+                assert not made[number]
+        assert same_games(batch, games)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_requests_match_make_move(seed):
+    rng = random.Random(seed)
+    games = []
+    for number in range(24):
+        game = GessGame()
+        for ply in range(rng.randrange(30)):
+            move = game.random_move(rng)
+            if move is None:
+                break
+            game.make_move(*move)
+        games.append(game)
+    batch = BatchGessGame.from_games(games)
+    assert same_games(batch, games)
+
+    for step in range(20):
+        # half legal moves, half random pairs - most of them illegal, some taking stones off the edge
+        moves = []
+        for game in games:
+            move = game.random_move(rng) if rng.random() < 0.5 else None
+            moves.append(move or (rng.choice(SQUARE_NAMES), rng.choice(SQUARE_NAMES)))
+        starts = np.array([SQUARE_INDICES[start] for start, end in moves])
+        ends = np.array([SQUARE_INDICES[end] for start, end in moves])
+
+        legal = batch.is_legal(starts, ends)
+        assert list(legal) == [game.is_legal(*move) for game, move in zip(games, moves)]
+        made = batch.make_moves(starts, ends)
+        assert list(made) == [game.make_move(*move) for game, move in zip(games, moves)]
+        assert same_games(batch, games)
+
+
+def test_rings_match():
+    starts, ends = random_games(16, 30, 5)
+    batch = BatchGessGame(16)
+    for ply in range(30):
+        batch.make_moves(starts[ply], ends[ply])
+    for color in ("B", "W"):
+        rings = batch.get_rings(color)
+        for number in range(16):
+            board = batch.get_game(number).get_board()
+            expected = {(row - 3, column - 3) for row, column in board.get_rings(color)}
+            assert {tuple(center) for center in np.argwhere(rings[number])} == expected
@@ -0,0 +1,131 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks LRUCache and the two caches shared by every game - eviction order, statistics, use from several
+#              threads at once, and that cached footprint classifications and is_legal answers match the rules.
+
+import random
+import threading
+
+import pytest
+
+from GessGame import GessGame, LRUCache, BOARD_BACKENDS, FOOTPRINT_CACHE, LEGALITY_CACHE, FOOTPRINT_STEPS, \
+    classify_footprint, cache_stats
+
+
+def test_least_recently_used_entry_is_dropped():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_put_of_a_stored_key_replaces_it_and_makes_it_most_recent():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_stats_and_clear():
+    cache = LRUCache(4)
+    assert cache.get_hit_rate() == 0.0
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("z")
+    assert cache.get_stats() == {"hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5, "size": 1,
+                                 "capacity": 4}
+    cache.clear()
+    assert cache.get_stats() == {"hits": 0, "misses": 0, "evictions": 0, "hit_rate": 0.0, "size": 0,
+                                 "capacity": 4}
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+def test_cache_is_safe_to_share_between_threads():
+    cache = LRUCache(64)
+    errors = []
+    start = threading.Barrier(8)
+
+    def hammer(seed):
+        rng = random.Random(seed)
+        try:
+            start.wait()
+            for step in range(20000):
+                key = rng.randrange(128)
+                value = cache.get(key)
+                if value is None:
+                    cache.put(key, key + 1)
+                else:
+                    assert value == key + 1
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=hammer, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stats = cache.get_stats()
+    assert stats["size"] <= 64
+    assert stats["hits"] + stats["misses"] == 8 * 20000
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+def test_classify_matches_the_footprint(backend):
+    rng = random.Random(3)
+    game = GessGame(backend=backend)
+    for ply in range(40):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+
+    # centers whose footprints stay inside the edge
+    board = game.get_board().get_game_board()
+    for row in range(3, 19):
+        for column in range(3, 19):
+            cells = [board[row + row_step][column + column_step] for row_step, column_step in FOOTPRINT_STEPS]
+            assert game.get_board().classify([row, column]) == classify_footprint(cells)
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+def test_cached_is_legal_answers_match_make_move(backend):
+    rng = random.Random(1)
+    game = GessGame(backend=backend)
+    for ply in range(15):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+    assert game.get_game_state() == "UNFINISHED"
+
+    moves = list(game.legal_moves())[:30] + [("c3", "d5"), ("a1", "a2"), ("m10", "m11")]
+    expected = []
+    for move in moves:
+        trial = game.clone()
+        expected.append(trial.make_move(*move))
+
+    before = LEGALITY_CACHE.get_stats()["hits"]
+    for repeat in range(2):
+        assert [game.is_legal(*move) for move in moves] == expected
+    assert LEGALITY_CACHE.get_stats()["hits"] - before >= len(moves)
+
+
+def test_cache_stats_reports_both_caches():
+    stats = cache_stats()
+    assert stats["footprints"]["capacity"] == FOOTPRINT_CACHE.get_capacity()
+    assert stats["legality"]["capacity"] == LEGALITY_CACHE.get_capacity()
@@ -0,0 +1,81 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks GessGame.clone and GessGame.reset on both backends, and the reuse of games by GamePool.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, GamePool, BOARD_BACKENDS
+
+
+def game_state(game):
+    board = game.get_board()
+    return (list(board.get_cells()), board.get_edge_mask(), game.get_hash(), game.get_whose_turn(),
+            game.get_game_state(), sorted(board.get_rings("B")), sorted(board.get_rings("W")))
+
+
+def play(game, rng, plies):
+    for ply in range(plies):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.push_move(*move)
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(3))
+def test_clone_is_independent(backend, seed):
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    play(game, rng, 10)
+    game.get_features()
+    before = game_state(game)
+    copy = game.clone()
+    assert game_state(copy) == before
+    assert list(copy.get_features()) == list(game.get_features())
+
+    play(copy, rng, 10)
+    assert game_state(game) == before
+    # the copy has the undo stack of the game, and taking moves back on it leaves the game alone
+    while copy.pop_move() is not None:
+        pass
+    assert game_state(copy) == game_state(GessGame(backend=backend))
+    assert game_state(game) == before
+    assert game.pop_move() is not None
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+def test_reset(backend):
+    rng = random.Random(5)
+    game = GessGame(backend=backend)
+    game.get_features()
+    play(game, rng, 30)
+    game.resign_game()
+    board = game.get_board()
+    game.reset()
+    assert game.get_board() is board
+    assert game_state(game) == game_state(GessGame(backend=backend))
+    assert list(game.get_features()) == list(GessGame(backend=backend).get_features())
+    assert game.pop_move() is None
+    assert game.make_move("c3", "c5")
+
+
+def test_pool_reuses_games():
+    pool = GamePool(max_size=2)
+    games = [pool.acquire() for number in range(3)]
+    assert len({id(game) for game in games}) == 3
+    for game in games:
+        game.make_move("c3", "c5")
+        pool.release(game)
+    assert pool.get_stats() == {"created": 3, "reused": 0, "free": 2}
+
+    again = pool.acquire()
+    assert again in games
+    assert game_state(again) == game_state(GessGame())
+    assert pool.get_stats() == {"created": 3, "reused": 1, "free": 1}
+
+
+def test_pool_refuses_unknown_backend():
+    with pytest.raises(ValueError):
+        GamePool(backend="abacus")
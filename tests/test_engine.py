@@ -0,0 +1,89 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks SearchEngine - it finds a win in one, keeps mate scores right through the transposition
+#              table, skips illegal moves and rejects a depth it cannot search.
+
+import pytest
+
+from GessGame import GessGame, SQUARE_INDICES
+from GessEngine import SearchEngine, MATE_SCORE, MAX_DEPTH, score_to_table, score_from_table
+from TranspositionTable import TranspositionTable
+
+# after these moves white can win in one
+WIN_IN_ONE = [("n8", "p6"), ("g18", "h17"), ("c6", "c8"), ("r17", "q18"), ("s3", "r2"), ("b15", "d13"),
+              ("i4", "j3")]
+
+
+def win_in_one_game():
+    game = GessGame()
+    for move in WIN_IN_ONE:
+        assert game.make_move(*move)
+    return game
+
+
+def test_finds_a_win_in_one():
+    game = win_in_one_game()
+    engine = SearchEngine()
+    move = engine.best_move(game, time_ms=None, depth=3)
+    assert engine.get_info()["score"] == MATE_SCORE - 1
+    assert engine.get_info()["depth"] == 1
+    assert game.get_game_state() == "UNFINISHED"
+    assert game.make_move(*move)
+    assert game.get_game_state() == "WHITE_WON"
+
+
+def test_mate_scores_through_the_table():
+    game = win_in_one_game()
+    table = TranspositionTable(memory_bytes=1 << 20)
+    engine = SearchEngine(table)
+    engine._game = game
+    engine._killers = [[-1, -1] for ply in range(MAX_DEPTH + 1)]
+
+    # found three plies below the root, the win is a ply away - and kept in the table as a ply away
+    assert engine.search(2, -MATE_SCORE - 1, MATE_SCORE + 1, 3) == MATE_SCORE - 4
+    assert table.probe(game.get_hash())[1] == MATE_SCORE - 1
+
+    # read back five plies below the root, it is still a ply away
+    assert engine.search(2, -MATE_SCORE - 1, MATE_SCORE + 1, 5) == MATE_SCORE - 6
+
+
+@pytest.mark.parametrize("score", [0, 1234, -1234, MATE_SCORE - 1, MATE_SCORE - 7, -MATE_SCORE + 3])
+@pytest.mark.parametrize("ply", [0, 1, 5])
+def test_table_scores_round_trip(score, ply):
+    assert score_from_table(score_to_table(score, ply), ply) == score
+
+
+def test_table_mate_scores_count_from_the_position():
+    # a win one ply below a position at ply 4 scores MATE_SCORE - 5 there, and MATE_SCORE - 3 at ply 2
+    assert score_to_table(MATE_SCORE - 5, 4) == MATE_SCORE - 1
+    assert score_from_table(MATE_SCORE - 1, 2) == MATE_SCORE - 3
+    assert score_to_table(-MATE_SCORE + 5, 4) == -MATE_SCORE + 1
+
+
+def test_illegal_move_is_skipped():
+    game = GessGame()
+    engine = SearchEngine()
+    engine._game = game
+    # a move of black's from a square with no stones
+    move = SQUARE_INDICES["j10"] * 400 + SQUARE_INDICES["j11"]
+    assert engine.search_move(move, 1, -MATE_SCORE - 1, MATE_SCORE + 1, 1) is None
+    assert game.get_hash() == GessGame().get_hash()
+
+
+def test_best_move_leaves_the_game_alone():
+    game = GessGame()
+    before = (list(game.get_board().get_cells()), game.get_hash())
+    move = SearchEngine().best_move(game, time_ms=None, depth=2)
+    assert game.is_legal(*move)
+    assert (list(game.get_board().get_cells()), game.get_hash()) == before
+
+
+@pytest.mark.parametrize("depth", [0, -1, MAX_DEPTH + 1])
+def test_bad_depth(depth):
+    with pytest.raises(ValueError):
+        SearchEngine().best_move(GessGame(), time_ms=100, depth=depth)
+
+
+def test_needs_a_limit():
+    with pytest.raises(ValueError):
+        SearchEngine().best_move(GessGame(), time_ms=None, depth=None)
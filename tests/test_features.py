@@ -0,0 +1,92 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks FeatureTracker - the features kept move by move match a tracker built from scratch and a
+#              plain count from the definitions in GessGame.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, BOARD_BACKENDS, FEATURE_NAMES, DIRECTIONS, STRIDE, FeatureTracker
+
+
+def counted_features(game):
+    """
+    :return: the features of FEATURE_NAMES counted from the board, by name, without the tables of the tracker
+    """
+    grid = game.get_board().get_game_board()
+
+    def stone(row, column):
+        return grid[row][column] if 2 <= row <= 19 and 2 <= column <= 19 and grid[row][column] in ("B", "W") \
+            else None
+
+    features = {}
+    reach = {"B": set(), "W": set()}
+    for color, other, name in (("B", "W", "black"), ("W", "B", "white")):
+        features[name + "_stones"] = sum(row.count(color) for row in grid)
+        features[name + "_rings"] = len(game.get_board().get_rings(color))
+        pieces = 0
+        short_reach = 0
+        for row in range(1, 20):
+            for column in range(1, 21):
+                footprint = [stone(row + row_step, column + column_step)
+                             for row_step in (-1, 0, 1) for column_step in (-1, 0, 1)]
+                if other in footprint:
+                    continue
+                steps = 0
+                for row_step, column_step in DIRECTIONS:
+                    if stone(row + row_step, column + column_step) == color:
+                        for distance in range(1, 4):
+                            end = (row + row_step * distance, column + column_step * distance)
+                            if 1 <= end[0] <= 19 and 1 <= end[1] <= 20:
+                                steps += 1
+                                reach[color].add(end)
+                pieces += steps > 0
+                short_reach += steps
+        features[name + "_directed_pieces"] = pieces
+        features[name + "_short_reach"] = short_reach
+
+    for color, other, name in (("B", "W", "black"), ("W", "B", "white")):
+        features[name + "_rings_in_reach"] = sum(
+            1 for ring in game.get_board().get_rings(color)
+            if any(abs(end[0] - ring[0]) <= 2 and abs(end[1] - ring[1]) <= 2 for end in reach[other]))
+    return features
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(3))
+def test_features_kept_up_to_date(backend, seed):
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    game.get_features()
+    for ply in range(60):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.push_move(*move)
+        if rng.random() < 0.3:
+            game.pop_move()
+        # a bad request can take stones off the edge before it is turned down
+        game.make_move(rng.choice(("b", "k", "t")) + str(rng.randint(1, 20)), "j" + str(rng.randint(1, 20)))
+        kept = list(game.get_features())
+        assert kept == list(FeatureTracker(game.get_board()).get_values())
+        if ply % 10 == 0:
+            assert dict(zip(FEATURE_NAMES, kept)) == counted_features(game)
+
+
+def test_starting_features():
+    game = GessGame()
+    features = dict(zip(FEATURE_NAMES, game.get_features()))
+    assert features == counted_features(game)
+    assert features["black_stones"] == features["white_stones"] == 43
+    assert features["black_rings"] == features["white_rings"] == 1
+    assert features["black_rings_in_reach"] == features["white_rings_in_reach"] == 0
+
+
+def test_reach_of_a_center():
+    game = GessGame()
+    tracker = game.get_board().get_features()
+    # c5 is two steps north of the piece at c3, and out of white's reach
+    black, white = tracker.get_reach([16, 3])
+    assert black > 0 and white == 0
+    assert tracker.get_ring_reach(game.get_board(), "B") == {(18, 12): 0}
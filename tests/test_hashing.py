@@ -0,0 +1,86 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks the Zobrist hash kept move by move against one computed from scratch, and the bounded
+#              TranspositionTable.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, BOARD_BACKENDS
+from TranspositionTable import TranspositionTable, EXACT, LOWER_BOUND, SLOT_BYTES
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(4))
+def test_hash_matches_hash_from_scratch(backend, seed):
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    for ply in range(80):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+        board = game.get_board()
+        kept = board.get_hash()
+        board.find_hash()
+        assert board.get_hash() == kept
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_backends_agree_on_hash(seed):
+    rng = random.Random(seed)
+    games = [GessGame(backend=backend) for backend in sorted(BOARD_BACKENDS)]
+    for ply in range(60):
+        move = games[0].random_move(rng)
+        if move is None:
+            break
+        assert all(game.make_move(*move) for game in games)
+        assert len({game.get_hash() for game in games}) == 1
+
+
+def test_hash_depends_on_whose_turn_and_transpositions_meet():
+    first = GessGame()
+    for move in (("c3", "c5"), ("q18", "r18"), ("r3", "r5")):
+        first.make_move(*move)
+    second = GessGame()
+    for move in (("r3", "r5"), ("q18", "r18"), ("c3", "c5")):
+        second.make_move(*move)
+    assert first.get_hash() == second.get_hash()
+    assert first.get_board().get_hash() != GessGame().get_board().get_hash()
+    assert GessGame().get_hash() != first.get_hash()
+
+
+def test_transposition_table_store_and_probe():
+    table = TranspositionTable(memory_bytes=64 * SLOT_BYTES)
+    assert table.get_capacity() == 64
+    assert table.probe(12345) is None
+    table.store(12345, 3, -17, EXACT, move=42)
+    assert table.probe(12345) == (3, -17, EXACT, 42)
+    assert table.get_hit_rate() == 0.5
+
+
+def test_transposition_table_prefers_deeper_entries():
+    table = TranspositionTable(memory_bytes=2 * SLOT_BYTES)
+    table.store(1, 6, 10, EXACT)
+    table.store(2, 2, 20, LOWER_BOUND)
+    table.store(3, 1, 30, EXACT)
+    # the deep entry keeps its slot; the always-replace slot holds the newest shallow entry
+    assert table.probe(1) == (6, 10, EXACT, -1)
+    assert table.probe(2) is None
+    assert table.probe(3) == (1, 30, EXACT, -1)
+
+    # entries of an earlier search are replaced first
+    table.new_search()
+    table.store(4, 1, 40, EXACT)
+    assert table.probe(4) == (1, 40, EXACT, -1)
+    assert table.probe(1) is None
+
+
+def test_transposition_table_clear_and_budget():
+    table = TranspositionTable(memory_bytes=10 * SLOT_BYTES)
+    table.store(7, 1, 1, EXACT)
+    table.clear()
+    assert table.probe(7) is None
+    with pytest.raises(ValueError):
+        TranspositionTable(memory_bytes=SLOT_BYTES)
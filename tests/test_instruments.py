@@ -0,0 +1,109 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks GessInstruments - the events of make_move, push_move and apply_moves, the rejection reasons,
+#              the counts, detaching, and the histograms.
+
+import pytest
+
+from GessGame import GessGame, SQUARE_INDICES
+from GessInstruments import instrument, HistogramRegistry, Histogram, STAGES, REJECTION_REASONS, latency_summary
+
+
+def instrumented_game():
+    game = GessGame()
+    events = []
+    return game, events, instrument(game, events.append)
+
+
+@pytest.mark.parametrize("start, end, reason", [("c3", "c21", "off_board"), ("c18", "a2", "opponent_stones"),
+                                                ("c3", "a2", "invalid_direction"), ("e3", "i3", "invalid_distance"),
+                                                ("c3", "a3", "obstructed"), ("j3", "i2", "breaks_own_ring")])
+def test_rejection_reasons(start, end, reason):
+    game, events, instruments = instrumented_game()
+    assert not game.make_move(start, end)
+    assert [(event["start"], event["end"], event["legal"], event["reason"]) for event in events] == \
+        [(start, end, False, reason)]
+
+
+def test_game_over_reason():
+    game, events, instruments = instrumented_game()
+    game.resign_game()
+    assert not game.make_move("c3", "c5")
+    assert events[-1]["reason"] == "game_over"
+
+
+def test_legal_move_event():
+    game, events, instruments = instrumented_game()
+    assert game.make_move("c3", "c5")
+    event, = events
+    assert event["legal"] and event["reason"] is None
+    assert set(event["stages"]) == set(STAGES)
+    assert event["seconds"] >= max(event["stages"].values())
+    # the start footprint is classified for its direction and its distance, and copied before it moves
+    assert event["footprints"] == 3
+    assert event["ring_squares"] > 0
+
+
+def test_every_way_of_moving_sends_one_event():
+    game, events, instruments = instrumented_game()
+    game.make_move("c3", "c5")
+    game.push_move("q18", "r18")
+    game.pop_move()
+    game.push_move("q18", "r18")
+    assert game.apply_moves([("b8", "c7"), (SQUARE_INDICES["c18"], SQUARE_INDICES["c16"]), ("c5", "c5")]) == \
+        {"moves": 2, "illegal": 2, "game_state": "UNFINISHED"}
+    assert [(event["start"], event["end"], event["legal"]) for event in events] == \
+        [("c3", "c5", True), ("q18", "r18", True), ("q18", "r18", True), ("b8", "c7", True), ("c18", "c16", True),
+         ("c5", "c5", False)]
+    # moves of apply_moves skip make_move, so their names are not converted
+    assert "coordinate_conversion" not in events[3]["stages"]
+    assert all(event["footprints"] == 3 for event in events if event["legal"])
+
+
+def test_detach():
+    game, events, instruments = instrumented_game()
+    instruments.detach()
+    assert not instruments.is_attached()
+    assert "make_move" not in vars(game) and "classify" not in vars(game.get_board())
+    game.make_move("c3", "c5")
+    game.apply_moves([("q18", "r18")])
+    assert events == []
+    instruments.attach()
+    game.make_move("b8", "c7")
+    assert len(events) == 1
+
+
+def test_registry_totals():
+    game = GessGame()
+    registry = HistogramRegistry()
+    instrument(game, registry)
+    game.make_move("c3", "c5")
+    game.make_move("c3", "c5")
+    game.make_move("q18", "r18")
+    summary = registry.get_summary()
+    assert summary["counters"]["moves"] == 3
+    assert summary["counters"]["legal"] == 2
+    assert summary["counters"]["footprints"] == 6
+    assert summary["reasons"] == dict(dict.fromkeys(REJECTION_REASONS, 0), opponent_stones=1)
+    assert summary["histograms"]["make_move.legal"]["count"] == 2
+    assert summary["histograms"]["make_move.illegal"]["count"] == 1
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+    assert histogram.percentile(0.5) is None
+    for seconds in (0.5e-6, 3e-6, 3e-6, 100e-6, 10.0):
+        histogram.record(seconds)
+    summary = histogram.get_summary()
+    assert summary["count"] == 5
+    assert summary["buckets"] == {"1": 1, "4": 2, "128": 1, "inf": 1}
+    assert summary["p50_us"] == 4
+    assert summary["p99_us"] == summary["max_us"] == 10.0 * 1e6
+
+
+def test_latency_summary():
+    summary = latency_summary([0.001 * number for number in range(1, 101)])
+    assert summary["count"] == 100
+    assert summary["p50_us"] == pytest.approx(51000)
+    assert summary["p99_us"] == pytest.approx(100000)
+    assert summary["mean_us"] == pytest.approx(50500)
@@ -0,0 +1,61 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks the flat board layout - the per-square footprint tables, Piece as a view of the board, and
+#              that make_move on the list backend makes no Piece objects.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, Piece, STRIDE, BOARD_CELLS, CENTERS, FOOTPRINTS, PERIMETERS, FOOTPRINT_OFFSETS, \
+    FOOTPRINT_GETTERS, COVERING
+from GessBenchmark import bench_allocations
+
+
+def test_every_center_make_move_accepts_has_a_footprint():
+    assert sorted(CENTERS) == sorted(row * STRIDE + column for row in range(1, 20) for column in range(1, 21))
+    for center in range(BOARD_CELLS):
+        assert (FOOTPRINTS[center] is not None) == (center in CENTERS)
+
+
+def test_footprints_never_wrap():
+    for center in CENTERS:
+        row, column = divmod(center, STRIDE)
+        cells = [divmod(cell, STRIDE) for cell in FOOTPRINTS[center]]
+        assert cells == [(row + row_step, column + column_step)
+                         for row_step in (-1, 0, 1) for column_step in (-1, 0, 1)]
+        assert all(0 <= cell_row <= 20 and 0 <= cell_column < STRIDE for cell_row, cell_column in cells)
+        assert PERIMETERS[center] == FOOTPRINTS[center][:4] + FOOTPRINTS[center][5:]
+        assert FOOTPRINTS[center] == tuple(center + offset for offset in FOOTPRINT_OFFSETS)
+
+
+def test_covering_is_the_inverse_of_footprints():
+    for cell in range(BOARD_CELLS):
+        assert sorted(COVERING[cell]) == sorted(center for center in CENTERS if cell in FOOTPRINTS[center])
+
+
+def test_footprint_getters_copy_the_footprint():
+    cells = list(range(BOARD_CELLS))
+    for center in (STRIDE + 1, 10 * STRIDE + 10, 19 * STRIDE + 20):
+        assert FOOTPRINT_GETTERS[center](cells) == FOOTPRINTS[center]
+
+
+def test_piece_is_a_view_of_the_board():
+    game = GessGame()
+    board = game.get_board()
+    piece = board.get_piece([18, 3])
+    assert not hasattr(piece, "__dict__")
+    assert piece.cell(0, 0) == "B"
+    assert piece.valid_piece("W")
+    before = [piece.cell(row, column) for row in (-1, 0, 1) for column in (-1, 0, 1)]
+    game.make_move("c3", "c5")
+    # the piece still looks at c3, and sees what the move left there
+    after = [piece.cell(row, column) for row in (-1, 0, 1) for column in (-1, 0, 1)]
+    assert after != before
+    assert after == [board.get_game_board()[row][column] for row in (17, 18, 19) for column in (2, 3, 4)]
+    assert piece.cell(0, 0) == " "
+
+
+@pytest.mark.parametrize("backend, most", [("list", 0), ("bitboard", 2)])
+def test_make_move_allocates_few_pieces(backend, most):
+    assert bench_allocations(backend, 20, random.Random(1))["pieces_per_call"] <= most
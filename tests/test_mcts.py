@@ -0,0 +1,87 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks MCTSPlayer - playouts and searches leave the game alone, the budgets and the node cap hold,
+#              the tree is reused between moves, and both kinds of parallel search return a legal move.
+
+import random
+
+import pytest
+
+from GessGame import GessGame
+from MCTSPlayer import MCTSPlayer, playout
+
+
+def game_state(game):
+    return list(game.get_board().get_cells()), game.get_hash(), game.get_whose_turn(), game.get_game_state()
+
+
+def test_playout_leaves_the_game_alone():
+    rng = random.Random(1)
+    game = GessGame()
+    before = game_state(game)
+    for number in range(5):
+        assert playout(game, rng, 400) in ("B", "W", None)
+        assert game_state(game) == before
+
+
+def test_best_move_keeps_to_the_budget():
+    game = GessGame()
+    before = game_state(game)
+    player = MCTSPlayer()
+    move = player.best_move(game, time_ms=None, playouts=60, rng=random.Random(2))
+    assert game.is_legal(*move)
+    assert game_state(game) == before
+    info = player.get_info()
+    assert info["playouts"] == 60
+    assert info["move"] == move
+    assert info["nodes"] == 61
+
+
+def test_node_cap():
+    player = MCTSPlayer(max_nodes=10)
+    player.best_move(GessGame(), time_ms=None, playouts=50, rng=random.Random(3))
+    assert player.get_info()["nodes"] == 10
+    assert player.get_info()["playouts"] == 50
+
+
+def test_tree_is_reused():
+    rng = random.Random(4)
+    game = GessGame()
+    player = MCTSPlayer()
+    player.best_move(game, time_ms=None, playouts=400, rng=rng)
+    assert not player.get_info()["reused"]
+    game.make_move(*player.get_info()["move"])
+    player.best_move(game, time_ms=None, playouts=20, rng=rng)
+    assert player.get_info()["reused"]
+
+    # a position the tree never saw starts a new tree
+    game.make_move(*game.random_move(rng))
+    game.make_move(*game.random_move(rng))
+    game.make_move(*game.random_move(rng))
+    player.best_move(game, time_ms=None, playouts=20, rng=rng)
+    assert not player.get_info()["reused"]
+
+
+def test_finished_game_has_no_move():
+    game = GessGame()
+    game.resign_game()
+    assert MCTSPlayer().best_move(game, time_ms=None, playouts=10) is None
+
+
+@pytest.mark.parametrize("parallel", ["root", "leaf"])
+def test_parallel_search(parallel):
+    game = GessGame()
+    player = MCTSPlayer(workers=2, parallel=parallel, leaf_playouts=2, max_plies=100)
+    try:
+        move = player.best_move(game, time_ms=None, playouts=20, rng=random.Random(5))
+    finally:
+        player.close()
+    assert game.is_legal(*move)
+    assert player.get_info()["playouts"] >= 20
+
+
+def test_bad_settings():
+    with pytest.raises(ValueError):
+        MCTSPlayer(parallel="tree")
+    with pytest.raises(ValueError):
+        MCTSPlayer().best_move(GessGame(), time_ms=None, playouts=None)
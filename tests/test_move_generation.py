@@ -0,0 +1,93 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks the move generator of GessGame - legal_rays, legal_moves, count_legal_moves and random_move -
+#              against brute force: every start and end square on the board is tried with make_move.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, SQUARE_NAMES, BOARD_BACKENDS
+
+
+def brute_force_moves(game):
+    """
+    :param game: a GessGame object, left as it was
+    :return: the set of (start, end) pairs of game-board positions that make_move accepts in the game's position
+    """
+    moves = set()
+    board_hash = game.get_board().get_hash()
+    work = game.clone()
+    for start in SQUARE_NAMES:
+        for end in SQUARE_NAMES:
+            if work.make_move(start, end):
+                moves.add((start, end))
+                work = game.clone()
+            elif work.get_board().get_hash() != board_hash:
+                # a move turned down part of the way through can take stones off the edge of the board
+                work = game.clone()
+    return moves
+
+
+def random_game(backend, seed, plies):
+    """
+    :return: a GessGame object after up to the given number of random moves
+    """
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    for ply in range(plies):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+    return game
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+def test_start_position_matches_brute_force(backend):
+    game = GessGame(backend=backend)
+    moves = brute_force_moves(game)
+    assert len(moves) == 329
+    assert set(game.legal_moves()) == moves
+    assert game.count_legal_moves() == len(moves)
+    # the pieces on column t can move too
+    assert {("t2", "s3"), ("t3", "s3"), ("t4", "s3")} <= moves
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(6))
+def test_random_positions_match_brute_force(backend, seed):
+    game = random_game(backend, seed, 15 + 12 * seed)
+    moves = brute_force_moves(game)
+    generated = list(game.legal_moves())
+    assert len(generated) == len(set(generated))
+    assert set(generated) == moves
+    assert game.count_legal_moves() == len(moves)
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+def test_random_move_is_legal(backend):
+    rng = random.Random(7)
+    game = GessGame(backend=backend)
+    for ply in range(200):
+        move = game.random_move(rng)
+        if move is None:
+            assert game.get_game_state() != "UNFINISHED" or game.count_legal_moves() == 0
+            break
+        assert move in set(game.legal_moves())
+        assert game.make_move(*move)
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+def test_random_move_reaches_every_start(backend):
+    rng = random.Random(11)
+    game = GessGame(backend=backend)
+    starts = {game.random_move(rng)[0] for draw in range(3000)}
+    assert starts == {start for start, end in game.legal_moves()}
+
+
+def test_finished_game_has_no_moves():
+    game = GessGame()
+    game.resign_game()
+    assert list(game.legal_moves()) == []
+    assert game.random_move(random.Random(0)) is None
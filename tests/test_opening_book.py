@@ -0,0 +1,112 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks OpeningBook - building and looking up a book, the searched move, passing over book moves that
+#              are not legal, and handing over to another policy out of the book.
+
+import random
+
+import pytest
+
+from GessGame import GessGame
+from GameArchive import GameArchiveWriter, encode_move
+from OpeningBook import OpeningBookBuilder, OpeningBook, BookPolicy, read_records, BOOK_MAGIC, BOOK_HEADER, ENTRY, \
+    SEARCHED
+from SelfPlay import RandomPolicy
+
+GAMES = [([("c3", "c5"), ("q18", "r18"), ("b8", "c7")], "BLACK_WON"),
+         ([("c3", "c5"), ("c18", "c16")], "WHITE_WON"),
+         ([("r3", "r5"), ("q18", "r18")], "UNFINISHED")]
+
+
+def build(path, plies=8):
+    builder = OpeningBookBuilder(plies=plies)
+    for moves, result in GAMES:
+        builder.add_game(moves, result)
+    builder.write(path)
+    return builder
+
+
+def test_lookup(tmp_path):
+    path = str(tmp_path / "book.gob")
+    builder = build(path)
+    assert len(builder) == 6
+    with OpeningBook(path) as book:
+        assert len(book) == 6
+        assert book.get_plies() == 8
+        start = {entry["move"]: entry for entry in book.probe(GessGame())}
+        assert set(start) == {("c3", "c5"), ("r3", "r5")}
+        assert start[("c3", "c5")]["games"] == 2
+        # a win and a loss for black
+        assert start[("c3", "c5")]["points"] == 1.0
+        assert start[("r3", "r5")]["points"] == 1.0
+        assert not start[("c3", "c5")]["searched"]
+
+        game = GessGame()
+        game.make_move("c3", "c5")
+        assert {entry["move"] for entry in book.probe(game)} == {("q18", "r18"), ("c18", "c16")}
+        assert game.make_move("c18", "c17")
+        assert book.probe(game) == []
+
+
+def test_plies_limit_the_book(tmp_path):
+    path = str(tmp_path / "book.gob")
+    assert len(build(path, plies=1)) == 2
+
+
+def test_searched_move_comes_first(tmp_path):
+    path = str(tmp_path / "book.gob")
+    builder = OpeningBookBuilder(plies=2)
+    for moves, result in GAMES:
+        builder.add_game(moves, result)
+    assert builder.add_search(time_ms=50, min_games=3) == 1
+    builder.write(path)
+    with OpeningBook(path) as book:
+        searched = [entry for entry in book.probe(GessGame()) if entry["searched"]]
+        assert len(searched) == 1
+        assert book.choose_move(GessGame(), random.Random(1)) == searched[0]["move"]
+
+
+def test_book_moves_that_are_not_legal_are_passed_over(tmp_path):
+    path = str(tmp_path / "book.gob")
+    position_hash = GessGame().get_hash()
+    entries = sorted([(position_hash, encode_move("c18", "c16"), 0, 0, 0, SEARCHED),
+                      (position_hash, encode_move("c3", "c9"), 50, 100, 0, 0),
+                      (position_hash, encode_move("c3", "c5"), 1, 2, 0, 0)])
+    with open(path, "wb") as book:
+        book.write(BOOK_MAGIC + BOOK_HEADER.pack(len(entries), 1))
+        for entry in entries:
+            book.write(ENTRY.pack(*entry))
+    with OpeningBook(path) as book:
+        for seed in range(5):
+            assert book.choose_move(GessGame(), random.Random(seed)) == ("c3", "c5")
+        finished = GessGame()
+        finished.resign_game()
+        assert book.choose_move(finished, random.Random(0)) is None
+
+
+def test_book_policy_falls_back(tmp_path):
+    path = str(tmp_path / "book.gob")
+    build(path)
+    policy = BookPolicy(path, RandomPolicy())
+    rng = random.Random(2)
+    game = GessGame()
+    assert policy.choose_move(game, rng) in (("c3", "c5"), ("r3", "r5"))
+    game.make_move("b8", "c7")
+    move = policy.choose_move(game, rng)
+    assert game.is_legal(*move)
+
+
+def test_read_records_from_an_archive(tmp_path):
+    path = str(tmp_path / "games.gar")
+    with GameArchiveWriter(path) as writer:
+        for moves, result in GAMES:
+            writer.append(moves, result)
+    assert list(read_records(path)) == GAMES
+
+
+def test_not_a_book(tmp_path):
+    path = str(tmp_path / "book.gob")
+    with open(path, "wb") as book:
+        book.write(b"not a book at all")
+    with pytest.raises(ValueError):
+        OpeningBook(path)
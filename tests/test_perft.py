@@ -0,0 +1,35 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks the perft counts of GessBenchmark - the depth 1 counts against brute force, the depth 2
+#              counts of two positions against brute force (slow), and the move generator against every known count.
+
+import pytest
+
+from GessGame import BOARD_BACKENDS
+from GessBenchmark import POSITIONS, PERFT_COUNTS, make_position, perft
+from test_move_generation import brute_force_moves
+
+
+@pytest.mark.parametrize("name", sorted(POSITIONS))
+def test_depth_one_counts_match_brute_force(name):
+    assert len(brute_force_moves(make_position(name, "list"))) == PERFT_COUNTS[name][1]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("name", ["start", "midgame-20"])
+def test_depth_two_counts_match_brute_force(name):
+    game = make_position(name, "list")
+    nodes = 0
+    for start, end in brute_force_moves(game):
+        child = game.clone()
+        assert child.make_move(start, end)
+        nodes += len(brute_force_moves(child))
+    assert nodes == PERFT_COUNTS[name][2]
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("name", sorted(POSITIONS))
+def test_perft_matches_known_counts(backend, name):
+    game = make_position(name, backend)
+    for depth, nodes in sorted(PERFT_COUNTS[name].items()):
+        assert perft(game, depth) == nodes
@@ -0,0 +1,88 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks Position - is_legal and apply agree with make_move, apply shares the rows it does not touch
+#              and leaves its position alone, and threads can share one Position.
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from GessGame import GessGame, BOARD_BACKENDS, SQUARE_NAMES, COORDINATES
+
+
+def random_game(backend, seed, plies):
+    """
+    :return: a GessGame object after up to the given number of random moves
+    """
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    for ply in range(plies):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+    return game
+
+
+def candidate_moves(game, rng, count=200):
+    """
+    :return: every legal move of the game, and some random pairs of positions, most of them illegal
+    """
+    return list(game.legal_moves()) + [(rng.choice(SQUARE_NAMES), rng.choice(SQUARE_NAMES)) for pair in range(count)]
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(3))
+def test_is_legal_and_apply_agree_with_make_move(backend, seed):
+    rng = random.Random(seed)
+    game = random_game(backend, seed, 20 * seed)
+    position = game.get_position()
+    rows = position.get_rows()
+    for start, end in candidate_moves(game, rng):
+        legal = position.is_legal(start, end)
+        assert legal == game.is_legal(start, end)
+        if not legal:
+            with pytest.raises(ValueError):
+                position.apply(start, end)
+            continue
+
+        after = position.apply(start, end)
+        child = game.clone()
+        assert child.make_move(start, end)
+        assert GessGame.from_position(after, backend=backend).get_hash() == child.get_hash()
+        assert after.get_whose_turn() == child.get_whose_turn()
+        assert after.get_game_state() == child.get_game_state()
+        assert after.get_rings("B") == frozenset(child.get_board().get_rings("B"))
+        assert position.get_rows() is rows
+
+
+def test_apply_shares_untouched_rows():
+    position = GessGame().get_position()
+    after = position.apply("c3", "c5")
+    touched = {COORDINATES[name][0] + step for name in ("c3", "c5") for step in (-1, 0, 1)}
+    for row, (before_row, after_row) in enumerate(zip(position.get_rows(), after.get_rows())):
+        if row not in touched:
+            assert after_row is before_row
+
+
+def test_threads_share_a_position():
+    rng = random.Random(7)
+    game = random_game("list", 7, 30)
+    position = game.get_position()
+    moves = candidate_moves(game, rng, 400)
+    expected = [game.is_legal(start, end) for start, end in moves]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for repeat in range(3):
+            assert list(pool.map(lambda move: position.is_legal(*move), moves)) == expected
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(3))
+def test_position_round_trip(backend, seed):
+    game = random_game(backend, seed, 40)
+    restored = GessGame.from_position(game.get_position(), backend=backend)
+    assert restored.get_hash() == game.get_hash()
+    assert restored.get_whose_turn() == game.get_whose_turn()
+    assert restored.get_game_state() == game.get_game_state()
+    assert set(restored.legal_moves()) == set(game.legal_moves())
@@ -0,0 +1,82 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks the sliding-ray tables, slide_length against a step-by-step walk, and that the occupancy map
+#              kept up to date move by move matches one built from scratch.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, BOARD_BACKENDS, DIRECTIONS, RAYS, CENTERS, STRIDE
+
+
+def random_game(backend, seed, plies):
+    """
+    :return: a GessGame object after up to the given number of random moves
+    """
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    for ply in range(plies):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+    return game
+
+
+def test_rays_follow_the_directions():
+    for center in CENTERS:
+        row, column = divmod(center, STRIDE)
+        for index, (row_step, column_step) in enumerate(DIRECTIONS):
+            walk = []
+            distance = 1
+            while 1 <= row + row_step * distance <= 19 and 1 <= column + column_step * distance <= 20:
+                walk.append((row + row_step * distance) * STRIDE + column + column_step * distance)
+                distance += 1
+            assert RAYS[center][index] == tuple(walk)
+
+
+def walk_length(board, location, direction, limit):
+    """
+    :return: the number of empty footprints met one after another when sliding from location, found one step at a
+             time with is_empty
+    """
+    length = 0
+    for center in RAYS[location[0] * STRIDE + location[1]][direction]:
+        if length == limit or not board.is_empty(list(divmod(center, STRIDE))):
+            break
+        length += 1
+    return length
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(4))
+def test_slide_length_matches_a_walk(backend, seed):
+    rng = random.Random(seed)
+    board = random_game(backend, seed, 15 * seed).get_board()
+    for sample in range(300):
+        location = list(divmod(rng.choice(CENTERS), STRIDE))
+        direction = rng.randrange(8)
+        limit = rng.choice((1, 3, 19))
+        assert board.slide_length(location, direction, limit) == walk_length(board, location, direction, limit)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_occupancy_kept_up_to_date(seed):
+    rng = random.Random(seed)
+    game = GessGame()
+    board = game.get_board()
+    board.find_occupancy()
+    for ply in range(60):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        if rng.random() < 0.3:
+            game.push_move(*move)
+            game.pop_move()
+        game.make_move(*move)
+        # a bad request can take stones off the edge before it is turned down
+        game.make_move(rng.choice(("b", "k", "t")) + str(rng.randint(1, 20)), "j" + str(rng.randint(1, 20)))
+        kept = list(board._occupancy)
+        board.find_occupancy()
+        assert board._occupancy == kept
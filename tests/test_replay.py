@@ -0,0 +1,80 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks ReplayValidator - parsing both formats, the problems found in a game, and a run over a file
+#              that reports its problems in the order of the file.
+
+import json
+import random
+
+import pytest
+
+from GessGame import GessGame
+from ReplayValidator import ReplayValidator, parse_game, replay_game, validate_chunk, file_format
+
+
+def random_record(seed, plies=40):
+    rng = random.Random(seed)
+    game = GessGame()
+    moves = []
+    for ply in range(plies):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+        moves.append(list(move))
+    return {"seed": seed, "moves": moves, "result": game.get_game_state()}
+
+
+def test_parse_game():
+    assert parse_game('{"moves": [["c3", "c5"]], "result": "UNFINISHED"}', "jsonl") == ([("c3", "c5")], "UNFINISHED")
+    assert parse_game("c3-c5 q18-r18 UNFINISHED", "text") == ([("c3", "c5"), ("q18", "r18")], "UNFINISHED")
+    assert parse_game("c3-c5", "text") == ([("c3", "c5")], None)
+    with pytest.raises(ValueError):
+        parse_game("c3c5", "text")
+    assert file_format("games.jsonl") == "jsonl" and file_format("games.txt") == "text"
+
+
+def test_replay_game_problems():
+    assert replay_game([("c3", "c5"), ("q18", "r18")], "UNFINISHED") is None
+    assert replay_game([("c3", "c5"), ("c5", "c7")], None) == \
+        {"problem": "illegal_move", "ply": 2, "move": ["c5", "c7"]}
+    assert replay_game([("c3", "c5"), ("zz", "")], None)["problem"] == "illegal_move"
+    assert replay_game([("c3", "c5")], "BLACK_WON") == \
+        {"problem": "result_mismatch", "recorded": "BLACK_WON", "replayed": "UNFINISHED"}
+
+
+def test_validate_chunk():
+    chunk = [(1, "c3-c5 UNFINISHED"), (2, "not-a move"), (3, '{"moves": 5}'), (4, "c3-c5 q18-r18 c5-c7")]
+    problems, games, moves = validate_chunk(chunk, "text", "list")
+    assert games == 4
+    assert [(problem["line"], problem["problem"]) for problem in problems] == \
+        [(2, "bad_record"), (3, "bad_record"), (4, "illegal_move")]
+    problems, games, moves = validate_chunk(chunk[2:3], "jsonl", "list")
+    assert [problem["problem"] for problem in problems] == ["bad_record"]
+
+
+@pytest.mark.parametrize("workers, chunk_size", [(1, 100), (2, 3)])
+def test_run_reports_problems_in_file_order(tmp_path, workers, chunk_size):
+    path = str(tmp_path / "games.jsonl")
+    broken = {4: "illegal", 9: "result", 13: "bad"}
+    expected = []
+    with open(path, "w") as games:
+        games.write("# comment lines and blank lines are skipped\n\n")
+        for number in range(20):
+            record = random_record(number)
+            if broken.get(number) == "illegal":
+                record["moves"].insert(1, ["c3", "d5"])
+            elif broken.get(number) == "result":
+                record["result"] = "WHITE_WON" if record["result"] != "WHITE_WON" else "BLACK_WON"
+            line = json.dumps(record) if broken.get(number) != "bad" else "{not json"
+            games.write(line + "\n")
+            if number in broken:
+                expected.append(number + 3)
+
+    validator = ReplayValidator(workers=workers, chunk_size=chunk_size)
+    problems = list(validator.run(path))
+    assert [problem["line"] for problem in problems] == expected
+    assert [problem["problem"] for problem in problems] == ["illegal_move", "result_mismatch", "bad_record"]
+    stats = validator.get_stats()
+    assert stats["games"] == 20
+    assert stats["problems"] == 3
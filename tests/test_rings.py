@@ -0,0 +1,47 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks the ring index that the boards keep up to date as pieces are moved, against a full rescan of
+#              the board, and the game states still_in and still_in_double_check work out from it.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, BOARD_BACKENDS
+
+
+def rescanned_rings(game):
+    """
+    :return: the ring centers of each color of a copy of the game's board, found by checking every square
+    """
+    board = game.clone().get_board()
+    board.find_rings()
+    return {color: board.get_rings(color) for color in ("B", "W")}
+
+
+def test_start_position_has_one_ring_each():
+    game = GessGame()
+    assert game.get_rings("B") == frozenset({"l3"})
+    assert game.get_rings("W") == frozenset({"l18"})
+    assert game.get_board().get_rings("B") == frozenset({(18, 12)})
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(6))
+def test_ring_index_matches_rescan(backend, seed):
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    for ply in range(150):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+        rings = rescanned_rings(game)
+        assert {color: game.get_board().get_rings(color) for color in ("B", "W")} == rings
+
+        # a move that breaks the opponent's last ring wins (a move can also fill in the mover's own last ring as the
+        # piece lands, which leaves the game going, as the original rules code does)
+        if game.get_game_state() != "UNFINISHED":
+            loser = "W" if game.get_game_state() == "BLACK_WON" else "B"
+            assert not rings[loser]
+            break
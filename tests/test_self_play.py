@@ -0,0 +1,75 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks SelfPlay - the records replay, a run plays every seed once however it is spread over the
+#              workers, and only a few batches per worker are in flight.
+
+from concurrent.futures import Future
+
+import SelfPlay
+from GessGame import GessGame
+from SelfPlay import RandomPolicy, SelfPlayRunner, play_game
+
+
+class InlinePool:
+    """
+    Stands in for ProcessPoolExecutor: runs each call as it is submitted and counts the submissions.
+    """
+    submitted = 0
+
+    def __init__(self, max_workers=None):
+        InlinePool.submitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, function, *args):
+        InlinePool.submitted += 1
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+
+def replay(record):
+    game = GessGame()
+    for start, end in record["moves"]:
+        assert game.make_move(start, end)
+    return game.get_game_state()
+
+
+def test_random_games_replay():
+    policy = RandomPolicy()
+    for seed in range(5):
+        record = play_game(policy, policy, seed, max_plies=200)
+        assert record["seed"] == seed
+        assert replay(record) == record["result"]
+        assert play_game(policy, policy, seed, max_plies=200) == record
+
+
+def test_random_policy_has_no_move_in_a_finished_game():
+    game = GessGame()
+    game.resign_game()
+    assert RandomPolicy().choose_move(game, None) is None
+
+
+def test_run_plays_every_seed_once():
+    runner = SelfPlayRunner(workers=2, batch_size=3, max_plies=60)
+    records = [record for batch in runner.run(10, seed=5) for record in batch]
+    assert sorted(record["seed"] for record in records) == list(range(5, 15))
+    policy = RandomPolicy()
+    for record in records:
+        assert record == play_game(policy, policy, record["seed"], max_plies=60)
+    stats = runner.get_stats()
+    assert sum(worker["games"] for worker in stats.values()) == 10
+
+
+def test_batches_in_flight_are_bounded(monkeypatch):
+    monkeypatch.setattr(SelfPlay, "ProcessPoolExecutor", InlinePool)
+    runner = SelfPlayRunner(workers=2, batch_size=1, max_plies=4, in_flight=3)
+    batches = runner.run(50)
+    next(batches)
+    assert InlinePool.submitted == 6
+    assert sum(len(batch) for batch in batches) == 49
+    assert InlinePool.submitted == 50
@@ -0,0 +1,125 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks the requests and responses of GessServer, through handle_line and over a real connection.
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from GessServer import GessServer, GessClient
+
+
+def answer(server, request):
+    """
+    :param server: a GessServer object
+    :param request: a request, as a dictionary, or a line of text
+    :return: the response to the request
+    """
+    line = request if isinstance(request, str) else json.dumps(request)
+    return asyncio.run(server.handle_line(line))
+
+
+def test_create_move_and_state():
+    server = GessServer()
+    created = answer(server, {"command": "create", "backend": "list", "id": 7})
+    assert created["ok"] and created["id"] == 7 and created["whose_turn"] == "B"
+    session = created["session"]
+
+    moved = answer(server, {"command": "move", "session": session, "start": "c3", "end": "c5"})
+    assert moved["ok"] and moved["legal"] and moved["whose_turn"] == "W"
+    refused = answer(server, {"command": "move", "session": session, "start": "c3", "end": "c5"})
+    assert refused["ok"] and not refused["legal"]
+    assert answer(server, {"command": "state", "session": session})["snapshot"] == moved["snapshot"]
+    assert answer(server, {"command": "close", "session": session})["closed"] == session
+    assert not answer(server, {"command": "state", "session": session})["ok"]
+
+
+@pytest.mark.parametrize("request_text", [
+    '{"command": "create", "time_ms": null}',
+    '{"command": "create", "time_ms": 1e400}',
+    '{"command": "create", "time_ms": Infinity}',
+    '{"command": "create", "time_ms": NaN}',
+    '{"command": "create", "time_ms": 2.5}',
+    '{"command": "create", "time_ms": -1}',
+    '{"command": "create", "time_ms": 100000000}',
+    '{"command": "create", "time_ms": true}',
+    '{"command": "create", "seed": 1e400}',
+    '{"command": "create", "seed": "x"}',
+    '{"command": "create", "backend": [1]}',
+    '{"command": "create", "bot": ["random"]}',
+    '{"command": "create", "bot_color": "X"}',
+    '{"command": "state", "session": [1]}',
+    '{"command": "state", "session": "no such session"}',
+    '{"command": "dance"}',
+    '[1, 2]',
+    'not json',
+])
+def test_bad_requests_get_an_error(request_text):
+    response = answer(GessServer(), request_text)
+    assert response["ok"] is False
+    assert isinstance(response["error"], str)
+
+
+def test_whole_floats_are_integers():
+    response = answer(GessServer(), {"command": "create", "time_ms": 250.0, "seed": 3.0})
+    assert response["ok"]
+
+
+@pytest.mark.parametrize("start, end", [("a²", "c5"), ("c3", "c٥"), ("c", "c5"), ("c3", 5), ("3c", "c5")])
+def test_bad_squares_get_an_error(start, end):
+    server = GessServer()
+    session = answer(server, {"command": "create"})["session"]
+    response = answer(server, {"command": "move", "session": session, "start": start, "end": end})
+    assert response == {"ok": False, "error": "start and end must be game-board positions, such as 'm3'"}
+
+
+def test_resign_only_while_the_game_is_on():
+    server = GessServer()
+    session = answer(server, {"command": "create"})["session"]
+    assert answer(server, {"command": "resign", "session": session})["game_state"] == "WHITE_WON"
+    response = answer(server, {"command": "resign", "session": session})
+    assert response == {"ok": False, "error": "the game is over"}
+    assert answer(server, {"command": "state", "session": session})["game_state"] == "WHITE_WON"
+
+
+def test_bot_replies():
+    async def play():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            server = GessServer(executor=executor)
+            created = await server.handle_line(json.dumps({"command": "create", "bot": "random", "bot_color": "W"}))
+            moved = await server.handle_line(json.dumps({"command": "move", "session": created["session"],
+                                                         "start": "c3", "end": "c5"}))
+            return moved
+
+    moved = asyncio.run(play())
+    assert moved["ok"] and moved["legal"]
+    assert moved["reply"] is not None and moved["whose_turn"] == "B"
+
+
+def test_connection_survives_bad_requests_and_closes_on_long_lines():
+    async def talk():
+        server = GessServer(port=0)
+        await server.start()
+        try:
+            client = GessClient(port=server.get_port())
+            await client.connect()
+            bad = await client.create(time_ms=float("inf"))
+            good = await client.create()
+            await client.close()
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.get_port())
+            writer.write(b'{"command": "create", "pad": "' + b"x" * 100000 + b'"}\n')
+            await writer.drain()
+            too_long = json.loads(await reader.readline())
+            closed = await reader.readline()
+            writer.close()
+            return bad, good, too_long, closed
+        finally:
+            await server.close()
+
+    bad, good, too_long, closed = asyncio.run(talk())
+    assert bad["ok"] is False and good["ok"] is True
+    assert too_long == {"ok": False, "error": "bad request: line too long"}
+    assert closed == b""
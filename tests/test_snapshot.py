@@ -0,0 +1,75 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks the text and binary snapshots of a game - round trips across the board backends, and bad
+#              snapshots.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, BOARD_BACKENDS
+
+
+def random_game(backend, seed, plies):
+    """
+    :return: a (game, moves) tuple - a GessGame object after up to the given number of random moves, and the moves
+    """
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    moves = []
+    for ply in range(plies):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+        moves.append(move)
+    return game, moves
+
+
+def cell_kinds(game):
+    """
+    :return: the cells of the board inside the edge, with every non-blank cell that is not a stone as "x" - snapshots
+             keep which cells are not blank, but not what is written in them
+    """
+    return [cell if cell in (" ", "B", "W") else "x" for cell in game.get_board().get_cells()]
+
+
+def same_game(first, second):
+    """
+    :return: True if the two games have the same board, edge cells, hash, turn and game state
+    """
+    return (cell_kinds(first) == cell_kinds(second) and
+            first.get_board().get_edge_mask() == second.get_board().get_edge_mask() and
+            first.get_hash() == second.get_hash() and
+            first.get_whose_turn() == second.get_whose_turn() and
+            first.get_game_state() == second.get_game_state())
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("binary", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_snapshot_round_trip(backend, binary, seed):
+    game, moves = random_game(backend, seed, 10 + 20 * seed)
+    snapshot = game.to_snapshot(binary=binary)
+    for other_backend in sorted(BOARD_BACKENDS):
+        restored = GessGame.from_snapshot(snapshot, backend=other_backend)
+        assert restored.to_snapshot(binary=binary) == snapshot
+        assert same_game(restored, game)
+        assert set(restored.legal_moves()) == set(game.legal_moves())
+
+
+def test_snapshot_keeps_game_state():
+    game = GessGame()
+    game.make_move("c3", "c5")
+    game.resign_game()
+    for binary in (False, True):
+        restored = GessGame.from_snapshot(game.to_snapshot(binary=binary))
+        assert restored.get_game_state() == "BLACK_WON"
+        assert restored.get_whose_turn() == "W"
+
+
+@pytest.mark.parametrize("snapshot", ["", "18/18 B UNFINISHED", GessGame().to_snapshot().replace(" B ", " X "),
+                                      b"\x00" * 5])
+def test_bad_snapshots_are_refused(snapshot):
+    with pytest.raises(ValueError):
+        GessGame.from_snapshot(snapshot)
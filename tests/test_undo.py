@@ -0,0 +1,65 @@
+# Author: Phoenix Harris
+# Date: 5.27.2020
+# Description: Checks that push_move and pop_move put a game back exactly as it was, on both board backends.
+
+import random
+
+import pytest
+
+from GessGame import GessGame, BOARD_BACKENDS
+
+
+def game_state(game):
+    """
+    :return: everything push_move and pop_move have to put back - the cells, the edge cells, the hash, whose turn
+             it is and the game state
+    """
+    board = game.get_board()
+    return (list(board.get_cells()), board.get_edge_mask(), game.get_hash(), game.get_whose_turn(),
+            game.get_game_state())
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+@pytest.mark.parametrize("seed", range(4))
+def test_pop_move_undoes_push_move(backend, seed):
+    rng = random.Random(seed)
+    game = GessGame(backend=backend)
+    states = []
+    moves = []
+    for ply in range(80):
+        move = game.random_move(rng)
+        if move is None:
+            break
+        states.append(game_state(game))
+        assert game.push_move(*move)
+        moves.append(move)
+
+    while moves:
+        assert game.pop_move() == moves.pop()
+        assert game_state(game) == states.pop()
+    assert game.pop_move() is None
+    assert game_state(game) == game_state(GessGame(backend=backend))
+
+
+@pytest.mark.parametrize("backend", sorted(BOARD_BACKENDS))
+def test_illegal_push_move_changes_nothing(backend):
+    rng = random.Random(3)
+    game = GessGame(backend=backend)
+    for ply in range(30):
+        before = game_state(game)
+        start, end = rng.choice(("b", "k", "t")) + str(rng.randint(1, 20)), "m" + str(rng.randint(1, 20))
+        if not game.push_move(start, end):
+            assert game_state(game) == before
+        move = game.random_move(rng)
+        if move is None:
+            break
+        game.make_move(*move)
+
+
+def test_pop_move_undoes_a_winning_move():
+    game = GessGame()
+    game.push_move("c3", "c5")
+    game.resign_game()
+    game.pop_move()
+    assert game.get_game_state() == "UNFINISHED"
+    assert game.get_whose_turn() == "B"